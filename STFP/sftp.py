@@ -1,40 +1,180 @@
 # Fichier : STFP/sftp.py
 # Description : Ce fichier contient les fonctionnalités pour gérer les opérations SFTP.
 
+import fnmatch
+import hashlib
+import os
+import queue
+import sqlite3
+import stat
+import threading
+import time
+import uuid
 import paramiko
 import logging
-from constantes.const1 import load_config, SFTP_HOSTNAME, SFTP_PORT, SFTP_USERNAME, SFTP_PASSWORD
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from constantes import const1
 
 logger = logging.getLogger(__name__)
 
+# Taille de fenêtre SSH et de paquet utilisées pour les transferts (débit élevé sur liens lointains)
+WINDOW_SIZE = 64 * 1024 * 1024
+MAX_PACKET_SIZE = 256 * 1024
+# Taille des blocs lus sur un fichier distant
+BLOCK_SIZE = 1024 * 1024
+# Nombre de canaux SFTP ouverts par défaut pour les téléchargements en lot
+DEFAULT_CHANNELS = 4
+# Suffixe des fichiers en cours de téléchargement
+PART_SUFFIX = ".part"
+# Nombre de tentatives et délais (secondes) des téléchargements reprenables
+DEFAULT_RETRIES = 5
+BACKOFF_INITIAL = 1.0
+BACKOFF_MAX = 60.0
+# Nom du manifeste de synchronisation créé dans le répertoire local
+MANIFEST_FILENAME = ".sftp_manifest.db"
+
+# Actions enregistrées dans le journal de synchronisation
+ACTION_IGNORE = "ignore"
+ACTION_TELECHARGE = "telecharge"
+ACTION_INCHANGE = "inchange"
+ACTION_ERREUR = "erreur"
+ACTION_IMPORTE = "importe"
+ACTION_ERREUR_IMPORT = "erreur_import"
+
+def file_sha256(path: str) -> str:
+    """Calcule l'empreinte SHA-256 d'un fichier local."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class SyncManifest:
+    """
+    Manifeste local (SQLite) des fichiers distants déjà synchronisés et journal des synchronisations.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): Chemin de la base SQLite du manifeste (créée si besoin).
+        """
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sftp_manifest (
+                    remote_path TEXT PRIMARY KEY,
+                    taille INTEGER NOT NULL,
+                    mtime INTEGER NOT NULL,
+                    sha256 TEXT,
+                    local_path TEXT,
+                    date_synchro DATETIME
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sftp_sync_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT NOT NULL,
+                    date DATETIME NOT NULL,
+                    remote_path TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    detail TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sftp_sync_log_run ON sftp_sync_log(run_id)")
+
+    def entries(self) -> Dict[str, dict]:
+        """Retourne les entrées du manifeste indexées par chemin distant."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM sftp_manifest").fetchall()
+        return {row["remote_path"]: dict(row) for row in rows}
+
+    def update(self, remote_path: str, taille: int, mtime: int, sha256: Optional[str], local_path: str):
+        """Enregistre l'état d'un fichier après un téléchargement réussi."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO sftp_manifest (remote_path, taille, mtime, sha256, local_path, date_synchro)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(remote_path) DO UPDATE SET
+                    taille = excluded.taille, mtime = excluded.mtime, sha256 = excluded.sha256,
+                    local_path = excluded.local_path, date_synchro = excluded.date_synchro
+                """,
+                (remote_path, taille, mtime, sha256, local_path, datetime.now().isoformat())
+            )
+
+    def commit(self, entry: dict):
+        """Enregistre une entrée retournée par SFTPClient.sync_directory (voir commit_manifest)."""
+        self.update(entry["remote_path"], entry["taille"], entry["mtime"], entry["sha256"], entry["local_path"])
+
+    def log(self, run_id: str, entries: Sequence[Tuple[str, str, Optional[str]]]):
+        """
+        Ajoute des lignes au journal d'une synchronisation.
+
+        Args:
+            run_id (str): Identifiant de l'exécution.
+            entries: Couples (remote_path, action, detail).
+        """
+        now = datetime.now().isoformat()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO sftp_sync_log (run_id, date, remote_path, action, detail) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, now, remote_path, action, detail) for remote_path, action, detail in entries]
+            )
+
+    def run_log(self, run_id: str) -> List[dict]:
+        """Retourne le journal d'une synchronisation."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT remote_path, action, detail, date FROM sftp_sync_log WHERE run_id = ? ORDER BY id",
+                (run_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
 class SFTPClient:
     """
     Classe pour gérer les opérations SFTP.
     """
-    def __init__(self):
+    def __init__(self, config: Optional[dict] = None):
+        """
+        Args:
+            config (dict, optional): Paramètres de connexion (host, port, username, password).
+                                     Par défaut const1.SFTP_CONFIG.
+        """
         # S'assurer que la configuration est chargée avant d'utiliser les constantes
-        load_config()
+        if config is None:
+            const1.load_config()
+            config = const1.SFTP_CONFIG
+        self.config = config
         self.transport = None
         self.sftp = None
+        # Protège l'ouverture du transport lorsque plusieurs threads demandent un canal
+        self._lock = threading.Lock()
 
     def connect(self):
         """
         Établit une connexion SFTP en utilisant les informations de configuration.
 
-        Args:
-            hostname (str): Nom d'hôte du serveur SFTP.
-            port (int): Port du serveur SFTP.
-        Args:
-            hostname (str): Nom d'hôte du serveur SFTP.
-            port (int): Port du serveur SFTP.
-            username (str): Nom d'utilisateur pour la connexion SFTP.
-            password (str): Mot de passe pour la connexion SFTP.
+        Le transport est ouvert avec une grande fenêtre SSH pour que chaque
+        canal puisse avoir beaucoup de données en vol.
         """
+        hostname, port = self.config["host"], self.config["port"]
         try:
-            self.transport = paramiko.Transport((hostname, port))
-            self.transport.connect(username=SFTP_USERNAME, password=SFTP_PASSWORD)
+            self.transport = paramiko.Transport(
+                (hostname, port),
+                default_window_size=WINDOW_SIZE,
+                default_max_packet_size=MAX_PACKET_SIZE
+            )
+            self.transport.connect(username=self.config["username"], password=self.config["password"])
             self.sftp = paramiko.SFTPClient.from_transport(self.transport)
-            print(f"Connexion SFTP établie à {SFTP_HOSTNAME}:{SFTP_PORT}")
+            print(f"Connexion SFTP établie à {hostname}:{port}")
         except paramiko.AuthenticationException:
             logger.error("Échec de l'authentification SFTP.")
         except paramiko.SSHException as e:
@@ -42,6 +182,24 @@ class SFTPClient:
         except Exception as e:
             logger.error(f"Erreur inattendue lors de la connexion SFTP : {e}")
 
+    def open_channel(self) -> paramiko.SFTPClient:
+        """
+        Ouvre un canal SFTP supplémentaire sur le transport déjà authentifié.
+
+        Returns:
+            paramiko.SFTPClient: Un nouveau canal, à fermer par l'appelant.
+        """
+        with self._lock:
+            if self.transport is None or not self.transport.is_active():
+                self.connect()
+            if self.transport is None or not self.transport.is_active():
+                raise ConnectionError("Aucune connexion SFTP établie.")
+            return paramiko.SFTPClient.from_transport(
+                self.transport,
+                window_size=WINDOW_SIZE,
+                max_packet_size=MAX_PACKET_SIZE
+            )
+
     def list_files(self, remote_path):
         """
         Liste les fichiers dans un répertoire distant.
@@ -65,14 +223,19 @@ class SFTPClient:
             logger.warning("Aucune connexion SFTP établie.")
             return None
 
-    def download_file(self, remote_path, local_path):
+    def download_file(self, remote_path, local_path, resumable: bool = False):
         """
         Télécharge un fichier depuis le serveur SFTP.
 
         Args:
             remote_path (str): Chemin du fichier distant.
             local_path (str): Chemin où enregistrer le fichier localement.
+            resumable (bool): Utilise download_file_resumable (fichier .part, reprise et
+                              nouvelles tentatives) pour les fichiers volumineux.
         """
+        if resumable:
+            self.download_file_resumable(remote_path, local_path)
+            return
         if self.sftp:
             try:
                 self.sftp.get(remote_path, local_path)
@@ -84,6 +247,380 @@ class SFTPClient:
         else:
             logger.warning("Aucune connexion SFTP établie.")
 
+    @staticmethod
+    def _transfer(channel, remote_path: str, local_path: str, verify_size: bool = True) -> int:
+        """
+        Copie un fichier distant vers un fichier local sur un canal donné.
+
+        La lecture est pré-chargée (prefetch) : toutes les requêtes de lecture
+        sont envoyées d'avance au lieu d'attendre chaque bloc.
+
+        Returns:
+            int: Nombre d'octets écrits.
+        """
+        size = channel.stat(remote_path).st_size
+        local_dir = os.path.dirname(local_path)
+        if local_dir:
+            os.makedirs(local_dir, exist_ok=True)
+        written = 0
+        with channel.open(remote_path, "rb") as remote_file, open(local_path, "wb") as local_file:
+            if hasattr(remote_file, "prefetch"):
+                remote_file.prefetch(size)
+            while True:
+                block = remote_file.read(BLOCK_SIZE)
+                if not block:
+                    break
+                local_file.write(block)
+                written += len(block)
+        if verify_size and written != size:
+            raise IOError(f"Taille incorrecte pour '{remote_path}' : {written} octets reçus, {size} attendus.")
+        return written
+
+    def _reset_transport(self):
+        """Ferme le transport courant pour forcer une reconnexion au prochain canal."""
+        with self._lock:
+            for resource in (self.sftp, self.transport):
+                if resource is not None:
+                    try:
+                        resource.close()
+                    except Exception:
+                        pass
+            self.sftp = None
+            self.transport = None
+
+    def download_file_resumable(
+        self,
+        remote_path: str,
+        local_path: str,
+        expected_sha256: Optional[str] = None,
+        max_retries: int = DEFAULT_RETRIES,
+        backoff: float = BACKOFF_INITIAL,
+        channel_factory: Optional[Callable[[], object]] = None
+    ) -> Dict:
+        """
+        Télécharge un fichier volumineux en reprenant les transferts interrompus.
+
+        Les données sont écrites dans local_path + '.part'. Après une erreur, la
+        connexion est rouverte et la lecture reprend à la taille du fichier
+        partiel, avec une attente exponentielle entre les tentatives. Le fichier
+        n'est renommé en local_path (os.replace, atomique) qu'une fois sa taille
+        et, si fournie, son empreinte SHA-256 vérifiées.
+
+        Args:
+            remote_path (str): Chemin du fichier distant.
+            local_path (str): Chemin final du fichier local.
+            expected_sha256 (str, optional): Empreinte attendue du fichier complet.
+            max_retries (int): Nombre de nouvelles tentatives après la première.
+            backoff (float): Attente initiale en secondes, doublée à chaque tentative.
+            channel_factory (Callable, optional): Fonction créant un canal (voir download_files).
+
+        Returns:
+            dict: remote_path, local_path, octets, tentatives, octets_repris, duree_s.
+
+        Raises:
+            IOError: Si le fichier n'a pas pu être téléchargé et vérifié après toutes les tentatives.
+        """
+        factory = channel_factory or self.open_channel
+        part_path = local_path + PART_SUFFIX
+        local_dir = os.path.dirname(local_path)
+        if local_dir:
+            os.makedirs(local_dir, exist_ok=True)
+
+        start = time.perf_counter()
+        repris = 0
+        derniere_erreur = None
+        for tentative in range(max_retries + 1):
+            if tentative:
+                attente = min(backoff * 2 ** (tentative - 1), BACKOFF_MAX)
+                logger.warning(
+                    f"Nouvelle tentative {tentative}/{max_retries} pour '{remote_path}' dans {attente:.1f} s "
+                    f"({derniere_erreur})"
+                )
+                time.sleep(attente)
+                if channel_factory is None:
+                    self._reset_transport()
+
+            channel = None
+            try:
+                channel = factory()
+                size = channel.stat(remote_path).st_size
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                if offset > size:
+                    # Fichier partiel incohérent (fichier distant remplacé) : reprise depuis zéro
+                    offset = 0
+                    os.remove(part_path)
+                if offset:
+                    repris = offset
+                    logger.info(f"Reprise de '{remote_path}' à l'octet {offset}/{size}")
+
+                with channel.open(remote_path, "rb") as remote_file, open(part_path, "ab") as part_file:
+                    remote_file.seek(offset)
+                    if hasattr(remote_file, "prefetch"):
+                        remote_file.prefetch(size)
+                    while True:
+                        block = remote_file.read(BLOCK_SIZE)
+                        if not block:
+                            break
+                        part_file.write(block)
+
+                written = os.path.getsize(part_path)
+                if written != size:
+                    raise IOError(f"taille incorrecte : {written} octets reçus, {size} attendus")
+                if expected_sha256 and file_sha256(part_path) != expected_sha256.lower():
+                    # Contenu corrompu : le fichier partiel ne peut pas servir de point de reprise
+                    os.remove(part_path)
+                    raise IOError("empreinte SHA-256 incorrecte")
+
+                os.replace(part_path, local_path)
+                duree = time.perf_counter() - start
+                logger.info(f"'{remote_path}' téléchargé vers '{local_path}' ({size} octets, {tentative + 1} tentative(s))")
+                return {
+                    "remote_path": remote_path,
+                    "local_path": local_path,
+                    "octets": size,
+                    "tentatives": tentative + 1,
+                    "octets_repris": repris,
+                    "duree_s": duree
+                }
+            except FileNotFoundError:
+                logger.error(f"Le fichier distant '{remote_path}' n'a pas été trouvé.")
+                raise
+            except Exception as e:
+                derniere_erreur = e
+            finally:
+                if channel is not None:
+                    try:
+                        channel.close()
+                    except Exception:
+                        pass
+
+        logger.error(f"Échec du téléchargement de '{remote_path}' après {max_retries + 1} tentatives : {derniere_erreur}")
+        raise IOError(f"Échec du téléchargement de '{remote_path}' : {derniere_erreur}")
+
+    def download_files(
+        self,
+        files: Sequence[Union[str, Tuple[str, str]]],
+        local_dir: Optional[str] = None,
+        max_channels: int = DEFAULT_CHANNELS,
+        verify_size: bool = True,
+        channel_factory: Optional[Callable[[], object]] = None
+    ) -> List[Dict]:
+        """
+        Télécharge plusieurs fichiers en parallèle sur un pool de canaux SFTP.
+
+        Un seul transport authentifié est utilisé ; chaque thread emprunte un
+        canal au pool pour la durée d'un fichier puis le rend.
+
+        Args:
+            files: Chemins distants (téléchargés dans local_dir) ou couples (distant, local).
+            local_dir (str, optional): Répertoire local pour les chemins distants seuls.
+            max_channels (int): Nombre de canaux et de téléchargements simultanés.
+            verify_size (bool): Vérifie que la taille locale correspond à la taille distante.
+            channel_factory (Callable, optional): Fonction créant un canal (objet exposant
+                                                  stat, open et close). Par défaut open_channel.
+
+        Returns:
+            list[dict]: Un résultat par fichier, dans l'ordre de files : remote_path, local_path,
+                        statut ('ok' ou 'erreur'), octets, duree_s, debit_mo_s, erreur.
+        """
+        transfers = []
+        for entry in files:
+            if isinstance(entry, (tuple, list)):
+                transfers.append((entry[0], entry[1]))
+            else:
+                if local_dir is None:
+                    raise ValueError("local_dir est requis lorsque seuls les chemins distants sont fournis.")
+                transfers.append((entry, os.path.join(local_dir, os.path.basename(entry))))
+
+        factory = channel_factory or self.open_channel
+        n_channels = max(1, min(max_channels, len(transfers)))
+        pool = queue.Queue()
+        channels = []
+
+        def _borrow():
+            # Un canal est ouvert seulement si tous les canaux existants sont occupés,
+            # ce qui limite leur nombre au nombre de threads
+            try:
+                return pool.get_nowait()
+            except queue.Empty:
+                channel = factory()
+                channels.append(channel)
+                return channel
+
+        def _download(transfer):
+            remote_path, local_path = transfer
+            result = {"remote_path": remote_path, "local_path": local_path, "statut": "ok",
+                      "octets": 0, "duree_s": 0.0, "debit_mo_s": 0.0, "erreur": None}
+            channel = None
+            start = time.perf_counter()
+            try:
+                # L'ouverture du canal (authentification, connexion) peut échouer :
+                # l'erreur est rapportée pour ce fichier sans interrompre le lot
+                channel = _borrow()
+                result["octets"] = self._transfer(channel, remote_path, local_path, verify_size)
+            except Exception as e:
+                logger.error(f"Erreur lors du téléchargement de '{remote_path}' : {e}")
+                result["statut"] = "erreur"
+                result["erreur"] = str(e)
+            finally:
+                if channel is not None:
+                    pool.put(channel)
+            result["duree_s"] = time.perf_counter() - start
+            if result["duree_s"] > 0:
+                result["debit_mo_s"] = result["octets"] / 1e6 / result["duree_s"]
+            logger.info(
+                f"'{remote_path}' : {result['statut']}, {result['octets']} octets "
+                f"en {result['duree_s']:.2f} s ({result['debit_mo_s']:.1f} Mo/s)"
+            )
+            return result
+
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=n_channels) as executor:
+                results = list(executor.map(_download, transfers))
+        finally:
+            for channel in channels:
+                try:
+                    channel.close()
+                except Exception as e:
+                    logger.warning(f"Erreur lors de la fermeture d'un canal SFTP : {e}")
+
+        total = sum(result["octets"] for result in results)
+        duree = time.perf_counter() - start
+        logger.info(
+            f"{sum(r['statut'] == 'ok' for r in results)}/{len(results)} fichiers téléchargés, "
+            f"{total / 1e6:.1f} Mo en {duree:.2f} s sur {len(channels)} canaux"
+        )
+        return results
+
+    def list_files_attr(self, remote_path: str, pattern: Optional[str] = None, channel=None) -> List[dict]:
+        """
+        Liste les fichiers réguliers d'un répertoire distant avec leur taille et leur date de modification.
+
+        Args:
+            remote_path (str): Chemin du répertoire distant.
+            pattern (str, optional): Motif de nom de fichier (ex. '*.csv').
+            channel (optional): Canal à utiliser. Par défaut la connexion principale.
+
+        Returns:
+            list[dict]: name, remote_path, taille, mtime pour chaque fichier.
+        """
+        channel = channel or self.sftp
+        if channel is None:
+            raise ConnectionError("Aucune connexion SFTP établie.")
+        files = []
+        for attr in channel.listdir_attr(remote_path):
+            if attr.st_mode is not None and not stat.S_ISREG(attr.st_mode):
+                continue
+            if pattern and not fnmatch.fnmatch(attr.filename, pattern):
+                continue
+            files.append({
+                "name": attr.filename,
+                "remote_path": f"{remote_path.rstrip('/')}/{attr.filename}",
+                "taille": int(attr.st_size),
+                "mtime": int(attr.st_mtime)
+            })
+        return files
+
+    def sync_directory(
+        self,
+        remote_dir: str,
+        local_dir: str,
+        manifest_path: Optional[str] = None,
+        pattern: Optional[str] = None,
+        verify_hash: bool = False,
+        max_channels: int = DEFAULT_CHANNELS,
+        channel_factory: Optional[Callable[[], object]] = None,
+        commit_manifest: bool = True
+    ) -> Dict:
+        """
+        Synchronise un répertoire distant en ne téléchargeant que les fichiers nouveaux ou modifiés.
+
+        Les fichiers dont la taille et la date de modification sont identiques au
+        manifeste sont ignorés. Avec verify_hash, l'empreinte SHA-256 des fichiers
+        téléchargés est comparée à celle du manifeste : un fichier simplement
+        touché (contenu identique) est marqué 'inchange'.
+
+        Args:
+            remote_dir (str): Répertoire distant.
+            local_dir (str): Répertoire local de destination.
+            manifest_path (str, optional): Base SQLite du manifeste. Par défaut local_dir/.sftp_manifest.db.
+            pattern (str, optional): Motif de nom de fichier (ex. '*.csv').
+            verify_hash (bool): Calcule et compare les empreintes SHA-256.
+            max_channels (int): Nombre de téléchargements simultanés.
+            channel_factory (Callable, optional): Fonction créant un canal (voir download_files).
+            commit_manifest (bool): Enregistre les fichiers téléchargés dans le manifeste. Avec False,
+                                    l'appelant enregistre chaque entrée de 'telecharges' par
+                                    manifest.commit(entry) une fois traitée (après import) : un
+                                    fichier dont le traitement échoue est retéléchargé au prochain passage.
+
+        Returns:
+            dict: run_id, manifest (SyncManifest), telecharges (fichiers nouveaux ou modifiés),
+                  inchanges, ignores et erreurs.
+        """
+        manifest = SyncManifest(manifest_path or os.path.join(local_dir, MANIFEST_FILENAME))
+        run_id = uuid.uuid4().hex
+        factory = channel_factory or self.open_channel
+
+        channel = factory()
+        try:
+            remote_files = self.list_files_attr(remote_dir, pattern, channel)
+        finally:
+            channel.close()
+
+        connus = manifest.entries()
+        a_telecharger, ignores = [], []
+        for remote_file in remote_files:
+            connu = connus.get(remote_file["remote_path"])
+            if connu and connu["taille"] == remote_file["taille"] and connu["mtime"] == remote_file["mtime"]:
+                ignores.append(remote_file)
+            else:
+                a_telecharger.append(remote_file)
+        logger.info(
+            f"Synchronisation de '{remote_dir}' : {len(a_telecharger)} fichiers à télécharger, "
+            f"{len(ignores)} inchangés ignorés"
+        )
+
+        results = self.download_files(
+            [(f["remote_path"], os.path.join(local_dir, f["name"])) for f in a_telecharger],
+            max_channels=max_channels,
+            channel_factory=factory
+        ) if a_telecharger else []
+
+        telecharges, inchanges, erreurs = [], [], []
+        journal = [(f["remote_path"], ACTION_IGNORE, None) for f in ignores]
+        for remote_file, result in zip(a_telecharger, results):
+            entry = {**remote_file, **result}
+            if result["statut"] != "ok":
+                erreurs.append(entry)
+                journal.append((remote_file["remote_path"], ACTION_ERREUR, result["erreur"]))
+                continue
+            entry["sha256"] = file_sha256(result["local_path"]) if verify_hash else None
+            precedent = connus.get(remote_file["remote_path"])
+            if verify_hash and precedent and precedent["sha256"] == entry["sha256"]:
+                manifest.commit(entry)
+                inchanges.append(entry)
+                journal.append((remote_file["remote_path"], ACTION_INCHANGE, entry["sha256"]))
+            else:
+                if commit_manifest:
+                    manifest.commit(entry)
+                telecharges.append(entry)
+                journal.append((remote_file["remote_path"], ACTION_TELECHARGE, f"{result['octets']} octets"))
+        manifest.log(run_id, journal)
+
+        logger.info(
+            f"Synchronisation {run_id} terminée : {len(telecharges)} téléchargés, {len(inchanges)} inchangés, "
+            f"{len(ignores)} ignorés, {len(erreurs)} erreurs"
+        )
+        return {
+            "run_id": run_id,
+            "manifest": manifest,
+            "telecharges": telecharges,
+            "inchanges": inchanges,
+            "ignores": ignores,
+            "erreurs": erreurs
+        }
+
     def disconnect(self):
         """
         Ferme la connexion SFTP.
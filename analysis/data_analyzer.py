@@ -1,8 +1,17 @@
 import pandas as pd
+import numpy as np
 import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from scipy import sparse
 
 logger = logging.getLogger(__name__)
 
+# Dimension columns used by the exposure cube when none are specified
+DEFAULT_CUBE_DIMENSIONS = ['Fund', 'Manager', 'Country', 'Asset Type', 'Sector', 'Currency']
+
+# Maximum number of (fund, fund) pairs materialized at once by calculate_fund_overlap
+OVERLAP_BLOCK_PAIRS = 5_000_000
+
 def analyze_portfolio(df: pd.DataFrame):
     """
     Analyzes portfolio data within a pandas DataFrame.
@@ -18,12 +27,49 @@ def analyze_portfolio(df: pd.DataFrame):
     pass
     logger.info("Starting portfolio analysis.")
 
-def calculate_market_value_by_asset_type(df: pd.DataFrame) -> pd.DataFrame:
+def _market_values(
+    df: pd.DataFrame,
+    value_col: str = 'Market Value',
+    fx_rates=None,
+    base_currency: Optional[str] = None,
+    currency_col: str = 'Currency',
+    date_col: str = 'Date'
+) -> pd.Series:
+    """
+    Returns the market value of each position, converted into base_currency when fx_rates is provided.
+
+    Positions without an available rate are left as NaN (see logic.fx.FXRateTable.convert).
+    """
+    if fx_rates is None:
+        return df[value_col]
+    if base_currency is None:
+        raise ValueError("base_currency is required when fx_rates is provided.")
+    missing = [col for col in (date_col, currency_col) if col not in df.columns]
+    if missing:
+        logger.error(f"DataFrame must contain the following columns for the currency conversion: {missing}")
+        raise ValueError(f"DataFrame must contain the following columns: {missing}")
+    converted = fx_rates.convert(
+        df[[date_col, currency_col, value_col]], base_currency, [value_col], date_col, currency_col, keep_local=False
+    )
+    return converted[value_col]
+
+def calculate_market_value_by_asset_type(
+    df: pd.DataFrame,
+    fx_rates=None,
+    base_currency: Optional[str] = None,
+    currency_col: str = 'Currency',
+    date_col: str = 'Date'
+) -> pd.DataFrame:
     """
     Calculates the total market value for each asset type in a DataFrame.
 
     Args:
         df: A pandas DataFrame with at least the columns 'Asset Type' and 'Market Value'.
+        fx_rates: Optional logic.fx.FXRateTable used to convert the market value
+            into base_currency before aggregation.
+        base_currency: Reporting currency code, required with fx_rates.
+        currency_col: Column holding the currency code of each position.
+        date_col: Column holding the valuation date of each position.
 
     Returns:
         A pandas DataFrame with 'Asset Type' and the sum of 'Market Value' for each type.
@@ -33,17 +79,29 @@ def calculate_market_value_by_asset_type(df: pd.DataFrame) -> pd.DataFrame:
         raise ValueError("DataFrame must contain 'Asset Type' and 'Market Value' columns.")
 
     logger.info("Calculating market value by asset type.")
-    market_value_by_type = df.groupby('Asset Type')['Market Value'].sum().reset_index()
+    values = _market_values(df, 'Market Value', fx_rates, base_currency, currency_col, date_col)
+    market_value_by_type = values.groupby(df['Asset Type'], observed=True).sum().reset_index()
     return market_value_by_type
     logger.info("Finished calculating market value by asset type.")
 
-def calculate_market_value_by_fund_country_asset_type(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_market_value_by_fund_country_asset_type(
+    df: pd.DataFrame,
+    fx_rates=None,
+    base_currency: Optional[str] = None,
+    currency_col: str = 'Currency',
+    date_col: str = 'Date'
+) -> pd.DataFrame:
     """
     Calculates the total market value grouped by fund, country, and asset type.
 
     Args:
         df: A pandas DataFrame with at least the columns 'Fund', 'Country',
             'Asset Type', and 'Market Value'.
+        fx_rates: Optional logic.fx.FXRateTable used to convert the market value
+            into base_currency before aggregation.
+        base_currency: Reporting currency code, required with fx_rates.
+        currency_col: Column holding the currency code of each position.
+        date_col: Column holding the valuation date of each position.
 
     Returns:
         A pandas DataFrame with the sum of 'Market Value' for each
@@ -55,16 +113,30 @@ def calculate_market_value_by_fund_country_asset_type(df: pd.DataFrame) -> pd.Da
         raise ValueError(f"DataFrame must contain the following columns: {required_cols}")
 
     logger.info("Calculating market value grouped by fund, country, and asset type.")
-    market_value_grouped = df.groupby(['Fund', 'Country', 'Asset Type'])['Market Value'].sum().reset_index()
+    values = _market_values(df, 'Market Value', fx_rates, base_currency, currency_col, date_col)
+    market_value_grouped = values.groupby(
+        [df['Fund'], df['Country'], df['Asset Type']], observed=True
+    ).sum().reset_index()
     return market_value_grouped
     logger.info("Finished calculating market value grouped by fund, country, and asset type.")
 
-def calculate_weight_by_fund(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_weight_by_fund(
+    df: pd.DataFrame,
+    fx_rates=None,
+    base_currency: Optional[str] = None,
+    currency_col: str = 'Currency',
+    date_col: str = 'Date'
+) -> pd.DataFrame:
     """
     Calculates the weight of each position within its respective fund.
 
     Args:
         df: A pandas DataFrame with at least the columns 'Fund' and 'Market Value'.
+        fx_rates: Optional logic.fx.FXRateTable used to convert the market value
+            into base_currency before aggregation.
+        base_currency: Reporting currency code, required with fx_rates.
+        currency_col: Column holding the currency code of each position.
+        date_col: Column holding the valuation date of each position.
 
     Returns:
         A pandas DataFrame with an additional column 'Weight by Fund'.
@@ -75,18 +147,30 @@ def calculate_weight_by_fund(df: pd.DataFrame) -> pd.DataFrame:
 
     logger.info("Calculating weight by fund.")
     # Calculate total market value per fund
-    fund_totals = df.groupby('Fund')['Market Value'].transform('sum')
+    values = _market_values(df, 'Market Value', fx_rates, base_currency, currency_col, date_col)
+    fund_totals = values.groupby(df['Fund'], observed=True).transform('sum')
     # Calculate weight for each position
-    df['Weight by Fund'] = df['Market Value'] / fund_totals
+    df['Weight by Fund'] = values / fund_totals
     return df
     logger.info("Finished calculating weight by fund.")
 
-def calculate_weight_by_asset_type_and_fund(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_weight_by_asset_type_and_fund(
+    df: pd.DataFrame,
+    fx_rates=None,
+    base_currency: Optional[str] = None,
+    currency_col: str = 'Currency',
+    date_col: str = 'Date'
+) -> pd.DataFrame:
     """
     Calculates the weight of each position within its respective asset type and fund combination.
 
     Args:
         df: A pandas DataFrame with at least the columns 'Fund', 'Asset Type', and 'Market Value'.
+        fx_rates: Optional logic.fx.FXRateTable used to convert the market value
+            into base_currency before aggregation.
+        base_currency: Reporting currency code, required with fx_rates.
+        currency_col: Column holding the currency code of each position.
+        date_col: Column holding the valuation date of each position.
 
     Returns:
         A pandas DataFrame with an additional column 'Weight by Asset Type and Fund'.
@@ -98,18 +182,30 @@ def calculate_weight_by_asset_type_and_fund(df: pd.DataFrame) -> pd.DataFrame:
 
     logger.info("Calculating weight by asset type and fund.")
     # Calculate total market value per asset type and fund combination
-    group_totals = df.groupby(['Fund', 'Asset Type'])['Market Value'].transform('sum')
+    values = _market_values(df, 'Market Value', fx_rates, base_currency, currency_col, date_col)
+    group_totals = values.groupby([df['Fund'], df['Asset Type']], observed=True).transform('sum')
     # Calculate weight for each position within these groups
-    df['Weight by Asset Type and Fund'] = df['Market Value'] / group_totals
+    df['Weight by Asset Type and Fund'] = values / group_totals
     return df
     logger.info("Finished calculating weight by asset type and fund.")
 
-def calculate_weight_by_asset_type_and_manager(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_weight_by_asset_type_and_manager(
+    df: pd.DataFrame,
+    fx_rates=None,
+    base_currency: Optional[str] = None,
+    currency_col: str = 'Currency',
+    date_col: str = 'Date'
+) -> pd.DataFrame:
     """
     Calculates the weight of each position within its respective asset type and manager combination.
 
     Args:
         df: A pandas DataFrame with at least the columns 'Manager', 'Asset Type', and 'Market Value'.
+        fx_rates: Optional logic.fx.FXRateTable used to convert the market value
+            into base_currency before aggregation.
+        base_currency: Reporting currency code, required with fx_rates.
+        currency_col: Column holding the currency code of each position.
+        date_col: Column holding the valuation date of each position.
 
     Returns:
         A pandas DataFrame with an additional column 'Weight by Asset Type and Manager'.
@@ -121,12 +217,366 @@ def calculate_weight_by_asset_type_and_manager(df: pd.DataFrame) -> pd.DataFrame
 
     logger.info("Calculating weight by asset type and manager.")
     # Calculate total market value per asset type and manager combination
-    group_totals = df.groupby(['Manager', 'Asset Type'])['Market Value'].transform('sum')
+    values = _market_values(df, 'Market Value', fx_rates, base_currency, currency_col, date_col)
+    group_totals = values.groupby([df['Manager'], df['Asset Type']], observed=True).transform('sum')
     # Calculate weight for each position within these groups
-    df['Weight by Asset Type and Manager'] = df['Market Value'] / group_totals
+    df['Weight by Asset Type and Manager'] = values / group_totals
     return df
     logger.info("Finished calculating weight by asset type and manager.")
 
+def build_fund_weight_matrix(
+    df: pd.DataFrame,
+    fund_col: str = 'id_fonds',
+    security_col: str = 'id_titre',
+    value_col: str = 'valeur_marchande'
+) -> Tuple[sparse.csr_matrix, pd.Index, pd.Index]:
+    """
+    Builds a sparse fund x security weight matrix from composition rows.
+
+    Args:
+        df: A pandas DataFrame of holdings, typically one date of
+            composition_fonds_gestionnaire, with fund, security and market value columns.
+        fund_col: Column identifying the fund.
+        security_col: Column identifying the security.
+        value_col: Column holding the market value.
+
+    Returns:
+        A tuple (weights, funds, securities) where weights is a CSR matrix whose
+        rows sum to 1, and funds / securities label its rows and columns.
+    """
+    required_cols = [fund_col, security_col, value_col]
+    if not all(col in df.columns for col in required_cols):
+        logger.error(f"DataFrame must contain the following columns for the fund weight matrix: {required_cols}")
+        raise ValueError(f"DataFrame must contain the following columns: {required_cols}")
+
+    fund_codes, funds = pd.factorize(df[fund_col], sort=True)
+    security_codes, securities = pd.factorize(df[security_col], sort=True)
+    values = df[value_col].fillna(0).to_numpy(dtype=float)
+
+    # Duplicate (fund, security) rows are summed when converting to CSR
+    matrix = sparse.coo_matrix(
+        (values, (fund_codes, security_codes)),
+        shape=(len(funds), len(securities))
+    ).tocsr()
+    totals = np.asarray(matrix.sum(axis=1)).ravel()
+    inverse = np.divide(1.0, totals, out=np.zeros_like(totals), where=totals != 0)
+    weights = sparse.diags(inverse) @ matrix
+    weights.eliminate_zeros()
+    return weights.tocsr(), pd.Index(funds, name=fund_col), pd.Index(securities, name=security_col)
+
+def calculate_fund_overlap(
+    df: pd.DataFrame,
+    top_k: int = 5,
+    fund_col: str = 'id_fonds',
+    security_col: str = 'id_titre',
+    value_col: str = 'valeur_marchande'
+) -> Dict[str, pd.DataFrame]:
+    """
+    Calculates the pairwise holdings overlap and cosine similarity between all funds.
+
+    The overlap of two funds is the sum over securities of the smaller of
+    their two weights. It is computed security by security: every pair of
+    funds holding a security contributes the smaller weight, with all pairs
+    of a block of securities generated and summed at once. The cost grows
+    with the number of shared holdings rather than with the number of fund
+    pairs, and memory is bounded by OVERLAP_BLOCK_PAIRS.
+
+    Args:
+        df: A pandas DataFrame of holdings for a single date (see build_fund_weight_matrix).
+        top_k: Number of most similar funds to return for each fund.
+        fund_col: Column identifying the fund.
+        security_col: Column identifying the security.
+        value_col: Column holding the market value.
+
+    Returns:
+        A dict with the 'overlap' and 'cosine' fund x fund DataFrames, and
+        'top_similar' listing for each fund its top_k most overlapping funds.
+    """
+    logger.info("Calculating fund overlap matrix.")
+    weights, funds, _ = build_fund_weight_matrix(df, fund_col, security_col, value_col)
+    n_funds = len(funds)
+    overlap = _pairwise_min_sum(weights.tocsc(), n_funds)
+
+    norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+    inverse_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms != 0)
+    normalized = sparse.diags(inverse_norms) @ weights
+    cosine = (normalized @ normalized.T).toarray()
+
+    # Top-k most overlapping funds, excluding the fund itself
+    ranking = overlap.copy()
+    np.fill_diagonal(ranking, -np.inf)
+    k = min(top_k, n_funds - 1)
+    top_similar = pd.DataFrame()
+    if k > 0:
+        candidates = np.argpartition(-ranking, k - 1, axis=1)[:, :k]
+        rows = np.arange(n_funds)[:, None]
+        candidates = candidates[rows, np.argsort(-ranking[rows, candidates], axis=1, kind='stable')]
+        top_similar = pd.DataFrame({
+            fund_col: np.repeat(funds.to_numpy(), k),
+            'rank': np.tile(np.arange(1, k + 1), n_funds),
+            'similar_fund': funds.to_numpy()[candidates.ravel()],
+            'overlap': overlap[rows, candidates].ravel(),
+            'cosine': cosine[rows, candidates].ravel()
+        })
+
+    logger.info("Finished calculating fund overlap matrix.")
+    return {
+        'overlap': pd.DataFrame(overlap, index=funds, columns=funds),
+        'cosine': pd.DataFrame(cosine, index=funds, columns=funds),
+        'top_similar': top_similar
+    }
+
+def _pairwise_min_sum(by_security: sparse.csc_matrix, n_rows: int) -> np.ndarray:
+    """
+    Computes sum over columns of min(a[i, c], a[j, c]) for every pair of rows (i, j).
+
+    Each column with k non-zero entries yields its k * k pairs of entries;
+    columns are processed in blocks of at most OVERLAP_BLOCK_PAIRS pairs
+    (a single column may exceed it).
+    """
+    result = np.zeros(n_rows * n_rows)
+    indptr, rows, data = by_security.indptr, by_security.indices, by_security.data
+    counts = np.diff(indptr)
+    pair_ends = np.cumsum(counts.astype(np.int64) ** 2)
+    start_col = 0
+    while start_col < len(counts):
+        # Last column of the block: pairs up to the bound, at least one column
+        end_col = max(int(np.searchsorted(
+            pair_ends, (pair_ends[start_col - 1] if start_col else 0) + OVERLAP_BLOCK_PAIRS, side='right'
+        )), start_col + 1)
+        entries = np.arange(indptr[start_col], indptr[end_col])
+        if len(entries):
+            # Every entry is paired with each entry of its column
+            entry_counts = np.repeat(counts[start_col:end_col], counts[start_col:end_col])
+            left = np.repeat(entries, entry_counts)
+            column_starts = np.repeat(indptr[start_col:end_col], counts[start_col:end_col])
+            block_starts = np.repeat(np.cumsum(entry_counts) - entry_counts, entry_counts)
+            right = np.repeat(column_starts, entry_counts) + np.arange(len(left)) - block_starts
+            result += np.bincount(
+                rows[left].astype(np.int64) * n_rows + rows[right],
+                weights=np.minimum(data[left], data[right]),
+                minlength=n_rows * n_rows
+            )
+        start_col = end_col
+    return result.reshape(n_rows, n_rows)
+
+def _factorize_dimension(series: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Encodes a dimension column as integer codes, reusing categorical codes when available.
+
+    Missing values are kept as their own label so that no market value is dropped.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype(np.int64)
+        labels = series.cat.categories
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(labels), codes)
+            labels = labels.append(pd.Index([np.nan]))
+        return codes, pd.Index(labels)
+    codes, labels = pd.factorize(series, sort=True, use_na_sentinel=False)
+    return codes.astype(np.int64), pd.Index(labels)
+
+def _group_codes(codes: Sequence[np.ndarray], sizes: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Groups rows by a combination of integer codes.
+
+    Returns:
+        A tuple (inverse, first) where inverse maps each row to its group and
+        first holds the index of a representative row for each group.
+    """
+    if not codes:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    if np.prod([float(size) for size in sizes]) < 2 ** 62:
+        keys = np.ravel_multi_index(tuple(codes), tuple(sizes))
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    else:
+        _, first, inverse = np.unique(np.column_stack(codes), axis=0, return_index=True, return_inverse=True)
+    return inverse.ravel(), first
+
+class ExposureCube:
+    """
+    Aggregated market value cube over several dimensions.
+
+    The cube holds one cell per observed combination of dimension values,
+    with the summed market value and the number of positions. Aggregations,
+    weights and slices are computed from these cells and never from the
+    original DataFrame, which is left untouched.
+    """
+
+    def __init__(
+        self,
+        dimensions: List[str],
+        labels: Dict[str, pd.Index],
+        codes: Dict[str, np.ndarray],
+        values: np.ndarray,
+        counts: np.ndarray,
+        value_col: str
+    ):
+        self.dimensions = dimensions
+        self.labels = labels
+        self.codes = codes
+        self.values = values
+        self.counts = counts
+        self.value_col = value_col
+        self._aggregates: Dict[Tuple[str, ...], Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]] = {}
+
+    def _check_dimensions(self, dimensions: Sequence[str]):
+        unknown = [dim for dim in dimensions if dim not in self.dimensions]
+        if unknown:
+            logger.error(f"Unknown cube dimensions: {unknown}")
+            raise ValueError(f"Unknown cube dimensions: {unknown}. Available: {self.dimensions}")
+
+    def _aggregate_codes(self, by: Tuple[str, ...]) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+        """Aggregates the cells on a subset of dimensions, keeping integer codes (cached)."""
+        if by not in self._aggregates:
+            codes = [self.codes[dim] for dim in by]
+            inverse, first = _group_codes(codes, [len(self.labels[dim]) for dim in by])
+            n_groups = len(first) if by else 1
+            if not by:
+                inverse = np.zeros(len(self.values), dtype=np.int64)
+            self._aggregates[by] = (
+                {dim: self.codes[dim][first] for dim in by},
+                np.bincount(inverse, weights=self.values, minlength=n_groups),
+                np.bincount(inverse, weights=self.counts, minlength=n_groups).astype(np.int64)
+            )
+        return self._aggregates[by]
+
+    def total(self) -> float:
+        """Returns the total market value of the cube."""
+        return float(self.values.sum())
+
+    def aggregate(self, by: Sequence[str]) -> pd.DataFrame:
+        """
+        Sums the market value over the given dimensions.
+
+        Args:
+            by: Dimensions to group by, e.g. ['Fund', 'Asset Type'].
+
+        Returns:
+            A pandas DataFrame with the dimension labels, the summed market value
+            and the number of positions ('Positions') for each group.
+        """
+        by = tuple(by)
+        self._check_dimensions(by)
+        codes, values, counts = self._aggregate_codes(by)
+        result = pd.DataFrame({dim: self.labels[dim].take(codes[dim]) for dim in by})
+        result[self.value_col] = values
+        result['Positions'] = counts
+        return result.sort_values(list(by)).reset_index(drop=True) if by else result
+
+    def weights(self, by: Sequence[str], within: Sequence[str] = ()) -> pd.DataFrame:
+        """
+        Computes the weight of each group of 'by' within its parent group of 'within'.
+
+        Args:
+            by: Dimensions defining the weighted groups, e.g. ['Fund', 'Asset Type'].
+            within: Dimensions defining the parent groups, a subset of 'by'
+                (e.g. ['Fund']). Weights are relative to the cube total when empty.
+
+        Returns:
+            The aggregate over 'by' with an additional 'Weight' column.
+        """
+        by, within = tuple(by), tuple(within)
+        self._check_dimensions(by)
+        if not set(within) <= set(by):
+            raise ValueError(f"'within' dimensions {list(within)} must be a subset of 'by' dimensions {list(by)}")
+        codes, values, counts = self._aggregate_codes(by)
+        parent, _ = _group_codes([codes[dim] for dim in within], [len(self.labels[dim]) for dim in within])
+        if not within:
+            parent = np.zeros(len(values), dtype=np.int64)
+        totals = np.bincount(parent, weights=values)[parent]
+        result = pd.DataFrame({dim: self.labels[dim].take(codes[dim]) for dim in by})
+        result[self.value_col] = values
+        result['Positions'] = counts
+        result['Weight'] = np.divide(values, totals, out=np.zeros_like(values), where=totals != 0)
+        return result.sort_values(list(by)).reset_index(drop=True) if by else result
+
+    def slice(self, filters: Dict[str, Any]) -> 'ExposureCube':
+        """
+        Restricts the cube to the given dimension values.
+
+        Args:
+            filters: Mapping of dimension to a label or a list of labels,
+                e.g. {'Fund': 'F1', 'Country': ['FR', 'DE']}.
+
+        Returns:
+            A new ExposureCube over the matching cells.
+        """
+        self._check_dimensions(list(filters))
+        mask = np.ones(len(self.values), dtype=bool)
+        for dim, wanted in filters.items():
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            wanted_codes = np.flatnonzero(self.labels[dim].isin(list(wanted)))
+            mask &= np.isin(self.codes[dim], wanted_codes)
+        return ExposureCube(
+            self.dimensions,
+            self.labels,
+            {dim: codes[mask] for dim, codes in self.codes.items()},
+            self.values[mask],
+            self.counts[mask],
+            self.value_col
+        )
+
+def build_exposure_cube(
+    df: pd.DataFrame,
+    dimensions: Optional[Sequence[str]] = None,
+    value_col: str = 'Market Value',
+    fx_rates=None,
+    base_currency: Optional[str] = None,
+    currency_col: str = 'Currency',
+    date_col: str = 'Date'
+) -> ExposureCube:
+    """
+    Builds an exposure cube from position-level data in a single pass.
+
+    Each dimension column is factorized to integer codes once; the codes are
+    combined into one key and the market value is summed per observed
+    combination with a single bincount. The input DataFrame is not modified.
+
+    Args:
+        df: A pandas DataFrame with the dimension columns and 'Market Value'.
+        dimensions: Dimension columns to include. Defaults to the columns of
+            DEFAULT_CUBE_DIMENSIONS present in the DataFrame.
+        value_col: Column holding the market value.
+        fx_rates: Optional logic.fx.FXRateTable used to convert the market value
+            into base_currency before aggregation.
+        base_currency: Reporting currency code, required with fx_rates.
+        currency_col: Column holding the currency code of each position.
+        date_col: Column holding the valuation date of each position.
+
+    Returns:
+        An ExposureCube that can be aggregated, weighted and sliced without
+        going back to the DataFrame.
+    """
+    if dimensions is None:
+        dimensions = [dim for dim in DEFAULT_CUBE_DIMENSIONS if dim in df.columns]
+    required_cols = list(dimensions) + [value_col]
+    if not all(col in df.columns for col in required_cols):
+        logger.error(f"DataFrame must contain the following columns for the exposure cube: {required_cols}")
+        raise ValueError(f"DataFrame must contain the following columns: {required_cols}")
+
+    logger.info(f"Building exposure cube over dimensions {list(dimensions)}.")
+    codes, labels = {}, {}
+    for dim in dimensions:
+        codes[dim], labels[dim] = _factorize_dimension(df[dim])
+
+    values = _market_values(df, value_col, fx_rates, base_currency, currency_col, date_col).fillna(0).to_numpy(dtype=float)
+    if dimensions:
+        inverse, first = _group_codes([codes[dim] for dim in dimensions], [len(labels[dim]) for dim in dimensions])
+        n_cells = len(first)
+    else:
+        inverse, first, n_cells = np.zeros(len(df), dtype=np.int64), np.zeros(min(len(df), 1), dtype=np.int64), 1
+    cube = ExposureCube(
+        list(dimensions),
+        labels,
+        {dim: codes[dim][first] for dim in dimensions},
+        np.bincount(inverse, weights=values, minlength=n_cells),
+        np.bincount(inverse, minlength=n_cells).astype(np.int64),
+        value_col
+    )
+    logger.info(f"Finished building exposure cube with {n_cells} cells.")
+    return cube
+
 
 if __name__ == '__main__':
     # Example usage (will be populated later)
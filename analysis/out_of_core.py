@@ -0,0 +1,332 @@
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+import pyarrow.parquet as pq
+from sqlalchemy import bindparam, create_engine, text
+
+logger = logging.getLogger(__name__)
+
+# Name of the temporary column holding group totals during weight computation
+TOTAL_COLUMN = '__group_total__'
+
+# Maximum number of chunks submitted to the pool but not yet yielded, per worker
+IN_FLIGHT_PER_WORKER = 2
+
+# Engines created by SQLChunk.load, one per database URL and per process
+_ENGINES: Dict[str, Any] = {}
+
+class SQLChunk:
+    """
+    A picklable description of one chunk of rows read from the database.
+
+    Only the database URL, the query and its parameters are stored so that the
+    chunk can be loaded inside a worker process.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        expanding: Sequence[str] = (),
+        rename: Optional[Dict[str, str]] = None
+    ):
+        self.database_url = database_url
+        self.query = query
+        self.params = params or {}
+        self.expanding = tuple(expanding)
+        self.rename = rename
+
+    def load(self) -> pd.DataFrame:
+        """Runs the query and returns the chunk as a DataFrame."""
+        if self.database_url not in _ENGINES:
+            _ENGINES[self.database_url] = create_engine(self.database_url)
+        statement = text(self.query)
+        if self.expanding:
+            statement = statement.bindparams(*(bindparam(name, expanding=True) for name in self.expanding))
+        with _ENGINES[self.database_url].connect() as conn:
+            df = pd.read_sql(statement, conn, params=self.params)
+        return df.rename(columns=self.rename) if self.rename else df
+
+class ParquetChunk:
+    """
+    A picklable description of one chunk of row groups read from a Parquet file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        row_groups: Sequence[int],
+        columns: Optional[Sequence[str]] = None,
+        rename: Optional[Dict[str, str]] = None
+    ):
+        self.path = path
+        self.row_groups = list(row_groups)
+        self.columns = list(columns) if columns is not None else None
+        self.rename = rename
+
+    def load(self) -> pd.DataFrame:
+        """Reads the row groups and returns the chunk as a DataFrame."""
+        table = pq.ParquetFile(self.path).read_row_groups(self.row_groups, columns=self.columns)
+        df = table.to_pandas()
+        return df.rename(columns=self.rename) if self.rename else df
+
+Chunk = Union[SQLChunk, ParquetChunk]
+
+def sql_chunks(
+    database_url: str,
+    table_name: str,
+    chunk_column: str = 'date',
+    columns: Optional[Sequence[str]] = None,
+    values: Optional[Sequence[Any]] = None,
+    values_per_chunk: int = 1,
+    rename: Optional[Dict[str, str]] = None
+) -> List[SQLChunk]:
+    """
+    Splits a database table into chunks by date or by fund.
+
+    Args:
+        database_url: SQLAlchemy URL of the database.
+        table_name: Table to read, e.g. 'composition_fonds_gestionnaire'.
+        chunk_column: Column used to split the table ('date' or 'id_fonds').
+        columns: Columns to select. Defaults to all columns.
+        values: Values of chunk_column to read. Defaults to all distinct values.
+        values_per_chunk: Number of chunk_column values read by each chunk.
+        rename: Optional mapping applied to the column names of each chunk,
+            e.g. {'valeur_marchande': 'Market Value'}.
+
+    Returns:
+        A list of SQLChunk, one per group of values.
+    """
+    if values is None:
+        if database_url not in _ENGINES:
+            _ENGINES[database_url] = create_engine(database_url)
+        with _ENGINES[database_url].connect() as conn:
+            result = conn.execute(text(f"SELECT DISTINCT {chunk_column} FROM {table_name} ORDER BY {chunk_column}"))
+            values = [row[0] for row in result]
+
+    select = ', '.join(columns) if columns else '*'
+    query = f"SELECT {select} FROM {table_name} WHERE {chunk_column} IN :chunk_values"
+    chunks = [
+        SQLChunk(database_url, query, {'chunk_values': list(values[i:i + values_per_chunk])}, ('chunk_values',), rename)
+        for i in range(0, len(values), values_per_chunk)
+    ]
+    logger.info(f"Table '{table_name}' split into {len(chunks)} chunks on column '{chunk_column}'.")
+    return chunks
+
+def parquet_chunks(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    row_groups_per_chunk: int = 1,
+    rename: Optional[Dict[str, str]] = None
+) -> List[ParquetChunk]:
+    """
+    Splits a Parquet file, or a directory of Parquet files, into row-group chunks.
+
+    Args:
+        path: A Parquet file or a directory containing .parquet files.
+        columns: Columns to read. Defaults to all columns.
+        row_groups_per_chunk: Number of row groups read by each chunk.
+        rename: Optional mapping applied to the column names of each chunk.
+
+    Returns:
+        A list of ParquetChunk.
+    """
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(path)
+            for name in names
+            if name.endswith('.parquet')
+        )
+    else:
+        files = [path]
+
+    chunks = []
+    for file_path in files:
+        n_groups = pq.ParquetFile(file_path).num_row_groups
+        for start in range(0, n_groups, row_groups_per_chunk):
+            groups = range(start, min(start + row_groups_per_chunk, n_groups))
+            chunks.append(ParquetChunk(file_path, groups, columns, rename))
+    logger.info(f"Parquet store '{path}' split into {len(chunks)} chunks.")
+    return chunks
+
+def _run_chunk(func: Callable[[pd.DataFrame], Any], chunk: Chunk) -> Any:
+    """Loads a chunk and applies func to it (executed in the workers)."""
+    return func(chunk.load())
+
+def map_chunks(
+    func: Callable[[pd.DataFrame], Any],
+    chunks: Iterable[Chunk],
+    max_workers: Optional[int] = None
+) -> Iterator[Any]:
+    """
+    Applies func to every chunk, in order, sequentially or across a process pool.
+
+    With a pool, at most IN_FLIGHT_PER_WORKER * max_workers chunks are submitted
+    ahead of the consumer, so memory stays bounded when the results are
+    streamed rather than collected.
+
+    Args:
+        func: A picklable function (module-level or functools.partial) taking a DataFrame.
+        chunks: The chunks to process.
+        max_workers: Number of worker processes. None, 0 or 1 runs in the current process.
+
+    Yields:
+        The result of func for each chunk, in the order of the chunks.
+    """
+    if not max_workers or max_workers <= 1:
+        for chunk in chunks:
+            yield _run_chunk(func, chunk)
+        return
+    run = partial(_run_chunk, func)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(run, chunk))
+                if len(pending) >= IN_FLIGHT_PER_WORKER * max_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Consumer stopped early or a chunk failed: drop the chunks not yet started
+            for future in pending:
+                future.cancel()
+
+def _partial_sum(df: pd.DataFrame, by: Sequence[str], value_col: str) -> pd.DataFrame:
+    """Sums value_col per group within one chunk."""
+    return df.groupby(list(by), observed=True)[value_col].sum().reset_index()
+
+def aggregate_market_value(
+    chunks: Iterable[Chunk],
+    by: Sequence[str],
+    value_col: str = 'Market Value',
+    max_workers: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Sums the market value per group over all chunks.
+
+    Each chunk is reduced to its partial sums per group; the partial sums are
+    then merged with a second groupby, which gives the same totals as a
+    single groupby over the whole data.
+
+    Args:
+        chunks: The chunks to aggregate.
+        by: Columns to group by.
+        value_col: Column holding the market value.
+        max_workers: Number of worker processes (see map_chunks).
+
+    Returns:
+        A pandas DataFrame with the 'by' columns and the summed value_col.
+    """
+    by = list(by)
+    logger.info(f"Aggregating '{value_col}' by {by} out of core.")
+    partials = [
+        part for part in map_chunks(partial(_partial_sum, by=by, value_col=value_col), chunks, max_workers)
+        if not part.empty
+    ]
+    if not partials:
+        return pd.DataFrame(columns=by + [value_col])
+    merged = pd.concat(partials, ignore_index=True)
+    result = merged.groupby(by, observed=True)[value_col].sum().reset_index()
+    logger.info(f"Finished aggregating {len(partials)} chunks into {len(result)} groups.")
+    return result
+
+def calculate_market_value_by_asset_type(chunks: Iterable[Chunk], max_workers: Optional[int] = None) -> pd.DataFrame:
+    """Out-of-core equivalent of data_analyzer.calculate_market_value_by_asset_type."""
+    return aggregate_market_value(chunks, ['Asset Type'], max_workers=max_workers)
+
+def calculate_market_value_by_fund_country_asset_type(
+    chunks: Iterable[Chunk],
+    max_workers: Optional[int] = None
+) -> pd.DataFrame:
+    """Out-of-core equivalent of data_analyzer.calculate_market_value_by_fund_country_asset_type."""
+    return aggregate_market_value(chunks, ['Fund', 'Country', 'Asset Type'], max_workers=max_workers)
+
+def _apply_weights(
+    df: pd.DataFrame,
+    totals: pd.DataFrame,
+    by: Sequence[str],
+    value_col: str,
+    weight_col: str
+) -> pd.DataFrame:
+    """Divides the value of each position by the total of its group within one chunk."""
+    group_totals = df[list(by)].merge(totals, on=list(by), how='left')[TOTAL_COLUMN].to_numpy()
+    df[weight_col] = df[value_col].to_numpy() / group_totals
+    return df
+
+def iter_weights(
+    chunks: Sequence[Chunk],
+    by: Sequence[str],
+    weight_col: str,
+    value_col: str = 'Market Value',
+    max_workers: Optional[int] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Computes position weights within groups in two passes over the chunks.
+
+    The first pass computes the exact total of each group; the second pass
+    reloads every chunk and divides each position by its group total.
+
+    Args:
+        chunks: The chunks to process. They are read twice.
+        by: Columns defining the groups, e.g. ['Fund'].
+        weight_col: Name of the weight column added to each chunk.
+        value_col: Column holding the market value.
+        max_workers: Number of worker processes (see map_chunks).
+
+    Yields:
+        Each chunk with the additional weight column.
+    """
+    chunks = list(chunks)
+    totals = aggregate_market_value(chunks, by, value_col, max_workers).rename(columns={value_col: TOTAL_COLUMN})
+    logger.info(f"Calculating '{weight_col}' out of core.")
+    yield from map_chunks(
+        partial(_apply_weights, totals=totals, by=list(by), value_col=value_col, weight_col=weight_col),
+        chunks,
+        max_workers
+    )
+
+def _collect(frames: Iterator[pd.DataFrame], collect: bool) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Concatenates the weighted chunks when collect is True, otherwise returns the iterator."""
+    if not collect:
+        return frames
+    frames = list(frames)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def calculate_weight_by_fund(
+    chunks: Sequence[Chunk],
+    max_workers: Optional[int] = None,
+    collect: bool = True
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    Out-of-core equivalent of data_analyzer.calculate_weight_by_fund.
+
+    With collect=False the weighted chunks are returned as an iterator so that
+    they can be written out without holding the whole result in memory.
+    """
+    return _collect(iter_weights(chunks, ['Fund'], 'Weight by Fund', max_workers=max_workers), collect)
+
+def calculate_weight_by_asset_type_and_fund(
+    chunks: Sequence[Chunk],
+    max_workers: Optional[int] = None,
+    collect: bool = True
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Out-of-core equivalent of data_analyzer.calculate_weight_by_asset_type_and_fund."""
+    frames = iter_weights(chunks, ['Fund', 'Asset Type'], 'Weight by Asset Type and Fund', max_workers=max_workers)
+    return _collect(frames, collect)
+
+def calculate_weight_by_asset_type_and_manager(
+    chunks: Sequence[Chunk],
+    max_workers: Optional[int] = None,
+    collect: bool = True
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Out-of-core equivalent of data_analyzer.calculate_weight_by_asset_type_and_manager."""
+    frames = iter_weights(chunks, ['Manager', 'Asset Type'], 'Weight by Asset Type and Manager', max_workers=max_workers)
+    return _collect(frames, collect)
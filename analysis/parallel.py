@@ -0,0 +1,178 @@
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# Number of chunks per worker when funds_per_chunk is not given, to balance uneven funds
+CHUNKS_PER_WORKER = 4
+
+Analysis = Callable[[pd.DataFrame], pd.DataFrame]
+
+def _analysis_name(analysis: Analysis) -> str:
+    """Name under which an analysis result is returned when no name is given."""
+    return getattr(analysis, '__name__', repr(analysis))
+
+def _name_analyses(analyses: Union[Sequence[Analysis], Mapping[str, Analysis]]) -> Dict[str, Analysis]:
+    """Maps each analysis to its result name, rejecting duplicate names."""
+    if isinstance(analyses, Mapping):
+        return dict(analyses)
+    named = {}
+    for analysis in analyses:
+        name = _analysis_name(analysis)
+        if name in named:
+            raise ValueError(f"Duplicate analysis name '{name}'; pass a mapping of names to analyses.")
+        named[name] = analysis
+    return named
+
+def _to_ipc(df: pd.DataFrame) -> pa.Buffer:
+    """Serializes a DataFrame to an Arrow IPC stream buffer."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+def _from_ipc(buffer) -> pd.DataFrame:
+    """Reads an Arrow IPC stream buffer back into a DataFrame."""
+    with pa.ipc.open_stream(buffer) as reader:
+        return reader.read_all().to_pandas()
+
+def _to_shared_memory(df: pd.DataFrame) -> Tuple[shared_memory.SharedMemory, int]:
+    """Writes a DataFrame as an Arrow IPC stream into a new shared memory block."""
+    buffer = _to_ipc(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(buffer.size, 1))
+    shm.buf[:buffer.size] = memoryview(buffer).cast('B')
+    return shm, buffer.size
+
+def _run_partition(
+    shm_name: str,
+    size: int,
+    analyses: Sequence[Analysis],
+    by: str
+) -> List[bytes]:
+    """
+    Runs the analyses on every fund of one partition (executed in the workers).
+
+    The partition is read from shared memory; each result is returned as
+    Arrow IPC bytes. The fund column is added to results that do not keep it.
+    Rows without a fund are analysed together as one more group.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        partition = _from_ipc(pa.py_buffer(bytes(shm.buf[:size])))
+    finally:
+        shm.close()
+
+    results = []
+    for analysis in analyses:
+        frames = []
+        for fund, holdings in partition.groupby(by, sort=False, observed=True, dropna=False):
+            result = analysis(holdings.reset_index(drop=True))
+            if by not in result.columns:
+                result.insert(0, by, fund)
+            frames.append(result)
+        combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        results.append(_to_ipc(combined).to_pybytes())
+    return results
+
+def partition_by_fund(df: pd.DataFrame, by: str = 'Fund', funds_per_chunk: int = 1) -> List[pd.DataFrame]:
+    """
+    Splits the holdings into partitions of whole funds.
+
+    Args:
+        df: Holdings DataFrame.
+        by: Column identifying the fund.
+        funds_per_chunk: Number of funds in each partition.
+
+    Returns:
+        A list of DataFrames, each holding every position of its funds. Rows
+        without a fund are kept together, as if they formed one more fund.
+    """
+    codes, funds = pd.factorize(df[by], sort=True, use_na_sentinel=False)
+    order = np.argsort(codes, kind='stable')
+    # Position of the first row of each fund in the sorted order
+    bounds = np.searchsorted(codes[order], np.arange(0, len(funds) + funds_per_chunk, funds_per_chunk))
+    bounds[-1] = len(order) if len(bounds) else 0
+    return [
+        df.iloc[order[start:end]]
+        for start, end in zip(bounds[:-1], bounds[1:])
+        if end > start
+    ]
+
+def run_parallel_analysis(
+    df: pd.DataFrame,
+    analyses: Union[Sequence[Analysis], Mapping[str, Analysis]],
+    by: str = 'Fund',
+    max_workers: Optional[int] = None,
+    funds_per_chunk: Optional[int] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Runs data_analyzer functions fund by fund across a process pool.
+
+    The holdings are partitioned by fund and each partition is written once to
+    shared memory as an Arrow IPC stream; workers attach to it by name, run the
+    analyses on each fund and send back Arrow IPC results, which are
+    concatenated in fund order.
+
+    Args:
+        df: Holdings DataFrame, e.g. with 'Fund', 'Asset Type' and 'Market Value'.
+        analyses: Picklable analyses taking and returning a DataFrame, e.g.
+            [calculate_weight_by_fund, calculate_market_value_by_asset_type], or
+            a mapping of result names to analyses (for functools.partial or
+            callable objects, which are otherwise named by their repr).
+        by: Column identifying the fund.
+        max_workers: Number of worker processes. Defaults to os.cpu_count().
+        funds_per_chunk: Number of funds per partition. Defaults to spreading the
+            funds over CHUNKS_PER_WORKER partitions per worker.
+
+    Returns:
+        A dictionary mapping each analysis name to its concatenated result.
+    """
+    if by not in df.columns:
+        logger.error(f"DataFrame must contain the '{by}' column for parallel analysis.")
+        raise ValueError(f"DataFrame must contain the '{by}' column.")
+
+    named = _name_analyses(analyses)
+    max_workers = max_workers or os.cpu_count() or 1
+    n_funds = df[by].nunique()
+    n_missing = int(df[by].isna().sum())
+    if n_missing:
+        logger.warning(f"{n_missing} rows have no '{by}'; they are analysed as a separate group.")
+    if funds_per_chunk is None:
+        funds_per_chunk = max(1, math.ceil(n_funds / (max_workers * CHUNKS_PER_WORKER)))
+    partitions = partition_by_fund(df, by, funds_per_chunk)
+    logger.info(
+        f"Running {len(named)} analyses on {n_funds} funds in {len(partitions)} partitions "
+        f"with {max_workers} workers."
+    )
+
+    blocks = []
+    try:
+        for partition in partitions:
+            blocks.append(_to_shared_memory(partition))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_run_partition, shm.name, size, list(named.values()), by)
+                for shm, size in blocks
+            ]
+            partials = [future.result() for future in futures]
+    finally:
+        for shm, _ in blocks:
+            shm.close()
+            shm.unlink()
+
+    results = {}
+    for i, name in enumerate(named):
+        frames = [_from_ipc(pa.py_buffer(partial[i])) for partial in partials]
+        frames = [frame for frame in frames if not frame.empty]
+        results[name] = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    logger.info("Finished parallel analysis.")
+    return results
@@ -0,0 +1,248 @@
+import logging
+from datetime import date
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from constantes.const1 import TableNames
+from utils.data import DataUtils
+
+logger = logging.getLogger(__name__)
+
+DateLike = Optional[Union[str, date]]
+
+def _forward_fill(matrix: np.ndarray) -> np.ndarray:
+    """Forward-fills NaN values along the date axis (axis 0) of a matrix."""
+    valid = ~np.isnan(matrix)
+    last_valid = np.where(valid, np.arange(matrix.shape[0])[:, None], 0)
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    filled = matrix[last_valid, np.arange(matrix.shape[1])]
+    # Values before the first observation stay NaN
+    filled[np.cumsum(valid, axis=0) == 0] = np.nan
+    return filled
+
+class PriceHistory:
+    """
+    Price and holdings history pivoted into date x position matrices, one column per (fund, titre) pair.
+
+    Each column follows the price of one titre within one fund, like the former
+    SQL LAG(prix) OVER (PARTITION BY fund, titre ORDER BY date). The matrices
+    are built once from the long history; returns, rolling volatility,
+    drawdowns and fund-level returns are computed with NumPy and cached on the
+    object.
+    """
+
+    def __init__(self, history: pd.DataFrame, fund_col: str = 'code_fonds', titre_col: str = 'code_titre'):
+        """
+        Args:
+            history: Long history with the columns date, fund_col, titre_col, prix and
+                optionally valeur_marchande (required by fund_returns).
+            fund_col: Column identifying the fund.
+            titre_col: Column identifying the security.
+        """
+        date_codes, self.dates = pd.factorize(pd.to_datetime(history['date']), sort=True)
+        fund_codes, funds = pd.factorize(history[fund_col], sort=True, use_na_sentinel=False)
+        titre_codes, titres = pd.factorize(history[titre_col], sort=True, use_na_sentinel=False)
+        position_codes, pairs = pd.factorize(fund_codes * len(titres) + titre_codes, sort=True)
+        self.dates = pd.DatetimeIndex(self.dates)
+        self.positions = pd.MultiIndex.from_arrays(
+            [funds[pairs // len(titres)], titres[pairs % len(titres)]], names=[fund_col, titre_col]
+        )
+        n_dates, n_positions = len(self.dates), len(self.positions)
+
+        # Duplicate rows for the same date and position are averaged
+        cells = date_codes * n_positions + position_codes
+        prix = history['prix'].to_numpy(dtype=float)
+        valid = ~np.isnan(prix)
+        sums = np.bincount(cells[valid], weights=prix[valid], minlength=n_dates * n_positions)
+        counts = np.bincount(cells[valid], minlength=n_dates * n_positions)
+        self.prices = np.divide(
+            sums, counts, out=np.full(n_dates * n_positions, np.nan), where=counts > 0
+        ).reshape(n_dates, n_positions)
+        # Market value held per date and position (0 when not held)
+        self.market_values = None
+        if 'valeur_marchande' in history.columns:
+            self.market_values = np.bincount(
+                cells, weights=history['valeur_marchande'].fillna(0).to_numpy(dtype=float),
+                minlength=n_dates * n_positions
+            ).reshape(n_dates, n_positions)
+        # Positions are sorted by fund: first column of each fund
+        self._fund_starts = np.flatnonzero(np.r_[True, np.diff(pairs // len(titres)) != 0]) if n_positions else pairs
+        self.funds = self.positions.get_level_values(0)[self._fund_starts]
+
+        self._date_codes = date_codes
+        self._position_codes = position_codes
+        self._cache: Dict[Tuple, np.ndarray] = {}
+
+    def returns(self) -> np.ndarray:
+        """
+        Simple returns per date and position, relative to the last known price of the position.
+
+        Returns:
+            np.ndarray: date x position matrix, NaN on the first observation or when no price.
+        """
+        if 'returns' not in self._cache:
+            previous = np.full_like(self.prices, np.nan)
+            previous[1:] = _forward_fill(self.prices)[:-1]
+            self._cache['returns'] = self.prices / previous - 1
+        return self._cache['returns']
+
+    def rolling_volatility(self, window: int = 20, min_periods: int = 2) -> np.ndarray:
+        """
+        Rolling standard deviation of the returns (ddof=1), ignoring missing returns.
+
+        Args:
+            window: Number of dates in the window.
+            min_periods: Minimum number of returns in the window, NaN otherwise.
+
+        Returns:
+            np.ndarray: date x position matrix.
+        """
+        key = ('volatility', window, min_periods)
+        if key not in self._cache:
+            returns = self.returns()
+            valid = ~np.isnan(returns)
+            values = np.where(valid, returns, 0.0)
+
+            def _rolling_sum(matrix):
+                cumulative = np.cumsum(np.vstack([np.zeros((1, matrix.shape[1])), matrix]), axis=0)
+                return cumulative[1:] - cumulative[np.maximum(np.arange(1, len(matrix) + 1) - window, 0)]
+
+            n = _rolling_sum(valid.astype(float))
+            total = _rolling_sum(values)
+            squares = _rolling_sum(values ** 2)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                variance = (squares - total ** 2 / n) / (n - 1)
+            variance = np.where(n >= max(min_periods, 2), np.maximum(variance, 0.0), np.nan)
+            self._cache[key] = np.sqrt(variance)
+        return self._cache[key]
+
+    def drawdowns(self) -> np.ndarray:
+        """
+        Drawdown of each position relative to its running maximum price.
+
+        Returns:
+            np.ndarray: date x position matrix of values <= 0 (NaN before the first price).
+        """
+        if 'drawdowns' not in self._cache:
+            filled = _forward_fill(self.prices)
+            running_max = np.fmax.accumulate(filled, axis=0)
+            self._cache['drawdowns'] = filled / running_max - 1
+        return self._cache['drawdowns']
+
+    def fund_returns(self) -> pd.DataFrame:
+        """
+        Fund returns weighted by the market value held on the previous date.
+
+        Each position held on date t-1 contributes its return on date t,
+        weighted by its valeur_marchande on t-1.
+
+        Returns:
+            pd.DataFrame: Index date, one column per fund (NaN on the first date).
+        """
+        if self.market_values is None:
+            raise ValueError("fund_returns requires the valeur_marchande column in the history.")
+        if 'fund_returns' not in self._cache:
+            n_dates, n_funds = len(self.dates), len(self.funds)
+            result = np.full((n_dates, n_funds), np.nan)
+            if n_dates > 1 and n_funds:
+                returns = self.returns()[1:]
+                weights = np.where(np.isnan(returns), 0.0, self.market_values[:-1])
+                weighted = np.add.reduceat(weights * np.nan_to_num(returns), self._fund_starts, axis=1)
+                totals = np.add.reduceat(weights, self._fund_starts, axis=1)
+                np.divide(weighted, totals, out=result[1:], where=totals != 0)
+            self._cache['fund_returns'] = result
+        return pd.DataFrame(self._cache['fund_returns'], index=self.dates, columns=self.funds)
+
+    def position_returns(self) -> np.ndarray:
+        """
+        Returns the return of each row of the history, aligned with the input DataFrame.
+
+        Returns:
+            np.ndarray: One return per history row (NaN on the first observation).
+        """
+        return self.returns()[self._date_codes, self._position_codes]
+
+    def to_frame(self, matrix: np.ndarray) -> pd.DataFrame:
+        """Wraps a date x position matrix into a DataFrame with (fund, titre) columns."""
+        return pd.DataFrame(matrix, index=self.dates, columns=self.positions)
+
+class TimeSeriesEngine:
+    """
+    Loads composition history and caches the pivoted matrices per date range.
+
+    A cached entry is reused until the table is written through DataUtils in
+    this process (see DataUtils.mark_table_changed), so imports are picked up
+    by the next get() without querying the database. Call clear_cache() after
+    writes made by another process.
+    """
+
+    def __init__(self, engine, table_name: str = TableNames.COMPOSITION_FONDS, compact: bool = True):
+        """
+        Args:
+            engine: The SQLAlchemy engine.
+            table_name: Composition table holding prix and valeur_marchande.
+            compact: Keep the cached history with compact dtypes (datetime64 dates,
+                categorical fund and titre codes).
+        """
+        self.engine = engine
+        self.table_name = table_name
+        self.compact = compact
+        # (date_debut, date_fin) -> (table generation, history, PriceHistory)
+        self._cache: Dict[Tuple[Optional[str], Optional[str]], Tuple[int, pd.DataFrame, PriceHistory]] = {}
+
+    def load_history(self, date_debut: DateLike = None, date_fin: DateLike = None) -> pd.DataFrame:
+        """
+        Loads the long price history between two dates (inclusive).
+
+        With compact=True, the frame goes through DataUtils.optimize_dtypes:
+        code_fonds and code_titre are categorical, so group them with observed=True.
+
+        Returns:
+            pd.DataFrame: Columns date, code_fonds, code_titre, prix, valeur_marchande.
+        """
+        condition, params, bounds = DataUtils.day_range("cf.date", date_debut, date_fin)
+        where = f"WHERE {condition}" if condition else ""
+        query = text(f"""
+            SELECT
+                cf.date,
+                f.code AS code_fonds,
+                t.code AS code_titre,
+                cf.prix,
+                cf.valeur_marchande
+            FROM {self.table_name} cf
+            JOIN {TableNames.FONDS} f ON cf.id_fonds = f.id
+            JOIN {TableNames.TITRE} t ON cf.id_titre = t.id
+            {where}
+        """).bindparams(*bounds)
+        with self.engine.connect() as conn:
+            history = pd.read_sql(query, conn, params=params)
+        if self.compact:
+            history = DataUtils.optimize_dtypes(history)
+        logger.info(f"Loaded {len(history)} history rows between {date_debut} and {date_fin}.")
+        return history
+
+    def get(self, date_debut: DateLike = None, date_fin: DateLike = None) -> Tuple[pd.DataFrame, PriceHistory]:
+        """
+        Returns the history and its PriceHistory for a date range.
+
+        They are loaded again when the table was written since the cached load
+        (see DataUtils.table_generation).
+
+        Returns:
+            Tuple: (long history DataFrame, PriceHistory).
+        """
+        key = (None if date_debut is None else str(date_debut), None if date_fin is None else str(date_fin))
+        # Read before loading: a write during the load invalidates the entry
+        generation = DataUtils.table_generation(self.table_name)
+        cached = self._cache.get(key)
+        if cached is None or cached[0] != generation:
+            history = self.load_history(date_debut, date_fin)
+            cached = self._cache[key] = (generation, history, PriceHistory(history))
+        return cached[1], cached[2]
+
+    def clear_cache(self):
+        """Drops the cached matrices, e.g. after compositions were imported by another process."""
+        self._cache.clear()
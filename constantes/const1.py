@@ -79,6 +79,7 @@ class TableNames:
     COMPOSITION_FONDS = "composition_fonds_gestionnaire"
     COMPOSITION_PORTEFEUILLE = "composition_portefeuille_gestionnaire"
     COMPOSITION_INDICE = "composition_indice"
+    TAUX_CHANGE = "taux_change"
 
 # Constantes de colonnes communes
 class CommonColumns:
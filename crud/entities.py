@@ -7,6 +7,7 @@ from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from datetime import date
+import pandas as pd
 
 from .base_crud import BaseCRUD
 from database.models import (
@@ -15,6 +16,7 @@ from database.models import (
     Titre, Indice, Fonds, CompositionFonds,
     CompositionPortefeuille, CompositionIndice
 )
+from logic.composition_diff import diff_composition_fonds
 
 logger = logging.getLogger(__name__)
 
@@ -238,6 +240,31 @@ class CompositionFondsCRUD(BaseCRUD[CompositionFonds]):
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de la composition du fonds {fonds_id}: {str(e)}")
             raise
+    
+    async def get_composition_diff(
+        self, db: Session, fonds_id: int, date_debut: date, date_fin: date
+    ) -> pd.DataFrame:
+        """
+        Compare la composition d'un fonds entre deux dates.
+        
+        Args:
+            db (Session): Session de base de données
+            fonds_id (int): ID du fonds
+            date_debut (date): Date de la composition de référence
+            date_fin (date): Date de la composition comparée
+        
+        Returns:
+            pd.DataFrame: Positions ajoutées, retirées et modifiées avec leurs deltas
+        """
+        try:
+            diff = diff_composition_fonds(
+                db.get_bind(), date_debut, date_fin, fonds_ids=[fonds_id], table_name=self.model.__tablename__
+            )
+            logger.info(f"{len(diff)} positions modifiées pour le fonds {fonds_id} entre le {date_debut} et le {date_fin}")
+            return diff
+        except Exception as e:
+            logger.error(f"Erreur lors du diff de composition du fonds {fonds_id}: {str(e)}")
+            raise
 
 class CompositionPortefeuilleCRUD(BaseCRUD[CompositionPortefeuille]):
     """CRUD pour les compositions de portefeuilles."""
@@ -144,3 +144,12 @@ CREATE TABLE CompositionIndice (
     FOREIGN KEY (id_indice) REFERENCES Indice(id),
     FOREIGN KEY (id_Titre) REFERENCES Titre(id)
 );
+
+CREATE TABLE TauxChange (
+    id INT PRIMARY KEY IDENTITY(1,1),
+    date DATE NOT NULL,
+    devise_source VARCHAR(10) NOT NULL,
+    devise_cible VARCHAR(10) NOT NULL,
+    taux DECIMAL(18, 8) NOT NULL,
+    CONSTRAINT UQ_TauxChange UNIQUE (date, devise_source, devise_cible)
+);
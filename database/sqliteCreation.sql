@@ -240,6 +240,18 @@ CREATE TABLE IF NOT EXISTS composition_indice (
     FOREIGN KEY (id_pays) REFERENCES pays(id)
 );
 
+-- Table des taux de change (1 devise_source = taux devise_cible)
+CREATE TABLE IF NOT EXISTS taux_change (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date DATE NOT NULL,
+    devise_source VARCHAR(10) NOT NULL,
+    devise_cible VARCHAR(10) NOT NULL,
+    taux REAL NOT NULL,
+    date_creation DATETIME DEFAULT CURRENT_TIMESTAMP,
+    date_modification DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (date, devise_source, devise_cible)
+);
+
 -- Création des index
 CREATE INDEX IF NOT EXISTS idx_gestionnaire_code ON gestionnaire(code);
 CREATE INDEX IF NOT EXISTS idx_region_code ON region1(code);
@@ -270,3 +282,6 @@ CREATE INDEX IF NOT EXISTS idx_comp_port_date ON composition_portefeuille_gestio
 CREATE INDEX IF NOT EXISTS idx_comp_port_relations ON composition_portefeuille_gestionnaire(id_portefeuille, id_gestionnaire, id_titre);
 CREATE INDEX IF NOT EXISTS idx_comp_indice_date ON composition_indice(date);
 CREATE INDEX IF NOT EXISTS idx_comp_indice_relations ON composition_indice(id_indice, id_titre);
+
+-- Index sur les taux de change
+CREATE INDEX IF NOT EXISTS idx_taux_change_paire ON taux_change(devise_source, devise_cible, date);
@@ -10,7 +10,7 @@ from fastapi import HTTPException
 from constantes import const1
 from database.connexionsqlServer import SQLServerConnection
 from database.connexionsqlLiter import SQLiteConnection
-from logic import fund_calculations, data_import_logic
+from logic import fund_calculations, data_import_logic, composition_diff, active_weights
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +18,12 @@ class DispatcherError(Exception):
     """Exception personnalisée pour les erreurs du dispatcher."""
     pass
 
+def dataframe_to_records(df) -> list:
+    """
+    Convertit un DataFrame en liste de dictionnaires sérialisable en JSON (NaN -> None).
+    """
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
 def validate_payload(required_fields: list):
     """
     Décorateur pour valider les champs requis dans le payload.
@@ -72,12 +78,50 @@ class FunctionRegistry:
     @staticmethod
     @validate_payload(['remote_filepath', 'local_filepath', 'target_table_name'])
     async def import_sftp_data(payload: Dict[str, Any], connection, db_operations):
-        await data_import_logic.import_data_from_sftp(
+        etapes = await data_import_logic.import_data_from_sftp(
             payload['remote_filepath'],
             payload['local_filepath'],
-            payload['target_table_name']
+            payload['target_table_name'],
+            pipelined=payload.get('pipelined', False),
+            chunksize=payload.get('chunksize')
+        )
+        return {"message": "Importation SFTP terminée avec succès", "etapes": etapes}
+
+    @staticmethod
+    @validate_payload(['remote_dir', 'local_dir', 'target_table_name'])
+    async def sync_sftp_directory(payload: Dict[str, Any], connection, db_operations):
+        # Seuls les fichiers nouveaux ou modifiés depuis la dernière exécution sont importés
+        return await data_import_logic.sync_and_import(
+            payload['remote_dir'],
+            payload['local_dir'],
+            payload['target_table_name'],
+            manifest_path=payload.get('manifest_path'),
+            pattern=payload.get('pattern'),
+            verify_hash=payload.get('verify_hash', False)
+        )
+
+    @staticmethod
+    @validate_payload(['date_debut', 'date_fin'])
+    async def diff_composition_fonds(payload: Dict[str, Any], connection, db_operations):
+        # Sans 'fund_ids', tous les fonds sont comparés en une seule passe
+        diff = composition_diff.diff_composition_fonds(
+            connection.engine,
+            payload['date_debut'],
+            payload['date_fin'],
+            payload.get('fund_ids')
+        )
+        return dataframe_to_records(diff)
+
+    @staticmethod
+    @validate_payload(['date'])
+    async def calculate_active_weights(payload: Dict[str, Any], connection, db_operations):
+        resultats = active_weights.active_weights_on_date(
+            connection.engine,
+            payload['date'],
+            payload.get('fund_ids'),
+            payload.get('top_n', 10)
         )
-        return {"message": "Importation SFTP terminée avec succès"}
+        return {nom: dataframe_to_records(df) for nom, df in resultats.items()}
 
 # Mapping explicite entre noms d'API et fonctions réelles
 FUNCTION_NAME_MAPPING = {
@@ -85,6 +129,9 @@ FUNCTION_NAME_MAPPING = {
     "insert_test_data": "insert_test_data",
     "calculate_fund_market_value": "calculate_fund_market_value",
     "import_sftp_data": "import_sftp_data",
+    "sync_sftp_directory": "sync_sftp_directory",
+    "diff_composition_fonds": "diff_composition_fonds",
+    "calculate_active_weights": "calculate_active_weights",
     # Ajoutez ici d'autres alias ou mappings personnalisés
     # "ajouter_gestionnaire": "insert_test_data",
 }
@@ -3,12 +3,14 @@ Module pour générer des rapports PDF avec des indicateurs visuels et envoi par
 """
 
 import os
+import time
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 from datetime import datetime
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import matplotlib
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -20,8 +22,24 @@ import pandas as pd
 import numpy as np
 from sqlalchemy import text
 from database.connexionsqlLiter import SQLiteConnection
+from logic.fx import convert_to_base_currency
+from analysis.time_series import TimeSeriesEngine
+from utils.chart_cache import ChartCache
 import seaborn as sns
 
+# Nombre maximal de rapports générés simultanément par generer_rapports_lot
+MAX_RAPPORTS_PARALLELES = 4
+
+# Colonnes de regroupement acceptées par generer_rapports_lot : un rapport par fonds ou par gestionnaire
+REGROUPEMENTS_RAPPORT = ('code_fonds', 'code_gestionnaire')
+
+# Seuils par défaut des indicateurs de prix
+SEUILS_DEFAUT = {
+    'danger': 1000,    # Prix critique
+    'warning': 500,    # Prix élevé
+    'info': 200        # Prix à surveiller
+}
+
 class IndicateurVisuel:
     """Classe pour gérer les indicateurs visuels."""
     
@@ -76,8 +94,15 @@ class EmailSender:
 class RapportGenerator:
     """Classe pour générer des rapports PDF."""
     
-    def __init__(self):
-        """Initialise le générateur de rapports."""
+    def __init__(self, rapport_dir=None, devise_base=None, pivot=None):
+        """Initialise le générateur de rapports.
+        
+        Args:
+            rapport_dir: Dossier des rapports
+            devise_base: Devise de reporting (ex. 'EUR') dans laquelle les prix et valeurs
+                         marchandes sont convertis ; sans elle, chaque titre garde sa devise
+            pivot: Devise pivot pour les paires sans taux direct (ex. 'USD')
+        """
         self.styles = getSampleStyleSheet()
         self.couleurs = {
             'danger': colors.red,
@@ -85,13 +110,23 @@ class RapportGenerator:
             'success': colors.green,
             'info': colors.blue
         }
+        self.devise_base = devise_base
+        self.pivot = pivot
+        # Unité affichée pour les montants
+        self.unite = devise_base or '€'
+        
+        # Moteur de séries temporelles, créé à la première analyse historique
+        self.series = None
         
         # Création des dossiers nécessaires
-        self.rapport_dir = os.path.join(os.path.dirname(__file__), '..', 'rapports')
+        self.rapport_dir = rapport_dir or os.path.join(os.path.dirname(__file__), '..', 'rapports')
         self.graph_dir = os.path.join(self.rapport_dir, 'graphiques')
         for directory in [self.rapport_dir, self.graph_dir]:
             if not os.path.exists(directory):
                 os.makedirs(directory)
+        
+        # Cache des graphiques rendus, partagé entre exécutions et rapports
+        self.charts = ChartCache(os.path.join(self.rapport_dir, 'cache_graphiques'))
     
     def _evaluer_seuils(self, prix, seuils):
         """Évalue le prix par rapport aux seuils et retourne l'indicateur approprié."""
@@ -104,34 +139,41 @@ class RapportGenerator:
         else:
             return self.couleurs['success'], "Prix normal"
     
-    def _generer_graphiques(self, df):
-        """Génère les graphiques pour le rapport."""
+    def _generer_graphiques(self, df, graph_dir=None):
+        """Génère les graphiques pour le rapport (PNG réutilisés si les données n'ont pas changé)."""
+        graph_dir = graph_dir or self.graph_dir
         graphiques = []
         
         # Graphique 1: Distribution des prix par fonds
-        plt.figure(figsize=(10, 6))
-        df.boxplot(column='prix', by='code_fonds')
-        plt.title('Distribution des Prix par Fonds')
-        plt.ylabel('Prix (€)')
-        plt.xticks(rotation=45)
-        graph_path = os.path.join(self.graph_dir, 'distribution_prix.png')
-        plt.savefig(graph_path, bbox_inches='tight')
-        plt.close()
-        graphiques.append(graph_path)
+        donnees_prix = df[['code_fonds', 'prix']]
+        
+        def tracer_distribution(fig, ax):
+            donnees_prix.boxplot(column='prix', by='code_fonds', ax=ax)
+            ax.set_title('Distribution des Prix par Fonds')
+            ax.set_ylabel(f'Prix ({self.unite})')
+            ax.tick_params(axis='x', rotation=45)
+        
+        graphiques.append(self.charts.render(
+            'distribution_prix', donnees_prix, tracer_distribution,
+            os.path.join(graph_dir, 'distribution_prix.png'), figsize=(10, 6), unite=self.unite
+        ))
         
         # Graphique 2: Nombre de titres par niveau de prix
-        plt.figure(figsize=(10, 6))
         df['niveau_prix'] = pd.cut(df['prix'], 
                                  bins=[0, 200, 500, 1000, float('inf')],
                                  labels=['Normal', 'À surveiller', 'Élevé', 'Critique'])
-        df['niveau_prix'].value_counts().plot(kind='bar')
-        plt.title('Répartition des Titres par Niveau de Prix')
-        plt.ylabel('Nombre de Titres')
-        plt.xlabel('Niveau de Prix')
-        graph_path = os.path.join(self.graph_dir, 'repartition_niveaux.png')
-        plt.savefig(graph_path, bbox_inches='tight')
-        plt.close()
-        graphiques.append(graph_path)
+        repartition = df['niveau_prix'].value_counts()
+        
+        def tracer_repartition(fig, ax):
+            repartition.plot(kind='bar', ax=ax)
+            ax.set_title('Répartition des Titres par Niveau de Prix')
+            ax.set_ylabel('Nombre de Titres')
+            ax.set_xlabel('Niveau de Prix')
+        
+        graphiques.append(self.charts.render(
+            'repartition_niveaux', repartition, tracer_repartition,
+            os.path.join(graph_dir, 'repartition_niveaux.png'), figsize=(10, 6)
+        ))
         
         return graphiques
     
@@ -145,11 +187,14 @@ class RapportGenerator:
         
         stats_glob = {
             "Nombre total de titres": len(df),
-            "Prix moyen": f"{df['prix'].mean():.2f} €",
-            "Prix médian": f"{df['prix'].median():.2f} €",
-            "Prix minimum": f"{df['prix'].min():.2f} €",
-            "Prix maximum": f"{df['prix'].max():.2f} €"
+            "Prix moyen": f"{df['prix'].mean():.2f} {self.unite}",
+            "Prix médian": f"{df['prix'].median():.2f} {self.unite}",
+            "Prix minimum": f"{df['prix'].min():.2f} {self.unite}",
+            "Prix maximum": f"{df['prix'].max():.2f} {self.unite}"
         }
+        # Les valeurs marchandes ne s'additionnent qu'une fois converties dans une même devise
+        if self.devise_base and 'valeur_marchande' in df.columns:
+            stats_glob["Valeur marchande totale"] = f"{df['valeur_marchande'].sum():,.2f} {self.unite}"
         
         data = [[k, v] for k, v in stats_glob.items()]
         t = Table(data, colWidths=[4*cm, 4*cm])
@@ -162,98 +207,83 @@ class RapportGenerator:
         
         return stats
     
+    def _charger_historique(self, conn):
+        """Charge l'historique des prix avec la variation de chaque position."""
+        # Historique pivoté en matrice date x (fonds, titre), rechargé après chaque import en base
+        if self.series is None or self.series.engine is not conn.engine:
+            self.series = TimeSeriesEngine(conn.engine, table_name='composition_fonds')
+        df_historique, historique = self.series.get()
+        df_historique = df_historique.copy()
+        df_historique['variation_pct'] = np.nan_to_num(historique.position_returns() * 100)
+        return df_historique
+    
     def _generer_graphiques_historiques(self, conn):
         """Génère les graphiques d'analyse historique."""
+        df_historique = self._charger_historique(conn)
+        return self._graphiques_historiques(df_historique), df_historique
+    
+    def _graphiques_historiques(self, df_historique, graph_dir=None):
+        """Génère les graphiques d'analyse historique à partir de l'historique chargé."""
+        graph_dir = graph_dir or self.graph_dir
         graphiques = []
         
-        # Requête pour obtenir l'historique des prix
-        query = text("""
-            WITH HistoriquePrix AS (
-                SELECT 
-                    cf.date,
-                    f.code as code_fonds,
-                    t.code as code_titre,
-                    cf.prix,
-                    cf.valeur_marchande,
-                    LAG(cf.prix) OVER (PARTITION BY f.code, t.code ORDER BY cf.date) as prix_precedent
-                FROM composition_fonds cf
-                JOIN fonds f ON cf.id_fonds = f.id
-                JOIN titre t ON cf.id_titre = t.id
-                ORDER BY cf.date
-            )
-            SELECT 
-                date,
-                code_fonds,
-                code_titre,
-                prix,
-                valeur_marchande,
-                CASE 
-                    WHEN prix_precedent IS NOT NULL 
-                    THEN ((prix - prix_precedent) / prix_precedent) * 100 
-                    ELSE 0 
-                END as variation_pct
-            FROM HistoriquePrix
-        """)
-        
-        df_historique = pd.read_sql(query, conn)
-        
         # Graphique 1: Évolution des prix moyens par fonds
-        plt.figure(figsize=(12, 6))
-        for fonds in df_historique['code_fonds'].unique():
-            data = df_historique[df_historique['code_fonds'] == fonds]
-            prix_moyen = data.groupby('date')['prix'].mean()
-            plt.plot(prix_moyen.index, prix_moyen.values, label=fonds, marker='o')
-        
-        plt.title('Évolution des Prix Moyens par Fonds')
-        plt.xlabel('Date')
-        plt.ylabel('Prix Moyen (€)')
-        plt.legend(title='Fonds')
-        plt.grid(True)
-        plt.xticks(rotation=45)
-        
-        graph_path = os.path.join(self.graph_dir, 'evolution_prix_moyens.png')
-        plt.savefig(graph_path, bbox_inches='tight')
-        plt.close()
-        graphiques.append(graph_path)
+        prix_moyens = df_historique.groupby(['date', 'code_fonds'], observed=True)['prix'].mean().unstack()
+        
+        def tracer_evolution(fig, ax):
+            for fonds in prix_moyens.columns:
+                ax.plot(prix_moyens.index, prix_moyens[fonds].values, label=fonds, marker='o')
+            ax.set_title('Évolution des Prix Moyens par Fonds')
+            ax.set_xlabel('Date')
+            ax.set_ylabel('Prix Moyen (€)')
+            ax.legend(title='Fonds')
+            ax.grid(True)
+            ax.tick_params(axis='x', rotation=45)
+        
+        graphiques.append(self.charts.render(
+            'evolution_prix_moyens', prix_moyens, tracer_evolution,
+            os.path.join(graph_dir, 'evolution_prix_moyens.png'), figsize=(12, 6)
+        ))
         
         # Graphique 2: Heatmap des variations de prix
-        plt.figure(figsize=(12, 8))
         pivot_variations = df_historique.pivot_table(
             values='variation_pct',
             index='date',
             columns='code_fonds',
-            aggfunc='mean'
+            aggfunc='mean',
+            observed=True
         )
         
-        sns.heatmap(pivot_variations, cmap='RdYlGn', center=0,
-                    annot=True, fmt='.1f', cbar_kws={'label': 'Variation (%)'})
-        plt.title('Heatmap des Variations de Prix par Fonds')
-        plt.xlabel('Fonds')
-        plt.ylabel('Date')
+        def tracer_heatmap(fig, ax):
+            sns.heatmap(pivot_variations, cmap='RdYlGn', center=0, ax=ax,
+                        annot=True, fmt='.1f', cbar_kws={'label': 'Variation (%)'})
+            ax.set_title('Heatmap des Variations de Prix par Fonds')
+            ax.set_xlabel('Fonds')
+            ax.set_ylabel('Date')
         
-        graph_path = os.path.join(self.graph_dir, 'heatmap_variations.png')
-        plt.savefig(graph_path, bbox_inches='tight')
-        plt.close()
-        graphiques.append(graph_path)
+        graphiques.append(self.charts.render(
+            'heatmap_variations', pivot_variations, tracer_heatmap,
+            os.path.join(graph_dir, 'heatmap_variations.png'), figsize=(12, 8)
+        ))
         
         # Graphique 3: Distribution des variations de prix
-        plt.figure(figsize=(10, 6))
-        for fonds in df_historique['code_fonds'].unique():
-            data = df_historique[df_historique['code_fonds'] == fonds]['variation_pct']
-            sns.kdeplot(data=data, label=fonds)
-        
-        plt.title('Distribution des Variations de Prix par Fonds')
-        plt.xlabel('Variation (%)')
-        plt.ylabel('Densité')
-        plt.legend(title='Fonds')
-        plt.grid(True)
-        
-        graph_path = os.path.join(self.graph_dir, 'distribution_variations.png')
-        plt.savefig(graph_path, bbox_inches='tight')
-        plt.close()
-        graphiques.append(graph_path)
-        
-        return graphiques, df_historique
+        variations = df_historique[['code_fonds', 'variation_pct']]
+        
+        def tracer_variations(fig, ax):
+            for fonds, data in variations.groupby('code_fonds', observed=True)['variation_pct']:
+                sns.kdeplot(data=data, label=fonds, ax=ax)
+            ax.set_title('Distribution des Variations de Prix par Fonds')
+            ax.set_xlabel('Variation (%)')
+            ax.set_ylabel('Densité')
+            ax.legend(title='Fonds')
+            ax.grid(True)
+        
+        graphiques.append(self.charts.render(
+            'distribution_variations', variations, tracer_variations,
+            os.path.join(graph_dir, 'distribution_variations.png'), figsize=(10, 6)
+        ))
+        
+        return graphiques
     
     def _generer_statistiques_historiques(self, df_historique):
         """Génère les statistiques historiques."""
@@ -263,19 +293,12 @@ class RapportGenerator:
         stats.append(Paragraph("Analyse Historique des Variations", self.styles['Heading2']))
         stats.append(Spacer(1, 12))
         
-        # Calcul des statistiques par fonds
-        stats_hist = []
-        for fonds in df_historique['code_fonds'].unique():
-            data = df_historique[df_historique['code_fonds'] == fonds]
-            variations = data['variation_pct']
-            
-            stats_hist.append([
-                fonds,
-                f"{variations.mean():.2f}%",
-                f"{variations.std():.2f}%",
-                f"{variations.min():.2f}%",
-                f"{variations.max():.2f}%"
-            ])
+        # Calcul des statistiques par fonds en une seule agrégation
+        stats_fonds = df_historique.groupby('code_fonds', sort=False, observed=True)['variation_pct'].agg(['mean', 'std', 'min', 'max'])
+        stats_hist = [
+            [fonds, f"{moyenne:.2f}%", f"{ecart_type:.2f}%", f"{minimum:.2f}%", f"{maximum:.2f}%"]
+            for fonds, moyenne, ecart_type, minimum, maximum in stats_fonds.itertuples()
+        ]
         
         # Création du tableau de statistiques
         headers = ['Fonds', 'Var. Moyenne', 'Volatilité', 'Var. Min', 'Var. Max']
@@ -293,132 +316,249 @@ class RapportGenerator:
         
         return stats
     
-    def generer_rapport_prix(self, seuils=None):
-        """Génère un rapport PDF avec analyse des prix."""
-        if seuils is None:
-            seuils = {
-                'danger': 1000,    # Prix critique
-                'warning': 500,    # Prix élevé
-                'info': 200        # Prix à surveiller
-            }
+    def charger_donnees(self, conn):
+        """Charge les prix à la dernière date et l'historique des prix, partagés par les rapports."""
+        # Requête pour obtenir les prix des titres par fonds
+        query = text("""
+            SELECT 
+                f.code as code_fonds,
+                f.nom as nom_fonds,
+                t.code as code_titre,
+                t.nom as nom_titre,
+                cf.prix,
+                cf.valeur_marchande,
+                cf.id_devise,
+                cf.date
+            FROM composition_fonds cf
+            JOIN fonds f ON cf.id_fonds = f.id
+            JOIN titre t ON cf.id_titre = t.id
+            WHERE cf.date = (SELECT MAX(date) FROM composition_fonds)
+            ORDER BY f.code, cf.prix DESC
+        """)
         
-        # Connexion à la base de données
-        db = SQLiteConnection()
+        df = pd.read_sql(query, conn)
+        if self.devise_base:
+            df = convert_to_base_currency(conn.engine, df, self.devise_base, ['prix', 'valeur_marchande'], self.pivot)
+        return df, self._charger_historique(conn)
+    
+    def _charger_gestionnaires(self, conn):
+        """Charge l'association fonds -> gestionnaires (un fonds peut avoir plusieurs gestionnaires)."""
+        query = text("""
+            SELECT 
+                f.code as code_fonds,
+                g.code as code_gestionnaire,
+                g.nom as nom_gestionnaire
+            FROM fonds_gestionnaire fg
+            JOIN fonds f ON fg.id_fonds = f.id
+            JOIN gestionnaire g ON fg.id_gestionnaire = g.id
+        """)
+        return pd.read_sql(query, conn)
+    
+    def construire_rapport(self, df, df_historique, seuils, nom=None):
+        """Construit le PDF, l'export Excel et les graphiques d'un rapport à partir des données chargées.
         
-        with db.engine.connect() as conn:
-            # Requête pour obtenir les prix des titres par fonds
-            query = text("""
-                SELECT 
-                    f.code as code_fonds,
-                    f.nom as nom_fonds,
-                    t.code as code_titre,
-                    t.nom as nom_titre,
-                    cf.prix,
-                    cf.date
-                FROM composition_fonds cf
-                JOIN fonds f ON cf.id_fonds = f.id
-                JOIN titre t ON cf.id_titre = t.id
-                WHERE cf.date = (SELECT MAX(date) FROM composition_fonds)
-                ORDER BY f.code, cf.prix DESC
-            """)
-            
-            df = pd.read_sql(query, conn)
+        Args:
+            df: Prix des titres à la dernière date
+            df_historique: Historique des prix avec la colonne variation_pct
+            seuils: Seuils des indicateurs de prix
+            nom: Nom du rapport (code du fonds...), ajouté au titre et aux noms de fichiers
         
-            # Génération des graphiques
-            graphiques = self._generer_graphiques(df)
-            
-            # Ajout des graphiques et statistiques historiques
-            graphiques_hist, df_historique = self._generer_graphiques_historiques(conn)
-            graphiques.extend(graphiques_hist)
-            
-            # Export Excel
-            excel_path = os.path.join(self.rapport_dir, f'analyse_prix_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
-            df.to_excel(excel_path, index=False)
-            
-            # Création du PDF
-            date_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-            pdf_path = os.path.join(self.rapport_dir, f'rapport_prix_{date_str}.pdf')
-            doc = SimpleDocTemplate(pdf_path, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
-            
-            # Contenu du rapport
-            elements = []
-            
-            # Titre
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=self.styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30
-            )
-            elements.append(Paragraph("Rapport d'Analyse des Prix des Titres", title_style))
-            elements.append(Paragraph(f"Date du rapport : {datetime.now().strftime('%d/%m/%Y %H:%M')}", self.styles['Normal']))
+        Returns:
+            tuple: (chemin du PDF, chemin de l'Excel, chemins des graphiques)
+        """
+        # Fichiers du rapport, suffixés par son nom pour les rapports générés en lot
+        date_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffixe = f"{nom}_{date_str}" if nom else date_str
+        graph_dir = os.path.join(self.graph_dir, nom) if nom else self.graph_dir
+        os.makedirs(graph_dir, exist_ok=True)
+        
+        # Génération des graphiques
+        graphiques = self._generer_graphiques(df, graph_dir)
+        
+        # Ajout des graphiques historiques
+        graphiques.extend(self._graphiques_historiques(df_historique, graph_dir))
+        
+        # Export Excel
+        excel_path = os.path.join(self.rapport_dir, f'analyse_prix_{suffixe}.xlsx')
+        df.to_excel(excel_path, index=False)
+        
+        # Création du PDF
+        pdf_path = os.path.join(self.rapport_dir, f'rapport_prix_{suffixe}.pdf')
+        doc = SimpleDocTemplate(pdf_path, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
+        
+        # Contenu du rapport
+        elements = []
+        
+        # Titre
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=self.styles['Heading1'],
+            fontSize=16,
+            spaceAfter=30
+        )
+        titre = "Rapport d'Analyse des Prix des Titres" + (f" - {nom}" if nom else "")
+        elements.append(Paragraph(titre, title_style))
+        elements.append(Paragraph(f"Date du rapport : {datetime.now().strftime('%d/%m/%Y %H:%M')}", self.styles['Normal']))
+        elements.append(Spacer(1, 20))
+        
+        # Ajout des statistiques
+        elements.extend(self._generer_statistiques(df))
+        
+        # Ajout des statistiques historiques au rapport
+        elements.extend(self._generer_statistiques_historiques(df_historique))
+        
+        # Ajout des graphiques
+        for graph_path in graphiques:
+            elements.append(Paragraph("", self.styles['Heading2']))
+            elements.append(Image(graph_path, width=450, height=300))
             elements.append(Spacer(1, 20))
+        
+        # Création du tableau
+        data = []
+        # En-têtes
+        headers = ['Fonds', 'Titre', 'Prix', 'Indicateur', 'Commentaire']
+        data.append(headers)
+        
+        # Données
+        current_fonds = None
+        for _, row in df.iterrows():
+            if current_fonds != row['code_fonds']:
+                if current_fonds is not None:
+                    data.append([''] * 5)
+                current_fonds = row['code_fonds']
             
-            # Ajout des statistiques
-            elements.extend(self._generer_statistiques(df))
-            
-            # Ajout des statistiques historiques au rapport
-            elements.extend(self._generer_statistiques_historiques(df_historique))
-            
-            # Ajout des graphiques
-            for graph_path in graphiques:
-                elements.append(Paragraph("", self.styles['Heading2']))
-                elements.append(Image(graph_path, width=450, height=300))
-                elements.append(Spacer(1, 20))
-            
-            # Création du tableau
-            data = []
-            # En-têtes
-            headers = ['Fonds', 'Titre', 'Prix', 'Indicateur', 'Commentaire']
-            data.append(headers)
+            couleur, commentaire = self._evaluer_seuils(row['prix'], seuils)
             
-            # Données
-            current_fonds = None
-            for _, row in df.iterrows():
-                if current_fonds != row['code_fonds']:
-                    if current_fonds is not None:
-                        data.append([''] * 5)
-                    current_fonds = row['code_fonds']
-                
-                couleur, commentaire = self._evaluer_seuils(row['prix'], seuils)
-                
-                indicateur = IndicateurVisuel.creer_carre(couleur) if row['prix'] >= seuils['danger'] else IndicateurVisuel.creer_cercle(couleur)
-                
-                data.append([
-                    f"{row['code_fonds']} - {row['nom_fonds']}",
-                    f"{row['code_titre']} - {row['nom_titre']}",
-                    f"{row['prix']:.2f} €",
-                    indicateur,
-                    commentaire
-                ])
+            indicateur = IndicateurVisuel.creer_carre(couleur) if row['prix'] >= seuils['danger'] else IndicateurVisuel.creer_cercle(couleur)
             
-            # Style du tableau
-            table_style = TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.lightgrey]),
-                ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
-                ('ALIGN', (3, 0), (3, -1), 'CENTER'),
+            data.append([
+                f"{row['code_fonds']} - {row['nom_fonds']}",
+                f"{row['code_titre']} - {row['nom_titre']}",
+                f"{row['prix']:.2f} {self.unite}",
+                indicateur,
+                commentaire
             ])
-            
-            table = Table(data, colWidths=[4*cm, 4*cm, 2*cm, 1.5*cm, 7*cm])
-            table.setStyle(table_style)
-            
-            elements.append(table)
-            
-            # Génération du PDF
-            doc.build(elements)
-            
-            return pdf_path, excel_path, graphiques
+        
+        # Style du tableau
+        table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.lightgrey]),
+            ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
+            ('ALIGN', (3, 0), (3, -1), 'CENTER'),
+        ])
+        
+        table = Table(data, colWidths=[4*cm, 4*cm, 2*cm, 1.5*cm, 7*cm])
+        table.setStyle(table_style)
+        
+        elements.append(table)
+        
+        # Génération du PDF
+        doc.build(elements)
+        
+        return pdf_path, excel_path, graphiques
+    
+    def generer_rapport_prix(self, seuils=None):
+        """Génère un rapport PDF avec analyse des prix."""
+        seuils = seuils or SEUILS_DEFAUT
+        
+        # Connexion à la base de données
+        db = SQLiteConnection()
+        
+        with db.engine.connect() as conn:
+            df, df_historique = self.charger_donnees(conn)
+        
+        return self.construire_rapport(df, df_historique, seuils)
+    
+    def generer_rapports_lot(self, codes=None, par='code_fonds', seuils=None, max_workers=None):
+        """Génère un rapport par fonds ou par gestionnaire dans un pool de processus.
+        
+        Les données sont chargées une seule fois ; chaque processus reçoit
+        uniquement les lignes de son rapport. Par gestionnaire, un fonds géré
+        par plusieurs gestionnaires figure dans le rapport de chacun d'eux.
+        
+        Args:
+            codes: Codes des fonds ou des gestionnaires à traiter (tous par défaut)
+            par: 'code_fonds' (par défaut) ou 'code_gestionnaire' (voir REGROUPEMENTS_RAPPORT)
+            seuils: Seuils des indicateurs de prix
+            max_workers: Nombre maximal de rapports simultanés (MAX_RAPPORTS_PARALLELES par défaut)
+        
+        Returns:
+            list: Pour chaque rapport, un dict avec nom, statut, pdf, excel, graphiques, duree_s et erreur
+        
+        Raises:
+            ValueError: Si par n'est pas une colonne de regroupement acceptée
+        """
+        if par not in REGROUPEMENTS_RAPPORT:
+            raise ValueError(f"Regroupement non pris en charge : {par} (attendu : {', '.join(REGROUPEMENTS_RAPPORT)})")
+        seuils = seuils or SEUILS_DEFAUT
+        db = SQLiteConnection()
+        with db.engine.connect() as conn:
+            df, df_historique = self.charger_donnees(conn)
+            if par == 'code_gestionnaire':
+                gestionnaires = self._charger_gestionnaires(conn)
+                sans_gestionnaire = set(df['code_fonds']) - set(gestionnaires['code_fonds'])
+                if sans_gestionnaire:
+                    print(f"Fonds sans gestionnaire exclus des rapports : {', '.join(sorted(map(str, sans_gestionnaire)))}")
+                df = df.merge(gestionnaires, on='code_fonds', how='inner')
+                df_historique = df_historique.merge(
+                    gestionnaires[['code_fonds', 'code_gestionnaire']], on='code_fonds', how='inner'
+                )
+        
+        if codes is None:
+            codes = df[par].dropna().unique().tolist()
+        max_workers = max_workers or min(MAX_RAPPORTS_PARALLELES, os.cpu_count() or 1)
+        groupes = dict(tuple(df.groupby(par, sort=False)))
+        groupes_hist = dict(tuple(df_historique.groupby(par, sort=False, observed=True)))
+        
+        debut = time.perf_counter()
+        resultats = []
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker_rapport) as executor:
+            futures = {
+                executor.submit(
+                    _generer_rapport_worker,
+                    str(code),
+                    groupes.get(code, df.iloc[0:0]),
+                    groupes_hist.get(code, df_historique.iloc[0:0]),
+                    seuils,
+                    self.rapport_dir,
+                    self.devise_base
+                ): code
+                for code in codes
+            }
+            for future in as_completed(futures):
+                resultats.append(future.result())
+        
+        nb_erreurs = sum(1 for r in resultats if r['statut'] != 'ok')
+        print(f"{len(resultats)} rapports générés en {time.perf_counter() - debut:.1f} s ({nb_erreurs} erreurs)")
+        return sorted(resultats, key=lambda r: r['nom'])
+
+def _init_worker_rapport():
+    """Initialise un processus de génération : rendu matplotlib sans affichage."""
+    matplotlib.use('Agg')
+
+def _generer_rapport_worker(nom, df, df_historique, seuils, rapport_dir, devise_base=None):
+    """Génère un rapport dans un processus du pool et retourne ses chemins et sa durée."""
+    debut = time.perf_counter()
+    resultat = {'nom': nom, 'statut': 'ok', 'pdf': None, 'excel': None, 'graphiques': [], 'duree_s': None, 'erreur': None}
+    try:
+        generator = RapportGenerator(rapport_dir, devise_base)
+        resultat['pdf'], resultat['excel'], resultat['graphiques'] = generator.construire_rapport(
+            df.copy(), df_historique, seuils, nom=nom
+        )
+    except Exception as e:
+        resultat['statut'], resultat['erreur'] = 'erreur', str(e)
+    resultat['duree_s'] = round(time.perf_counter() - debut, 3)
+    return resultat
 
-def generer_et_envoyer_rapport(expediteur=None, mot_de_passe=None, destinataires=None, seuils=None):
+def generer_et_envoyer_rapport(expediteur=None, mot_de_passe=None, destinataires=None, seuils=None, devise_base=None):
     """Fonction utilitaire pour générer et envoyer un rapport."""
     # Génération du rapport
-    generator = RapportGenerator()
+    generator = RapportGenerator(devise_base=devise_base)
     pdf_path, excel_path, _ = generator.generer_rapport_prix(seuils)
     
     # Envoi par courriel si les informations sont fournies
@@ -1,15 +1,22 @@
 """
 Interface de tableau de données avec édition, tri et menu contextuel.
+
+Le tableau est virtualisé : le Treeview ne contient que les lignes visibles,
+les valeurs affichées sont pré-formatées par colonne et le tri passe par un
+index (argsort) mis en cache, sans réordonner ni recopier le DataFrame.
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox
 import pandas as pd
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable, Tuple
 import numpy as np
 
+# Hauteur d'une ligne du Treeview (doit correspondre au style "Data.Treeview")
+ROW_HEIGHT = 25
+
 class DataTable(ttk.Frame):
-    """Table de données interactive."""
+    """Table de données interactive à défilement virtuel."""
     
     def __init__(self, parent, df: pd.DataFrame):
         """Initialise la table de données.
@@ -24,6 +31,13 @@ class DataTable(ttk.Frame):
         self.sort_column = None
         self.sort_ascending = True
         
+        # État de la fenêtre virtuelle
+        self._order = np.arange(len(df))
+        self._sort_cache: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._formatted: Dict[str, np.ndarray] = {}
+        self._first_row = 0
+        self._visible_rows = 20
+        
         # Configuration du style
         style = ttk.Style()
         style.configure(
@@ -35,7 +49,7 @@ class DataTable(ttk.Frame):
         style.configure(
             "Data.Treeview",
             font=('Helvetica', 10),
-            rowheight=25
+            rowheight=ROW_HEIGHT
         )
         style.configure(
             "Data.Treeview.Heading",
@@ -91,14 +105,14 @@ class DataTable(ttk.Frame):
             )
             self.tree.column(col, width=150)
         
-        # Scrollbars
-        vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        # Scrollbars : la verticale pilote la fenêtre virtuelle, pas le Treeview
+        self.vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self._on_scrollbar)
         hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.tree.configure(xscrollcommand=hsb.set)
         
         # Placement des widgets
         self.tree.grid(row=0, column=0, sticky='nsew')
-        vsb.grid(row=0, column=1, sticky='ns')
+        self.vsb.grid(row=0, column=1, sticky='ns')
         hsb.grid(row=1, column=0, sticky='ew')
         
         # Configuration du redimensionnement
@@ -108,6 +122,12 @@ class DataTable(ttk.Frame):
         # Bindings
         self.tree.bind('<Double-Button-1>', self._on_double_click)
         self.tree.bind('<Button-3>', self._show_context_menu)
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self._scroll_rows(-3))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_rows(3))
+        self.tree.bind('<Prior>', lambda e: self._scroll_rows(-self._visible_rows))
+        self.tree.bind('<Next>', lambda e: self._scroll_rows(self._visible_rows))
         
         # Création du menu contextuel
         self._create_context_menu()
@@ -132,19 +152,120 @@ class DataTable(ttk.Frame):
             command=self._delete_row
         )
     
+    @staticmethod
+    def _format_column(series: pd.Series) -> np.ndarray:
+        """Formate une colonne entière en chaînes d'affichage.
+        
+        Args:
+            series: Colonne du DataFrame
+        
+        Returns:
+            np.ndarray: Valeurs affichables ('' pour les valeurs manquantes)
+        """
+        values = series.astype(str).to_numpy(dtype=object)
+        values[series.isna().to_numpy()] = ''
+        return values
+    
     def _load_data(self):
-        """Charge les données dans le Treeview."""
-        # Supprime les anciennes données
-        for item in self.tree.get_children():
+        """Pré-formate les colonnes et affiche la fenêtre visible."""
+        self._formatted = {
+            col: self._format_column(self.df[col])
+            for col in self.df.columns
+        }
+        self._order = np.arange(len(self.df))
+        self._sort_cache.clear()
+        self._first_row = 0
+        self._render()
+    
+    def _render(self):
+        """Affiche dans le Treeview uniquement les lignes de la fenêtre visible."""
+        total = len(self._order)
+        self._first_row = max(0, min(self._first_row, total - self._visible_rows))
+        positions = self._order[self._first_row:self._first_row + self._visible_rows]
+        
+        # Ajuste le nombre d'items du Treeview à la taille de la fenêtre
+        items = list(self.tree.get_children())
+        for item in items[len(positions):]:
             self.tree.delete(item)
+        for _ in range(len(items), len(positions)):
+            items.append(self.tree.insert('', 'end'))
+        
+        columns = [self._formatted[col] for col in self.df.columns]
+        for item, pos in zip(items, positions):
+            self.tree.item(
+                item,
+                values=[values[pos] for values in columns],
+                tags=(str(pos),)
+            )
+        
+        # Met à jour la scrollbar virtuelle
+        if total:
+            self.vsb.set(
+                self._first_row / total,
+                (self._first_row + len(positions)) / total
+            )
+        else:
+            self.vsb.set(0, 1)
+    
+    def _scroll_rows(self, delta: int):
+        """Fait défiler la fenêtre virtuelle.
         
-        # Ajoute les nouvelles données
-        for idx, row in self.df.iterrows():
-            values = [
-                str(val) if not pd.isna(val) else ''
-                for val in row.values
-            ]
-            self.tree.insert('', 'end', values=values, tags=(str(idx),))
+        Args:
+            delta: Nombre de lignes (négatif vers le haut)
+        """
+        first_row = self._first_row + delta
+        if first_row != self._first_row:
+            self._first_row = first_row
+            self._close_editor()
+            self._render()
+    
+    def _close_editor(self):
+        """Ferme l'éditeur ouvert : les items recyclés ne correspondent plus aux mêmes lignes."""
+        if self.cell_editor.editing:
+            self.cell_editor.cancel_edit()
+    
+    def _on_scrollbar(self, action: str, value: str, unit: Optional[str] = None):
+        """Gère les commandes de la scrollbar verticale."""
+        if action == 'moveto':
+            self._first_row = int(float(value) * len(self._order))
+            self._close_editor()
+            self._render()
+        elif action == 'scroll':
+            step = self._visible_rows if unit == 'pages' else 1
+            self._scroll_rows(int(value) * step)
+    
+    def _on_mousewheel(self, event):
+        """Gère la molette de la souris."""
+        self._scroll_rows(-3 if event.delta > 0 else 3)
+    
+    def _on_resize(self, event):
+        """Recalcule le nombre de lignes visibles selon la hauteur du Treeview."""
+        visible_rows = max(1, event.height // ROW_HEIGHT - 1)
+        if visible_rows != self._visible_rows:
+            self._visible_rows = visible_rows
+            self._close_editor()
+            self._render()
+    
+    def _sorted_order(self, column: str, ascending: bool) -> np.ndarray:
+        """Retourne l'ordre d'affichage trié, calculé une seule fois par colonne et sens.
+        
+        Args:
+            column: Nom de la colonne
+            ascending: Sens du tri
+        
+        Returns:
+            np.ndarray: Positions des lignes dans l'ordre trié
+        """
+        key = (column, ascending)
+        if key not in self._sort_cache:
+            self._sort_cache[key] = (
+                self.df[column]
+                .reset_index(drop=True)
+                .sort_values(ascending=ascending, kind='mergesort', na_position='last')
+                .index
+                .to_numpy()
+            )
+        return self._sort_cache[key]
     
     def _sort_by_column(self, column: str):
         """Trie les données par colonne.
@@ -159,15 +280,13 @@ class DataTable(ttk.Frame):
             self.sort_column = column
             self.sort_ascending = True
         
-        # Trie le DataFrame
-        self.df.sort_values(
-            by=column,
-            ascending=self.sort_ascending,
-            inplace=True
-        )
+        # Applique l'index de tri sans modifier le DataFrame
+        self._order = self._sorted_order(column, self.sort_ascending)
+        self._first_row = 0
+        self._close_editor()
         
         # Met à jour l'affichage
-        self._load_data()
+        self._render()
         
         # Met à jour l'indicateur de tri
         for col, header in self.headers.items():
@@ -189,11 +308,12 @@ class DataTable(ttk.Frame):
             if not item or not column:
                 return
             
-            # Démarre l'édition
+            # Démarre l'édition ; la ligne est fixée à l'ouverture, l'item pouvant être recyclé
+            pos = int(self.tree.item(item)['tags'][0])
             self.cell_editor.start_edit(
                 item,
                 column,
-                self._on_cell_edited
+                lambda item, column, value: self._set_cell(pos, column, value)
             )
     
     def _on_cell_edited(self, item: str, column: str, value: str):
@@ -201,21 +321,31 @@ class DataTable(ttk.Frame):
         
         Args:
             item: ID de l'item
-            column: Nom de la colonne
+            column: ID de la colonne
+            value: Nouvelle valeur
+        """
+        self._set_cell(int(self.tree.item(item)['tags'][0]), column, value)
+    
+    def _set_cell(self, pos: int, column: str, value: str):
+        """Modifie une cellule du DataFrame.
+        
+        Args:
+            pos: Position de la ligne dans le DataFrame
+            column: ID de la colonne
             value: Nouvelle valeur
         """
-        # Récupère l'index de la ligne et le nom de la colonne
-        idx = int(self.tree.item(item)['tags'][0])
         col_name = self.tree.column(column)['id']
         
         # Met à jour le DataFrame
-        self.df.at[idx, col_name] = value
+        self.df.iat[pos, self.df.columns.get_loc(col_name)] = value
+        
+        # Met à jour le cache d'affichage ; les tris sur cette colonne sont périmés
+        self._formatted[col_name][pos] = value
+        self._sort_cache.pop((col_name, True), None)
+        self._sort_cache.pop((col_name, False), None)
         
         # Met à jour l'affichage
-        values = list(self.tree.item(item)['values'])
-        col_idx = int(column[1]) - 1
-        values[col_idx] = value
-        self.tree.item(item, values=values)
+        self._render()
     
     def _show_context_menu(self, event):
         """Affiche le menu contextuel."""
@@ -270,13 +400,21 @@ class DataTable(ttk.Frame):
             "Voulez-vous vraiment supprimer cette ligne ?"
         ):
             item = selection[0]
-            idx = int(self.tree.item(item)['tags'][0])
+            pos = int(self.tree.item(item)['tags'][0])
             
-            # Supprime du DataFrame
-            self.df.drop(idx, inplace=True)
+            # Supprime du DataFrame par position (un libellé d'index peut être dupliqué)
+            self.df = self.df.iloc[np.r_[0:pos, pos + 1:len(self.df)]]
+            self._close_editor()
             
-            # Supprime de l'affichage
-            self.tree.delete(item)
+            # Retire la ligne des caches sans tout reformater
+            for col in self._formatted:
+                self._formatted[col] = np.delete(self._formatted[col], pos)
+            order = self._order[self._order != pos]
+            self._order = order - (order > pos)
+            self._sort_cache.clear()
+            
+            # Met à jour l'affichage
+            self._render()
 
 class CellEditor:
     """Éditeur de cellule."""
@@ -0,0 +1,247 @@
+# logic/active_weights.py
+
+import logging
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from constantes.const1 import TableNames
+from utils.data import DataUtils
+
+logger = logging.getLogger(__name__)
+
+def load_benchmark_data(
+    engine,
+    date_composition: Union[str, date],
+    fonds_ids: Optional[Sequence[int]] = None,
+    compact: bool = True
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Charge les liens fonds/indices et les compositions des fonds et des indices à une date.
+
+    Args:
+        engine: L'engine SQLAlchemy.
+        date_composition: Date des compositions.
+        fonds_ids: Identifiants des fonds à analyser (tous les fonds liés si None).
+        compact: Si True, réduit les identifiants au plus petit type entier (voir
+                 DataUtils.optimize_dtypes).
+
+    Returns:
+        Tuple: (liens id_fonds/id_indice, positions des fonds, positions des indices),
+        les positions étant agrégées par titre avec la colonne valeur_marchande.
+    """
+    # Journée entière de la date : couvre les colonnes DATE comme DATETIME
+    jour, params, bounds = DataUtils.day_range("date", date_composition, date_composition)
+    filtre_fonds = "WHERE id_fonds IN :fonds_ids" if fonds_ids is not None else ""
+    liens_query = text(f"SELECT id_fonds, id_indice FROM fonds_indice {filtre_fonds}")
+    fonds_query = text(f"""
+        SELECT id_fonds, id_titre, SUM(valeur_marchande) AS valeur_marchande
+        FROM {TableNames.COMPOSITION_FONDS}
+        WHERE {jour}
+          AND id_fonds IN (SELECT id_fonds FROM fonds_indice {filtre_fonds})
+        GROUP BY id_fonds, id_titre
+    """)
+    indices_query = text(f"""
+        SELECT id_indice, id_titre, SUM(valeur_marchande) AS valeur_marchande
+        FROM {TableNames.COMPOSITION_INDICE}
+        WHERE {jour}
+          AND id_indice IN (SELECT id_indice FROM fonds_indice {filtre_fonds})
+        GROUP BY id_indice, id_titre
+    """)
+
+    fonds_query, indices_query = (query.bindparams(*bounds) for query in (fonds_query, indices_query))
+    if fonds_ids is not None:
+        params["fonds_ids"] = list(fonds_ids)
+        liens_query, fonds_query, indices_query = (
+            query.bindparams(bindparam("fonds_ids", expanding=True))
+            for query in (liens_query, fonds_query, indices_query)
+        )
+
+    with engine.connect() as conn:
+        liens = pd.read_sql(liens_query, conn, params=params)
+        positions_fonds = pd.read_sql(fonds_query, conn, params=params)
+        positions_indices = pd.read_sql(indices_query, conn, params=params)
+    if compact:
+        liens, positions_fonds, positions_indices = (
+            DataUtils.optimize_dtypes(df) for df in (liens, positions_fonds, positions_indices)
+        )
+
+    logger.info(
+        f"{len(liens)} liens fonds/indice, {len(positions_fonds)} positions de fonds et "
+        f"{len(positions_indices)} positions d'indices chargés au {date_composition}"
+    )
+    return liens, positions_fonds, positions_indices
+
+def _weight_matrix(
+    owners: np.ndarray,
+    titre_codes: np.ndarray,
+    valeurs: np.ndarray,
+    n_owners: int,
+    n_titres: int
+) -> np.ndarray:
+    """
+    Construit la matrice des poids (propriétaire x titre) normalisée par ligne.
+
+    Args:
+        owners: Position de la ligne (fonds ou indice) de chaque détention.
+        titre_codes: Position du titre dans l'univers de chaque détention.
+        valeurs: Valeur marchande de chaque détention.
+        n_owners: Nombre de lignes de la matrice.
+        n_titres: Taille de l'univers de titres.
+
+    Returns:
+        np.ndarray: Matrice des poids, chaque ligne sommant à 1 (ou 0 si vide).
+    """
+    matrix = np.bincount(
+        owners * n_titres + titre_codes,
+        weights=valeurs,
+        minlength=n_owners * n_titres
+    ).reshape(n_owners, n_titres)
+    totals = matrix.sum(axis=1, keepdims=True)
+    return np.divide(matrix, totals, out=np.zeros_like(matrix), where=totals != 0)
+
+def _top_active_positions(
+    active: np.ndarray,
+    fonds_ids: np.ndarray,
+    id_indice: int,
+    fund_weights: np.ndarray,
+    index_weights: np.ndarray,
+    univers: np.ndarray,
+    top_n: int,
+    surponderation: bool
+) -> pd.DataFrame:
+    """
+    Extrait les top_n sur- ou sous-pondérations de chaque fonds d'un groupe.
+
+    Returns:
+        pd.DataFrame: Une ligne par (fonds, titre) retenu, classée par rang.
+    """
+    signed = active if surponderation else -active
+    n = min(top_n, signed.shape[1])
+    if n == 0:
+        return pd.DataFrame()
+    cols = np.argpartition(-signed, n - 1, axis=1)[:, :n]
+    rows = np.arange(signed.shape[0])[:, None]
+    # Tri des n candidats par écart décroissant
+    order = np.argsort(-signed[rows, cols], axis=1, kind="stable")
+    cols = cols[rows, order]
+    selected = signed[rows, cols] > 0
+
+    rows_idx = np.broadcast_to(rows, cols.shape)[selected]
+    cols_idx = cols[selected]
+    return pd.DataFrame({
+        "id_fonds": fonds_ids[rows_idx],
+        "id_indice": id_indice,
+        "id_titre": univers[cols_idx],
+        "poids_fonds": fund_weights[rows_idx, cols_idx],
+        "poids_indice": index_weights[cols_idx],
+        "poids_actif": active[rows_idx, cols_idx],
+        "rang": np.broadcast_to(np.arange(1, n + 1), cols.shape)[selected]
+    })
+
+def compute_active_weights(
+    liens: pd.DataFrame,
+    positions_fonds: pd.DataFrame,
+    positions_indices: pd.DataFrame,
+    top_n: int = 10
+) -> Dict[str, pd.DataFrame]:
+    """
+    Calcule les poids actifs de chaque fonds par rapport à ses indices de référence.
+
+    Les poids des fonds et des indices sont alignés sur un univers commun de
+    titres (vecteurs NumPy indexés par id_titre). Les fonds partageant un même
+    indice sont traités ensemble, en une seule opération matricielle.
+
+    Args:
+        liens: Liens id_fonds / id_indice (table fonds_indice).
+        positions_fonds: Colonnes id_fonds, id_titre, valeur_marchande.
+        positions_indices: Colonnes id_indice, id_titre, valeur_marchande.
+        top_n: Nombre de sur- et sous-pondérations retenues par fonds.
+
+    Returns:
+        Dict[str, pd.DataFrame]:
+            - 'resume' : chevauchement (somme des poids minimum), active share
+              (demi-somme des écarts absolus) et nombres de titres par couple fonds/indice ;
+            - 'surponderations' / 'sous_ponderations' : top_n des écarts par fonds.
+    """
+    univers = np.unique(np.concatenate([
+        positions_fonds["id_titre"].to_numpy(),
+        positions_indices["id_titre"].to_numpy()
+    ]))
+    n_titres = len(univers)
+
+    # Poids des indices : une ligne par indice, alignée sur l'univers
+    indices, index_rows = np.unique(positions_indices["id_indice"].to_numpy(), return_inverse=True)
+    index_weights = _weight_matrix(
+        index_rows,
+        np.searchsorted(univers, positions_indices["id_titre"].to_numpy()),
+        positions_indices["valeur_marchande"].fillna(0).to_numpy(dtype=float),
+        len(indices),
+        n_titres
+    )
+
+    resumes, surponderations, sous_ponderations = [], [], []
+    for id_indice, groupe in liens.groupby("id_indice"):
+        if id_indice not in indices:
+            logger.warning(f"Aucune composition pour l'indice {id_indice}, fonds ignorés: {groupe['id_fonds'].tolist()}")
+            continue
+        benchmark = index_weights[np.searchsorted(indices, id_indice)]
+
+        fonds_ids = np.unique(groupe["id_fonds"].to_numpy())
+        positions = positions_fonds[positions_fonds["id_fonds"].isin(fonds_ids)]
+        fund_weights = _weight_matrix(
+            np.searchsorted(fonds_ids, positions["id_fonds"].to_numpy()),
+            np.searchsorted(univers, positions["id_titre"].to_numpy()),
+            positions["valeur_marchande"].fillna(0).to_numpy(dtype=float),
+            len(fonds_ids),
+            n_titres
+        )
+
+        active = fund_weights - benchmark
+        resumes.append(pd.DataFrame({
+            "id_fonds": fonds_ids,
+            "id_indice": id_indice,
+            "chevauchement": np.minimum(fund_weights, benchmark).sum(axis=1),
+            "active_share": 0.5 * np.abs(active).sum(axis=1),
+            "nb_titres_fonds": (fund_weights > 0).sum(axis=1),
+            "nb_titres_indice": int((benchmark > 0).sum()),
+            "nb_titres_communs": ((fund_weights > 0) & (benchmark > 0)).sum(axis=1)
+        }))
+        for surponderation, resultats in ((True, surponderations), (False, sous_ponderations)):
+            resultats.append(_top_active_positions(
+                active, fonds_ids, id_indice, fund_weights, benchmark, univers, top_n, surponderation
+            ))
+
+    def _concat(frames):
+        frames = [frame for frame in frames if not frame.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    return {
+        "resume": _concat(resumes),
+        "surponderations": _concat(surponderations),
+        "sous_ponderations": _concat(sous_ponderations)
+    }
+
+def active_weights_on_date(
+    engine,
+    date_composition: Union[str, date],
+    fonds_ids: Optional[Sequence[int]] = None,
+    top_n: int = 10
+) -> Dict[str, pd.DataFrame]:
+    """
+    Charge les données à une date et calcule les poids actifs des fonds liés à un indice.
+
+    Args:
+        engine: L'engine SQLAlchemy.
+        date_composition: Date des compositions.
+        fonds_ids: Identifiants des fonds à analyser (tous les fonds liés si None).
+        top_n: Nombre de sur- et sous-pondérations retenues par fonds.
+
+    Returns:
+        Dict[str, pd.DataFrame]: Voir compute_active_weights.
+    """
+    liens, positions_fonds, positions_indices = load_benchmark_data(engine, date_composition, fonds_ids)
+    return compute_active_weights(liens, positions_fonds, positions_indices, top_n)
@@ -0,0 +1,168 @@
+# logic/composition_diff.py
+
+import logging
+from datetime import date
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from constantes.const1 import TableNames, CommonColumns
+from utils.data import DataUtils
+
+logger = logging.getLogger(__name__)
+
+# Colonnes comparées entre les deux dates
+VALUE_COLUMNS = [CommonColumns.QUANTITE, CommonColumns.PRIX, CommonColumns.VALEUR_MARCHANDE]
+
+# Statuts possibles d'une position dans le diff
+STATUT_AJOUT = "ajout"
+STATUT_RETRAIT = "retrait"
+STATUT_MODIFICATION = "modification"
+
+def load_composition_snapshots(
+    engine,
+    date_debut: Union[str, date],
+    date_fin: Union[str, date],
+    fonds_ids: Optional[Sequence[int]] = None,
+    table_name: str = TableNames.COMPOSITION_FONDS,
+    fund_column: str = "id_fonds",
+    compact: bool = True
+) -> pd.DataFrame:
+    """
+    Charge en une seule requête les compositions aux deux dates.
+
+    Les lignes d'un même titre (plusieurs gestionnaires) sont agrégées par
+    fonds et par titre côté base de données. Chaque date est filtrée sur la
+    journée entière, ce qui couvre les colonnes DATE comme DATETIME.
+
+    Args:
+        engine: L'engine SQLAlchemy.
+        date_debut: Date de la composition de référence.
+        date_fin: Date de la composition comparée.
+        fonds_ids: Identifiants des fonds à charger (tous les fonds si None).
+        table_name: Table de composition à interroger.
+        fund_column: Colonne identifiant le fonds (ou le portefeuille, l'indice).
+        compact: Si True, réduit les identifiants au plus petit type entier (voir
+                 DataUtils.optimize_dtypes).
+
+    Returns:
+        pd.DataFrame: Colonnes date (datetime64, à minuit), <fund_column>, id_titre,
+        quantite, prix, valeur_marchande.
+    """
+    jour_debut, params, bounds = DataUtils.day_range("date", date_debut, date_debut, name="debut")
+    jour_fin, params_fin, bounds_fin = DataUtils.day_range("date", date_fin, date_fin, name="fin")
+    params.update(params_fin)
+    bounds += bounds_fin
+    query = f"""
+        SELECT
+            date,
+            {fund_column},
+            id_titre,
+            SUM(quantite) AS quantite,
+            AVG(prix) AS prix,
+            SUM(valeur_marchande) AS valeur_marchande
+        FROM {table_name}
+        WHERE (({jour_debut}) OR ({jour_fin}))
+        {{filtre_fonds}}
+        GROUP BY date, {fund_column}, id_titre
+    """
+    if fonds_ids is not None:
+        statement = text(query.format(filtre_fonds=f"AND {fund_column} IN :fonds_ids")).bindparams(
+            *bounds, bindparam("fonds_ids", expanding=True)
+        )
+        params["fonds_ids"] = list(fonds_ids)
+    else:
+        statement = text(query.format(filtre_fonds="")).bindparams(*bounds)
+
+    with engine.connect() as conn:
+        snapshots = pd.read_sql(statement, conn, params=params)
+    snapshots["date"] = pd.to_datetime(snapshots["date"]).dt.normalize()
+    if compact:
+        snapshots = DataUtils.optimize_dtypes(snapshots)
+    logger.info(f"{len(snapshots)} positions chargées pour les dates {date_debut} et {date_fin}")
+    return snapshots
+
+def diff_compositions(
+    composition_debut: pd.DataFrame,
+    composition_fin: pd.DataFrame,
+    keys: Sequence[str] = ("id_fonds", "id_titre"),
+    tolerance: float = 1e-9
+) -> pd.DataFrame:
+    """
+    Compare deux compositions par jointure de hachage sur les clés.
+
+    Args:
+        composition_debut: Composition à la date de référence.
+        composition_fin: Composition à la date comparée.
+        keys: Colonnes identifiant une position (fonds et titre par défaut).
+        tolerance: Écart absolu en dessous duquel une valeur est considérée inchangée.
+
+    Returns:
+        pd.DataFrame: Une ligne par position ajoutée, retirée ou modifiée, avec les
+        valeurs aux deux dates, les deltas (delta_quantite, delta_prix,
+        delta_valeur_marchande) et la colonne 'statut'.
+    """
+    keys = list(keys)
+    columns = keys + VALUE_COLUMNS
+    merged = pd.merge(
+        composition_debut[columns],
+        composition_fin[columns],
+        on=keys,
+        how="outer",
+        suffixes=("_debut", "_fin"),
+        indicator=True
+    )
+
+    merged["statut"] = np.select(
+        [merged["_merge"] == "right_only", merged["_merge"] == "left_only"],
+        [STATUT_AJOUT, STATUT_RETRAIT],
+        default=STATUT_MODIFICATION
+    )
+
+    changed = merged["_merge"] != "both"
+    for column in VALUE_COLUMNS:
+        debut = merged[f"{column}_debut"]
+        fin = merged[f"{column}_fin"]
+        # Une position absente à une date compte pour zéro dans le delta
+        merged[f"delta_{column}"] = fin.fillna(0) - debut.fillna(0)
+        changed |= (merged[f"delta_{column}"].abs() > tolerance).to_numpy()
+        changed |= (debut.isna() != fin.isna()).to_numpy()
+
+    diff = merged.loc[changed].drop(columns="_merge")
+    return diff.sort_values(keys).reset_index(drop=True)
+
+def diff_composition_fonds(
+    engine,
+    date_debut: Union[str, date],
+    date_fin: Union[str, date],
+    fonds_ids: Optional[Sequence[int]] = None,
+    table_name: str = TableNames.COMPOSITION_FONDS
+) -> pd.DataFrame:
+    """
+    Calcule le diff de composition entre deux dates pour un ou plusieurs fonds.
+
+    Tous les fonds sont comparés en une seule requête et une seule jointure
+    lorsque fonds_ids vaut None, ce qui permet le diff complet de fin de mois.
+
+    Args:
+        engine: L'engine SQLAlchemy.
+        date_debut: Date de la composition de référence.
+        date_fin: Date de la composition comparée.
+        fonds_ids: Identifiants des fonds à comparer (tous les fonds si None).
+        table_name: Table de composition à interroger.
+
+    Returns:
+        pd.DataFrame: Positions ajoutées, retirées et modifiées (voir diff_compositions).
+    """
+    snapshots = load_composition_snapshots(engine, date_debut, date_fin, fonds_ids, table_name)
+    diff = diff_compositions(
+        snapshots[snapshots["date"] == pd.Timestamp(date_debut).normalize()],
+        snapshots[snapshots["date"] == pd.Timestamp(date_fin).normalize()]
+    )
+    logger.info(
+        f"Diff de composition entre {date_debut} et {date_fin}: "
+        f"{diff['statut'].value_counts().to_dict()}"
+    )
+    return diff
@@ -1,76 +1,134 @@
 # logic/data_import_logic.py
 
 import os
+import asyncio
 import pandas as pd
-from STFP.sftp import SFTPClient
+from typing import Callable, Dict, Optional
+from STFP.sftp import SFTPClient, ACTION_IMPORTE, ACTION_ERREUR_IMPORT
+from logic.import_pipeline import ImportPipeline, iter_remote_blocks, DEFAULT_CHUNKSIZE
 import logging
-from utils import csv, excel # Assuming these modules exist with required functions
-from utils import data
+from utils.csv import CSVUtils
+from utils.excel import ExcelUtils
+from utils.data import DataUtils
+from utils.validation import SchemaValidator
 from database.connexionsqlServer import SQLServerConnection
 from database.connexionsqlLiter import SQLiteConnection
 from constantes import const1
-import logging
 # Configuration du logger
 logger = logging.getLogger(__name__)
 
-# Configuration du logger
-async def import_data_from_sftp(remote_filepath: str, local_filepath: str, target_table_name: str):
+def get_database_connection():
+    """
+    Retourne la connexion à la base de données selon l'environnement.
+
+    Returns:
+        SQLServerConnection en production, SQLiteConnection sinon.
+    """
+    if const1.ENV_TYPE == "prod": # Assuming "dev" or any other value means SQLite
+        logger.info("Using SQL Server connection for database operations.")
+        return SQLServerConnection()
+    logger.info("Using SQLite connection for database operations.")
+    return SQLiteConnection()
+
+def load_file_to_dataframe(local_filepath: str, use_cache: bool = False) -> pd.DataFrame:
+    """
+    Lit un fichier CSV ou Excel dans un DataFrame selon son extension.
+
+    Args:
+        local_filepath (str): Le chemin du fichier local.
+        use_cache (bool): Passe par le cache de parsing. Désactivé par défaut :
+            un fichier importé n'est lu qu'une fois, sa copie Parquet serait inutile.
+
+    Returns:
+        pd.DataFrame: Les données du fichier.
+    """
+    file_extension = os.path.splitext(local_filepath)[1].lower()
+    if file_extension == '.csv':
+        logger.info(f"Reading CSV file: {local_filepath}")
+        dataframe = CSVUtils.load_csv_to_dataframe(local_filepath, use_cache=use_cache)
+    elif file_extension in ['.xlsx', '.xls']:
+        logger.info(f"Reading Excel file: {local_filepath}")
+        dataframe = ExcelUtils.load_excel_to_dataframe(local_filepath, use_cache=use_cache)
+        if dataframe is None:
+            raise ValueError(f"Unable to read Excel file: {local_filepath}")
+    else:
+        logger.error(f"Unsupported file extension: {file_extension}")
+        raise ValueError(f"Unsupported file type for import: {file_extension}")
+    logger.info(f"File read successfully. DataFrame shape: {dataframe.shape}")
+    return dataframe
+
+def validation_transform(target_table_name: str, engine) -> Optional[Callable[[pd.DataFrame], pd.DataFrame]]:
+    """
+    Retourne la validation des données destinées à une table, ou None si la table n'a pas de schéma.
+
+    La transformation (SchemaValidator.as_transform en mode strict) lève une
+    ValueError dès qu'une ligne est invalide : le fichier suit alors le
+    chemin d'erreur de l'import (transaction annulée, fichier en erreur).
+    """
+    validator = SchemaValidator.for_table(target_table_name, engine)
+    return None if validator is None else validator.as_transform([], strict=True)
+
+async def import_data_from_sftp(
+    remote_filepath: str,
+    local_filepath: str,
+    target_table_name: str,
+    pipelined: bool = False,
+    chunksize: Optional[int] = None
+) -> Optional[Dict]:
     """
     Importe un fichier depuis un serveur SFTP vers un chemin local.
 
     Args:
         remote_filepath (str): Le chemin du fichier sur le serveur SFTP.
         local_filepath (str): Le chemin local où enregistrer le fichier.
- target_table_name (str): Le nom de la table cible dans la base de données.
+        target_table_name (str): Le nom de la table cible dans la base de données.
+        pipelined (bool): Pour un CSV, parse et charge les chunks pendant le téléchargement
+                          (voir logic.import_pipeline). Par défaut False.
+                          Dans les deux modes, les données sont validées avec le schéma de
+                          la table (voir validation_transform) : un fichier invalide n'est pas chargé.
+        chunksize (int, optional): Nombre de lignes par chunk en mode pipeline.
+
+    Returns:
+        dict: Les temps par étape en mode pipeline, None sinon.
     """
     sftp_client = None
+    db_connection = None
     try:
         # 1. Se connecter au SFTP
         logger.info(f"Attempting to connect to SFTP server...")
         sftp_client = SFTPClient()
-        await sftp_client.connect()
+        await asyncio.to_thread(sftp_client.connect)
         logger.info(f"Successfully connected to SFTP server.")
 
+        if pipelined and os.path.splitext(remote_filepath)[1].lower() == '.csv':
+            # Téléchargement, parsing et chargement en parallèle, par chunks
+            db_connection = get_database_connection()
+            pipeline = ImportPipeline(
+                lambda: iter_remote_blocks(sftp_client.open_channel(), remote_filepath),
+                target_table_name,
+                db_connection.engine,
+                transform=validation_transform(target_table_name, db_connection.engine),
+                chunksize=chunksize or DEFAULT_CHUNKSIZE,
+                local_copy=local_filepath
+            )
+            return await asyncio.to_thread(pipeline.run)
+
         # 2. Télécharger le fichier spécifié
         logger.info(f"Attempting to download file from {remote_filepath} to {local_filepath}...")
-        await sftp_client.download_file(remote_filepath, local_filepath)
+        await asyncio.to_thread(sftp_client.download_file, remote_filepath, local_filepath)
         logger.info(f"File downloaded successfully from {remote_filepath} to {local_filepath}.")
 
         # Déterminer l'extension du fichier et le lire
-        file_extension = os.path.splitext(local_filepath)[1].lower()
-
-        dataframe = None
-        if file_extension == '.csv':
-            logger.info(f"Reading CSV file: {local_filepath}")
-            dataframe = csv.load_csv_to_dataframe(local_filepath)
-            logger.info(f"CSV file read successfully. DataFrame shape: {dataframe.shape}")
-        elif file_extension in ['.xlsx', '.xls']:
-            logger.info(f"Reading Excel file: {local_filepath}")
-            dataframe = excel.load_excel_to_dataframe(local_filepath)
-            logger.info(f"Excel file read successfully. DataFrame shape: {dataframe.shape}")
-        else:
-            logger.error(f"Unsupported file extension: {file_extension}")
-            # Optionally, raise an exception or return an error indicator
-            raise ValueError(f"Unsupported file type for import: {file_extension}")
-
-        # 1. Obtenir la connexion à la base de données appropriée
-        db_connection = None
-        try:
-            if const1.ENV_TYPE == "prod": # Assuming "dev" or any other value means SQLite
- logger.info("Using SQL Server connection for database operations.")
- db_connection = SQLServerConnection()
- else:
- logger.info("Using SQLite connection for database operations.")
- db_connection = SQLiteConnection()
-
-            # Ouvre la connexion à la base de données
-            await db_connection.open_connection()
-            logger.info("Database connection opened.")
+        dataframe = load_file_to_dataframe(local_filepath)
 
-
- # 3. Charger les données dans la base de données
- logger.info(f"Attempting to load data into table: {target_table_name}")
- data.load_dataframe_to_sql(dataframe, target_table_name, db_connection.engine)
+        # 3. Valider puis charger les données dans la base de données
+        db_connection = get_database_connection()
+        validate = validation_transform(target_table_name, db_connection.engine)
+        if validate is not None:
+            dataframe = validate(dataframe)
+        logger.info(f"Attempting to load data into table: {target_table_name}")
+        DataUtils.load_dataframe_to_sql(dataframe, target_table_name, db_connection.engine, if_exists='append')
+        return None
 
     except Exception as e:
         logger.error(f"An error occurred during SFTP import: {e}", exc_info=True)
@@ -78,8 +136,102 @@ async def import_data_from_sftp(remote_filepath: str, local_filepath: str, targe
     finally:
         # 4. Se déconnecter du SFTP
         if sftp_client:
-            await sftp_client.disconnect()
+            sftp_client.disconnect()
             logger.info("SFTP connection closed.")
         if db_connection:
-            await db_connection.close_connection()
+            db_connection.engine.dispose()
+            logger.info("Database connection closed.")
+
+def _sync_and_import(
+    sftp_client: SFTPClient,
+    remote_dir: str,
+    local_dir: str,
+    target_table_name: str,
+    engine,
+    manifest_path: Optional[str] = None,
+    pattern: Optional[str] = None,
+    verify_hash: bool = False
+) -> Dict:
+    """
+    Synchronise un répertoire distant puis importe les fichiers nouveaux ou modifiés.
+
+    Returns:
+        dict: run_id et listes des fichiers ignores, inchanges, telecharges, importes et erreurs.
+    """
+    # Le manifeste n'est mis à jour qu'après l'import : un fichier en échec sera repris au prochain passage
+    sync = sftp_client.sync_directory(remote_dir, local_dir, manifest_path, pattern, verify_hash, commit_manifest=False)
+
+    importes, erreurs_import, journal = [], [], []
+    for entry in sync["telecharges"]:
+        try:
+            dataframe = load_file_to_dataframe(entry["local_path"])
+            validate = validation_transform(target_table_name, engine)
+            if validate is not None:
+                dataframe = validate(dataframe)
+            DataUtils.load_dataframe_to_sql(dataframe, target_table_name, engine, if_exists='append')
+            sync["manifest"].commit(entry)
+            importes.append(entry["remote_path"])
+            journal.append((entry["remote_path"], ACTION_IMPORTE, f"{len(dataframe)} lignes dans {target_table_name}"))
+        except Exception as e:
+            logger.error(f"Import failed for {entry['remote_path']}: {e}")
+            erreurs_import.append(entry["remote_path"])
+            journal.append((entry["remote_path"], ACTION_ERREUR_IMPORT, str(e)))
+    sync["manifest"].log(sync["run_id"], journal)
+
+    summary = {
+        "run_id": sync["run_id"],
+        "ignores": [f["remote_path"] for f in sync["ignores"]],
+        "inchanges": [f["remote_path"] for f in sync["inchanges"]],
+        "telecharges": [f["remote_path"] for f in sync["telecharges"]],
+        "importes": importes,
+        "erreurs": [f["remote_path"] for f in sync["erreurs"]] + erreurs_import
+    }
+    logger.info(
+        f"Sync {sync['run_id']}: {len(summary['ignores'])} skipped, {len(summary['telecharges'])} fetched, "
+        f"{len(importes)} imported, {len(summary['erreurs'])} errors."
+    )
+    return summary
+
+async def sync_and_import(
+    remote_dir: str,
+    local_dir: str,
+    target_table_name: str,
+    manifest_path: Optional[str] = None,
+    pattern: Optional[str] = None,
+    verify_hash: bool = False
+) -> Dict:
+    """
+    Synchronise un répertoire SFTP et importe uniquement les fichiers nouveaux ou modifiés.
+
+    Les fichiers inchangés depuis la dernière exécution (taille et date de
+    modification identiques au manifeste) ne sont ni téléchargés ni importés.
+    Chaque exécution est enregistrée dans le journal du manifeste.
+
+    Args:
+        remote_dir (str): Le répertoire sur le serveur SFTP.
+        local_dir (str): Le répertoire local de téléchargement.
+        target_table_name (str): Le nom de la table cible dans la base de données.
+        manifest_path (str, optional): La base SQLite du manifeste (local_dir/.sftp_manifest.db par défaut).
+        pattern (str, optional): Motif des fichiers à synchroniser (ex. '*.csv').
+        verify_hash (bool): Compare les empreintes SHA-256 pour ignorer les fichiers seulement touchés.
+
+    Returns:
+        dict: Le résumé de l'exécution (voir _sync_and_import).
+    """
+    sftp_client = SFTPClient()
+    db_connection = None
+    try:
+        db_connection = get_database_connection()
+        return await asyncio.to_thread(
+            _sync_and_import, sftp_client, remote_dir, local_dir, target_table_name,
+            db_connection.engine, manifest_path, pattern, verify_hash
+        )
+    except Exception as e:
+        logger.error(f"An error occurred during SFTP sync: {e}", exc_info=True)
+        raise
+    finally:
+        sftp_client.disconnect()
+        logger.info("SFTP connection closed.")
+        if db_connection:
+            db_connection.engine.dispose()
             logger.info("Database connection closed.")
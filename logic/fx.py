@@ -0,0 +1,280 @@
+# logic/fx.py
+
+import logging
+import os
+from datetime import date
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from constantes.const1 import TableNames
+
+logger = logging.getLogger(__name__)
+
+# Colonnes de la table des taux : 1 devise_source = taux devise_cible
+RATE_COLUMNS = ["date", "devise_source", "devise_cible", "taux"]
+
+# Colonne ajoutée aux positions converties
+TAUX_COLUMN = "taux_change"
+
+class FXRateTable:
+    """
+    Table de taux de change indexée par date et par paire de devises.
+    """
+
+    def __init__(self, rates: pd.DataFrame):
+        """
+        Args:
+            rates: Colonnes date, devise_source, devise_cible, taux.
+        """
+        missing = [col for col in RATE_COLUMNS if col not in rates.columns]
+        if missing:
+            raise ValueError(f"Colonnes manquantes dans la table des taux : {missing}")
+        rates = rates[RATE_COLUMNS].dropna().copy()
+        rates["date"] = pd.to_datetime(rates["date"])
+        rates["devise_source"] = rates["devise_source"].astype(str).str.upper()
+        rates["devise_cible"] = rates["devise_cible"].astype(str).str.upper()
+        rates["taux"] = rates["taux"].astype(float)
+        self.rates = rates.drop_duplicates(
+            ["date", "devise_source", "devise_cible"], keep="last"
+        ).sort_values("date").reset_index(drop=True)
+        self._base_cache: Dict[str, pd.DataFrame] = {}
+
+    @classmethod
+    def from_csv(cls, file_path: str, column_mapping: Optional[Dict[str, str]] = None, **read_kwargs) -> "FXRateTable":
+        """
+        Charge les taux depuis un fichier CSV.
+
+        Args:
+            file_path: Chemin du fichier CSV.
+            column_mapping: Renommage des colonnes du fichier vers RATE_COLUMNS.
+            **read_kwargs: Arguments transmis à pandas.read_csv (sep, encoding...).
+        """
+        rates = pd.read_csv(file_path, **read_kwargs)
+        if column_mapping:
+            rates = rates.rename(columns=column_mapping)
+        logger.info(f"{len(rates)} taux de change chargés depuis {file_path}")
+        return cls(rates)
+
+    @classmethod
+    def from_sftp(
+        cls,
+        sftp_client,
+        remote_path: str,
+        local_dir: str,
+        column_mapping: Optional[Dict[str, str]] = None,
+        **read_kwargs
+    ) -> "FXRateTable":
+        """
+        Télécharge un fichier de taux depuis le serveur SFTP puis le charge.
+
+        Args:
+            sftp_client: Client SFTP connecté (STFP.sftp.SFTPClient).
+            remote_path: Chemin du fichier distant.
+            local_dir: Répertoire local de téléchargement.
+        """
+        os.makedirs(local_dir, exist_ok=True)
+        local_path = os.path.join(local_dir, os.path.basename(remote_path))
+        sftp_client.download_file(remote_path, local_path)
+        if not os.path.exists(local_path):
+            raise FileNotFoundError(f"Le fichier de taux '{remote_path}' n'a pas pu être téléchargé.")
+        return cls.from_csv(local_path, column_mapping, **read_kwargs)
+
+    @classmethod
+    def from_sql(
+        cls,
+        engine,
+        date_debut: Optional[Union[str, date]] = None,
+        date_fin: Optional[Union[str, date]] = None
+    ) -> "FXRateTable":
+        """
+        Charge les taux depuis la table taux_change.
+
+        Les taux antérieurs à date_debut sont aussi chargés (dernier taux de
+        chaque paire) pour permettre la conversion à la date de début.
+        """
+        conditions, params = [], {}
+        if date_debut is not None:
+            # Dernier taux de chaque paire à date_debut, puis tous les taux suivants
+            conditions.append(f"""(
+                t.date >= :date_debut
+                OR t.date = (
+                    SELECT MAX(p.date) FROM {TableNames.TAUX_CHANGE} p
+                    WHERE p.devise_source = t.devise_source
+                      AND p.devise_cible = t.devise_cible
+                      AND p.date <= :date_debut
+                )
+            )""")
+            params["date_debut"] = str(date_debut)
+        if date_fin is not None:
+            conditions.append("t.date <= :date_fin")
+            params["date_fin"] = str(date_fin)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = text(f"SELECT t.date, t.devise_source, t.devise_cible, t.taux FROM {TableNames.TAUX_CHANGE} t {where}")
+        with engine.connect() as conn:
+            rates = pd.read_sql(query, conn, params=params)
+        logger.info(f"{len(rates)} taux de change chargés depuis la base de données")
+        return cls(rates)
+
+    def to_sql(self, engine, if_exists: str = "append"):
+        """Enregistre les taux dans la table taux_change."""
+        rates = self.rates.copy()
+        rates["date"] = rates["date"].dt.date
+        rates.to_sql(TableNames.TAUX_CHANGE, engine, if_exists=if_exists, index=False)
+        logger.info(f"{len(rates)} taux de change enregistrés dans {TableNames.TAUX_CHANGE}")
+
+    def rates_to(self, devise_base: str, pivot: Optional[str] = None) -> pd.DataFrame:
+        """
+        Construit les taux de chaque devise vers la devise de base.
+
+        Les taux directs sont complétés par les taux inverses puis, si une
+        devise pivot est fournie, par triangulation (devise -> pivot -> base)
+        avec le dernier taux pivot connu à chaque date.
+
+        Returns:
+            pd.DataFrame: Colonnes date, devise, taux (1 devise = taux devise_base), triée par date.
+        """
+        devise_base = devise_base.upper()
+        key = f"{devise_base}/{pivot}"
+        if key in self._base_cache:
+            return self._base_cache[key]
+
+        directs = self.rates[["date", "devise_source", "devise_cible", "taux"]]
+        inverses = directs.rename(columns={"devise_source": "devise_cible", "devise_cible": "devise_source"})
+        inverses = inverses.assign(taux=1.0 / inverses["taux"])
+        paires = pd.concat([directs, inverses], ignore_index=True)
+
+        vers_base = paires[paires["devise_cible"] == devise_base]
+        vers_base = vers_base.rename(columns={"devise_source": "devise"})[["date", "devise", "taux"]]
+        if pivot is not None and pivot.upper() != devise_base:
+            pivot = pivot.upper()
+            pivot_base = vers_base[vers_base["devise"] == pivot][["date", "taux"]]
+            vers_pivot = paires[(paires["devise_cible"] == pivot) & (paires["devise_source"] != devise_base)]
+            croises = pd.merge_asof(
+                vers_pivot.sort_values("date"),
+                pivot_base.rename(columns={"taux": "taux_pivot"}),
+                on="date",
+                direction="backward"
+            ).dropna(subset=["taux_pivot"])
+            croises = croises.assign(taux=croises["taux"] * croises["taux_pivot"])
+            croises = croises.rename(columns={"devise_source": "devise"})[["date", "devise", "taux"]]
+            # Les taux directs priment sur les taux croisés
+            vers_base = pd.concat([vers_base, croises], ignore_index=True)
+
+        result = vers_base.drop_duplicates(["date", "devise"], keep="first").sort_values("date").reset_index(drop=True)
+        self._base_cache[key] = result
+        return result
+
+    def convert(
+        self,
+        holdings: pd.DataFrame,
+        devise_base: str,
+        value_columns: Sequence[str] = ("valeur_marchande",),
+        date_col: str = "date",
+        currency_col: str = "devise",
+        pivot: Optional[str] = None,
+        tolerance: Optional[pd.Timedelta] = None,
+        keep_local: bool = True
+    ) -> pd.DataFrame:
+        """
+        Convertit des positions dans la devise de base.
+
+        Les taux sont joints en une seule opération (merge_asof par devise) :
+        chaque position prend le dernier taux connu à sa date, ce qui couvre
+        les jours sans cotation (week-ends, jours fériés).
+
+        Args:
+            holdings: Positions avec une colonne de date et une colonne de code devise.
+            devise_base: Code de la devise de reporting (ex. 'EUR').
+            value_columns: Colonnes de montants à convertir.
+            date_col: Colonne de date des positions.
+            currency_col: Colonne du code devise des positions.
+            pivot: Devise pivot pour les paires sans taux direct (ex. 'USD').
+            tolerance: Ancienneté maximale du taux utilisé (aucune limite si None).
+            keep_local: Conserve les montants d'origine dans les colonnes <col>_local.
+
+        Returns:
+            pd.DataFrame: Copie des positions, dans l'ordre d'origine, avec la colonne
+            taux_change et les montants convertis (NaN si aucun taux disponible, ou si
+            la date ou la devise de la position est manquante).
+        """
+        devise_base = devise_base.upper()
+        result = holdings.copy()
+        dates = pd.to_datetime(result[date_col]).to_numpy()
+        devises_connues = result[currency_col].notna().to_numpy()
+        devises = np.where(devises_connues, result[currency_col].astype(str).str.upper().to_numpy(), "")
+        # Les positions sans date ou sans devise ne sont pas jointes (merge_asof refuse les clés nulles)
+        joignables = devises_connues & ~pd.isna(dates)
+
+        gauche = pd.DataFrame({
+            "date": dates[joignables],
+            "devise": devises[joignables],
+            "_position": np.flatnonzero(joignables)
+        })
+        gauche = gauche.sort_values("date", kind="mergesort")
+        joint = pd.merge_asof(
+            gauche,
+            self.rates_to(devise_base, pivot),
+            on="date",
+            by="devise",
+            direction="backward",
+            tolerance=tolerance
+        )
+        taux = np.full(len(result), np.nan)
+        taux[joint["_position"].to_numpy()] = joint["taux"].to_numpy(dtype=float)
+        # Aucun taux n'est nécessaire pour la devise de base, même sans date
+        taux[devises == devise_base] = 1.0
+
+        manquants = np.isnan(taux)
+        if manquants.any():
+            logger.warning(
+                f"{int(manquants.sum())} positions sans taux vers {devise_base} "
+                f"(devises : {sorted(set(devises[manquants]) - {''})}, "
+                f"{int((manquants & ~joignables).sum())} sans date ou sans devise)"
+            )
+
+        result[TAUX_COLUMN] = taux
+        for column in value_columns:
+            if keep_local:
+                result[f"{column}_local"] = result[column]
+            result[column] = result[column].to_numpy(dtype=float) * taux
+        return result
+
+def attach_currency_codes(
+    engine,
+    holdings: pd.DataFrame,
+    id_col: str = "id_devise",
+    code_col: str = "devise"
+) -> pd.DataFrame:
+    """
+    Ajoute le code devise aux positions à partir de id_devise (table devise).
+
+    Returns:
+        pd.DataFrame: Copie des positions avec la colonne code_col.
+    """
+    with engine.connect() as conn:
+        devises = pd.read_sql(text(f"SELECT id, code FROM {TableNames.DEVISE}"), conn)
+    codes = pd.Series(devises["code"].to_numpy(), index=devises["id"].to_numpy())
+    result = holdings.copy()
+    result[code_col] = result[id_col].map(codes)
+    return result
+
+def convert_to_base_currency(
+    engine,
+    holdings: pd.DataFrame,
+    devise_base: str,
+    value_columns: Sequence[str] = ("valeur_marchande",),
+    pivot: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Convertit des positions issues des tables de composition dans la devise de base.
+
+    Les taux couvrant la période des positions sont chargés depuis taux_change.
+    """
+    if "devise" not in holdings.columns:
+        holdings = attach_currency_codes(engine, holdings)
+    dates = pd.to_datetime(holdings["date"])
+    rates = FXRateTable.from_sql(engine, dates.min().date(), dates.max().date())
+    return rates.convert(holdings, devise_base, value_columns, pivot=pivot)
@@ -0,0 +1,301 @@
+# logic/import_pipeline.py
+
+import io
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from utils.data import DataUtils
+
+logger = logging.getLogger(__name__)
+
+# Taille des blocs lus sur la source
+BLOCK_SIZE = 1024 * 1024
+# Nombre de lignes par chunk CSV
+DEFAULT_CHUNKSIZE = 50_000
+# Capacité des files entre étapes (blocs d'octets et chunks)
+DEFAULT_QUEUE_SIZE = 8
+# Délai d'attente des files, pour réagir à l'arrêt du pipeline
+_POLL_S = 0.1
+
+# Marqueur de fin de flux entre deux étapes
+_FIN = object()
+
+def iter_local_blocks(path: str, block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """Lit un fichier local par blocs."""
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            yield block
+
+def iter_remote_blocks(channel, remote_path: str, block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    Lit un fichier distant par blocs sur un canal SFTP, avec lecture anticipée.
+
+    Le canal est fermé à la fin de la lecture.
+    """
+    try:
+        size = channel.stat(remote_path).st_size
+        with channel.open(remote_path, "rb") as remote_file:
+            if hasattr(remote_file, "prefetch"):
+                remote_file.prefetch(size)
+            for block in iter(lambda: remote_file.read(block_size), b""):
+                yield block
+    finally:
+        channel.close()
+
+class _StageStats:
+    """Temps d'activité, temps d'attente et volumes d'une étape."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.busy_s = 0.0
+        self.wait_s = 0.0
+        self.items = 0
+        self.rows = 0
+        self.octets = 0
+
+    def as_dict(self) -> Dict:
+        return {
+            "etape": self.name,
+            "actif_s": round(self.busy_s, 4),
+            "attente_s": round(self.wait_s, 4),
+            "elements": self.items,
+            "lignes": self.rows,
+            "octets": self.octets
+        }
+
+class _QueueReader(io.RawIOBase):
+    """
+    Flux binaire lisible alimenté par une file de blocs d'octets.
+
+    Permet à pandas.read_csv de parser le fichier pendant son téléchargement.
+    """
+
+    def __init__(self, blocks: queue.Queue, stop: threading.Event, stats: _StageStats):
+        self._blocks = blocks
+        self._stop = stop
+        self._stats = stats
+        self._buffer = b""
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer and not self._eof:
+            start = time.perf_counter()
+            try:
+                block = self._blocks.get(timeout=_POLL_S)
+            except queue.Empty:
+                if self._stop.is_set():
+                    raise RuntimeError("Pipeline d'import interrompu")
+                continue
+            finally:
+                self._stats.wait_s += time.perf_counter() - start
+            if block is _FIN:
+                self._eof = True
+            else:
+                self._buffer = block
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+class ImportPipeline:
+    """
+    Pipeline d'import en flux : téléchargement -> parsing CSV -> validation/transformation -> chargement.
+
+    Chaque étape tourne dans son propre thread et communique avec la suivante
+    par une file bornée : le parsing commence dès les premiers octets reçus et
+    le chargement dès le premier chunk validé. La durée totale tend vers celle
+    de l'étape la plus lente au lieu de la somme des étapes.
+    """
+
+    def __init__(
+        self,
+        source: Callable[[], Iterable[bytes]],
+        target_table_name: str,
+        engine,
+        transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        local_copy: Optional[str] = None,
+        **csv_kwargs
+    ):
+        """
+        Args:
+            source: Fonction retournant l'itérable des blocs d'octets du fichier
+                    (iter_local_blocks, iter_remote_blocks...).
+            target_table_name: Table cible.
+            engine: L'engine SQLAlchemy.
+            transform: Validation/transformation appliquée à chaque chunk ; peut
+                       retourner un DataFrame filtré (lignes rejetées retirées).
+            chunksize: Nombre de lignes par chunk.
+            queue_size: Capacité de chaque file entre deux étapes.
+            local_copy: Chemin où conserver une copie du fichier téléchargé.
+            **csv_kwargs: Arguments transmis à pandas.read_csv (sep, encoding, dtype...).
+        """
+        self.source = source
+        self.target_table_name = target_table_name
+        self.engine = engine
+        self.transform = transform
+        self.chunksize = chunksize
+        self.queue_size = queue_size
+        self.local_copy = local_copy
+        self.csv_kwargs = csv_kwargs
+
+    def _put(self, q: queue.Queue, item, stop: threading.Event, stats: _StageStats):
+        """Dépose un élément dans une file bornée sans bloquer si le pipeline s'arrête."""
+        start = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=_POLL_S)
+                    return
+                except queue.Full:
+                    continue
+            raise RuntimeError("Pipeline d'import interrompu")
+        finally:
+            stats.wait_s += time.perf_counter() - start
+
+    def _get(self, q: queue.Queue, stop: threading.Event, stats: _StageStats):
+        """Retire un élément d'une file en surveillant l'arrêt du pipeline."""
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    return q.get(timeout=_POLL_S)
+                except queue.Empty:
+                    if stop.is_set():
+                        raise RuntimeError("Pipeline d'import interrompu")
+        finally:
+            stats.wait_s += time.perf_counter() - start
+
+    def _download(self, out: queue.Queue, stop, stats: _StageStats):
+        copy = open(self.local_copy, "wb") if self.local_copy else None
+        try:
+            iterator = iter(self.source())
+            while True:
+                start = time.perf_counter()
+                block = next(iterator, None)
+                if block is not None and copy is not None:
+                    copy.write(block)
+                stats.busy_s += time.perf_counter() - start
+                if block is None:
+                    break
+                stats.items += 1
+                stats.octets += len(block)
+                self._put(out, block, stop, stats)
+        finally:
+            if copy is not None:
+                copy.close()
+        self._put(out, _FIN, stop, stats)
+
+    def _parse(self, blocks: queue.Queue, out: queue.Queue, stop, stats: _StageStats):
+        reader = io.BufferedReader(_QueueReader(blocks, stop, stats), buffer_size=BLOCK_SIZE)
+        chunks = pd.read_csv(reader, chunksize=self.chunksize, **self.csv_kwargs)
+        while True:
+            start = time.perf_counter()
+            wait_before = stats.wait_s
+            chunk = next(chunks, None)
+            # Le temps passé à attendre les octets est compté en attente, pas en activité
+            stats.busy_s += time.perf_counter() - start - (stats.wait_s - wait_before)
+            if chunk is None:
+                break
+            stats.items += 1
+            stats.rows += len(chunk)
+            self._put(out, chunk, stop, stats)
+        self._put(out, _FIN, stop, stats)
+
+    def _transform(self, chunks: queue.Queue, out: queue.Queue, stop, stats: _StageStats):
+        while True:
+            chunk = self._get(chunks, stop, stats)
+            if chunk is _FIN:
+                break
+            start = time.perf_counter()
+            if self.transform is not None:
+                chunk = self.transform(chunk)
+            stats.busy_s += time.perf_counter() - start
+            stats.items += 1
+            stats.rows += len(chunk)
+            self._put(out, chunk, stop, stats)
+        self._put(out, _FIN, stop, stats)
+
+    def _load(self, chunks: queue.Queue, stop, stats: _StageStats):
+        # Tous les chunks sont chargés dans une seule transaction : une erreur dans
+        # n'importe quelle étape l'annule et laisse la table cible intacte
+        with self.engine.begin() as conn:
+            while True:
+                chunk = self._get(chunks, stop, stats)
+                if chunk is _FIN:
+                    break
+                start = time.perf_counter()
+                if not chunk.empty:
+                    DataUtils.load_dataframe_to_sql(chunk, self.target_table_name, conn, if_exists='append')
+                stats.busy_s += time.perf_counter() - start
+                stats.items += 1
+                stats.rows += len(chunk)
+        # Les caches remplis pendant la transaction relisent la table validée
+        DataUtils.mark_table_changed(self.target_table_name)
+
+    def run(self) -> Dict:
+        """
+        Exécute le pipeline et attend la fin de toutes les étapes.
+
+        Returns:
+            dict: duree_s (durée totale), lignes (lignes chargées) et etapes (temps
+                  d'activité et d'attente, volumes par étape).
+
+        Raises:
+            Exception: La première erreur survenue dans une étape ; les autres étapes sont arrêtées.
+        """
+        stop = threading.Event()
+        errors = []
+        blocks = queue.Queue(maxsize=self.queue_size)
+        parsed = queue.Queue(maxsize=self.queue_size)
+        validated = queue.Queue(maxsize=self.queue_size)
+        stats = {name: _StageStats(name) for name in ("telechargement", "parsing", "validation", "chargement")}
+
+        def _run_stage(target, *args):
+            try:
+                target(*args)
+            except Exception as e:
+                if not stop.is_set():
+                    errors.append(e)
+                stop.set()
+
+        stages = [
+            (self._download, blocks, stop, stats["telechargement"]),
+            (self._parse, blocks, parsed, stop, stats["parsing"]),
+            (self._transform, parsed, validated, stop, stats["validation"]),
+            (self._load, validated, stop, stats["chargement"]),
+        ]
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=_run_stage, args=stage, name=f"import-{name}", daemon=True)
+            for stage, name in zip(stages, stats)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duree = time.perf_counter() - start
+
+        if errors:
+            logger.error(f"Échec du pipeline d'import vers {self.target_table_name} : {errors[0]}")
+            raise errors[0]
+
+        result = {
+            "duree_s": round(duree, 4),
+            "lignes": stats["chargement"].rows,
+            "etapes": [stage.as_dict() for stage in stats.values()]
+        }
+        logger.info(
+            f"{result['lignes']} lignes importées dans {self.target_table_name} en {duree:.2f} s ("
+            + ", ".join(f"{s.name} {s.busy_s:.2f} s" for s in stats.values()) + ")"
+        )
+        return result
@@ -0,0 +1,340 @@
+# logic/ingestion_service.py
+
+import fnmatch
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from STFP.sftp import PART_SUFFIX, file_sha256
+from logic.data_import_logic import load_file_to_dataframe, validation_transform
+from utils.data import DataUtils
+
+logger = logging.getLogger(__name__)
+
+# Statuts enregistrés dans le registre des fichiers
+STATUT_IMPORTE = "importe"
+STATUT_DOUBLON = "doublon"
+STATUT_ERREUR = "erreur"
+STATUT_SANS_REGLE = "sans_regle"
+# Contenu en cours d'import par un autre worker : le fichier reste dans le dépôt (non enregistré)
+STATUT_EN_COURS = "en_cours"
+
+# Intervalle par défaut entre deux scrutations du répertoire de dépôt (secondes)
+DEFAULT_POLL_INTERVAL = 30
+# Nombre d'imports simultanés par défaut
+DEFAULT_WORKERS = 2
+
+def load_rules(config_path: str) -> List[Dict[str, str]]:
+    """
+    Charge les règles d'association nom de fichier -> table depuis un fichier JSON.
+
+    Format attendu : [{"pattern": "compo_fonds_*.csv", "table": "composition_fonds_gestionnaire"}, ...]
+    """
+    with open(config_path, encoding="utf-8") as f:
+        rules = json.load(f)
+    for rule in rules:
+        if "pattern" not in rule or "table" not in rule:
+            raise ValueError(f"Règle d'ingestion invalide (pattern et table requis) : {rule}")
+    return rules
+
+class IngestionLedger:
+    """
+    Registre SQLite des fichiers ingérés, indexé par empreinte SHA-256 du contenu.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # Empreintes en cours d'import dans ce processus
+        self._en_cours = set()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ingestion_fichiers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sha256 TEXT NOT NULL,
+                    nom_fichier TEXT NOT NULL,
+                    table_cible TEXT,
+                    statut TEXT NOT NULL,
+                    lignes INTEGER,
+                    detail TEXT,
+                    date DATETIME NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ingestion_sha256 ON ingestion_fichiers(sha256, statut)")
+
+    def deja_importe(self, sha256: str) -> bool:
+        """Indique si un contenu identique a déjà été importé avec succès."""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT 1 FROM ingestion_fichiers WHERE sha256 = ? AND statut = ? LIMIT 1",
+                (sha256, STATUT_IMPORTE)
+            ).fetchone()
+        return row is not None
+
+    def reserver(self, sha256: str) -> bool:
+        """
+        Réserve un contenu pour l'import dans ce processus.
+
+        Returns:
+            bool: False si un autre import du même contenu est en cours ou terminé.
+        """
+        with self._lock:
+            if sha256 in self._en_cours or self.deja_importe(sha256):
+                return False
+            self._en_cours.add(sha256)
+            return True
+
+    def liberer(self, sha256: str):
+        """Libère la réservation d'un contenu."""
+        with self._lock:
+            self._en_cours.discard(sha256)
+
+    def terminer(self, sha256: str, nom_fichier: str, table_cible: Optional[str], statut: str,
+                 lignes: Optional[int] = None, detail: Optional[str] = None):
+        """
+        Enregistre le résultat d'un import réservé puis libère la réservation.
+
+        Les deux opérations sont faites sous le verrou de reserver() : un autre
+        worker voit le contenu soit en cours, soit importé, jamais entre les deux.
+        """
+        with self._lock:
+            try:
+                self.enregistrer(sha256, nom_fichier, table_cible, statut, lignes, detail)
+            finally:
+                self._en_cours.discard(sha256)
+
+    def enregistrer(self, sha256: str, nom_fichier: str, table_cible: Optional[str], statut: str,
+                    lignes: Optional[int] = None, detail: Optional[str] = None):
+        """Ajoute une ligne au registre."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO ingestion_fichiers (sha256, nom_fichier, table_cible, statut, lignes, detail, date) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (sha256, nom_fichier, table_cible, statut, lignes, detail, datetime.now().isoformat())
+            )
+
+class IngestionService:
+    """
+    Service d'ingestion des fichiers déposés dans un répertoire.
+
+    À chaque cycle, le service récupère éventuellement les nouveaux fichiers
+    d'un répertoire SFTP, puis importe les fichiers stables du répertoire de
+    dépôt selon les règles de nommage. Les fichiers importés sont déplacés
+    dans le répertoire d'archive, les fichiers en échec dans le répertoire
+    d'erreur, comme ceux dont une ligne enfreint le schéma de la table cible
+    (voir utils.validation.TABLE_SCHEMAS). Un fichier dont le contenu a déjà
+    été importé n'est pas rechargé ;
+    un fichier dont le contenu est en cours d'import reste dans le dépôt jusqu'au
+    cycle suivant.
+    """
+
+    def __init__(
+        self,
+        landing_dir: str,
+        rules: List[Dict[str, str]],
+        engine,
+        archive_dir: Optional[str] = None,
+        error_dir: Optional[str] = None,
+        ledger_path: Optional[str] = None,
+        max_workers: int = DEFAULT_WORKERS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        sftp_client=None,
+        sftp_remote_dir: Optional[str] = None,
+        sftp_pattern: Optional[str] = None
+    ):
+        """
+        Args:
+            landing_dir: Répertoire de dépôt surveillé.
+            rules: Règles {"pattern": motif de nom de fichier, "table": table cible}, testées dans l'ordre.
+            engine: L'engine SQLAlchemy cible.
+            archive_dir: Répertoire d'archive (landing_dir/archive par défaut).
+            error_dir: Répertoire des fichiers en erreur (landing_dir/erreur par défaut).
+            ledger_path: Base SQLite du registre (landing_dir/.ingestion.db par défaut).
+            max_workers: Nombre d'imports simultanés.
+            poll_interval: Intervalle entre deux cycles, en secondes.
+            sftp_client: Client SFTP (STFP.sftp.SFTPClient) pour récupérer les fichiers distants.
+            sftp_remote_dir: Répertoire distant synchronisé vers landing_dir à chaque cycle.
+            sftp_pattern: Motif des fichiers distants à récupérer.
+        """
+        self.landing_dir = landing_dir
+        self.rules = rules
+        self.engine = engine
+        self.archive_dir = archive_dir or os.path.join(landing_dir, "archive")
+        self.error_dir = error_dir or os.path.join(landing_dir, "erreur")
+        self.ledger = IngestionLedger(ledger_path or os.path.join(landing_dir, ".ingestion.db"))
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.sftp_client = sftp_client
+        self.sftp_remote_dir = sftp_remote_dir
+        self.sftp_pattern = sftp_pattern
+        # Taille observée au cycle précédent : un fichier n'est traité que si elle n'a pas changé
+        self._tailles: Dict[str, int] = {}
+        self._stop = threading.Event()
+        for directory in (self.landing_dir, self.archive_dir, self.error_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def table_for(self, filename: str) -> Optional[str]:
+        """Retourne la table cible du premier motif correspondant au nom de fichier."""
+        for rule in self.rules:
+            if fnmatch.fnmatch(filename, rule["pattern"]):
+                return rule["table"]
+        return None
+
+    def _fichiers_stables(self) -> List[str]:
+        """Liste les fichiers de dépôt dont la taille n'a pas changé depuis le cycle précédent."""
+        tailles = {}
+        for name in sorted(os.listdir(self.landing_dir)):
+            path = os.path.join(self.landing_dir, name)
+            if name.startswith(".") or name.endswith(PART_SUFFIX) or not os.path.isfile(path):
+                continue
+            tailles[name] = os.path.getsize(path)
+        stables = [name for name, taille in tailles.items() if self._tailles.get(name) == taille]
+        self._tailles = {name: taille for name, taille in tailles.items() if name not in stables}
+        return stables
+
+    def _deplacer(self, name: str, destination: str, sha256: str) -> str:
+        """Déplace un fichier de dépôt dans un sous-répertoire daté de destination."""
+        target_dir = os.path.join(destination, datetime.now().strftime("%Y%m%d"))
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, name)
+        if os.path.exists(target):
+            base, ext = os.path.splitext(name)
+            target = os.path.join(target_dir, f"{base}_{sha256[:12]}{ext}")
+        shutil.move(os.path.join(self.landing_dir, name), target)
+        return target
+
+    def process_file(self, name: str) -> Dict:
+        """
+        Importe un fichier du répertoire de dépôt puis l'archive ou le met en erreur.
+
+        Returns:
+            dict: fichier, table, statut, lignes et detail.
+        """
+        path = os.path.join(self.landing_dir, name)
+        sha256 = file_sha256(path)
+        table = self.table_for(name)
+        result = {"fichier": name, "table": table, "statut": None, "lignes": None, "detail": None}
+
+        if table is None:
+            result["statut"], result["detail"] = STATUT_SANS_REGLE, "aucune règle ne correspond au nom"
+            self._deplacer(name, self.error_dir, sha256)
+        elif not self.ledger.reserver(sha256):
+            if not self.ledger.deja_importe(sha256):
+                # Import du même contenu en cours : s'il échoue, ce fichier sera importé au cycle suivant
+                result["statut"], result["detail"] = STATUT_EN_COURS, "contenu en cours d'import"
+                logger.info(f"Fichier '{name}' : {result['statut']} ({table}), laissé dans le dépôt")
+                return result
+            result["statut"], result["detail"] = STATUT_DOUBLON, "contenu déjà importé"
+            self._deplacer(name, self.archive_dir, sha256)
+        else:
+            try:
+                dataframe = load_file_to_dataframe(path)
+                validate = validation_transform(table, self.engine)
+                if validate is not None:
+                    dataframe = validate(dataframe)
+                DataUtils.load_dataframe_to_sql(dataframe, table, self.engine, if_exists='append')
+                result["statut"], result["lignes"] = STATUT_IMPORTE, len(dataframe)
+            except Exception as e:
+                logger.error(f"Échec de l'import de '{name}' dans {table} : {e}")
+                result["statut"], result["detail"] = STATUT_ERREUR, str(e)
+            finally:
+                # Le registre est écrit avant la libération de la réservation
+                self.ledger.terminer(sha256, name, table, result["statut"] or STATUT_ERREUR, result["lignes"], result["detail"])
+            destination = self.archive_dir if result["statut"] == STATUT_IMPORTE else self.error_dir
+            self._deplacer(name, destination, sha256)
+            logger.info(f"Fichier '{name}' : {result['statut']} ({table})")
+            return result
+
+        self.ledger.enregistrer(sha256, name, table, result["statut"], result["lignes"], result["detail"])
+        logger.info(f"Fichier '{name}' : {result['statut']} ({table})")
+        return result
+
+    def poll_sftp(self):
+        """Récupère les fichiers distants nouveaux ou modifiés dans le répertoire de dépôt."""
+        if self.sftp_client is None or not self.sftp_remote_dir:
+            return
+        try:
+            self.sftp_client.sync_directory(
+                self.sftp_remote_dir,
+                self.landing_dir,
+                manifest_path=os.path.join(os.path.dirname(self.ledger.db_path), ".sftp_manifest.db"),
+                pattern=self.sftp_pattern
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération SFTP de '{self.sftp_remote_dir}' : {e}")
+
+    def run_once(self) -> List[Dict]:
+        """
+        Exécute un cycle : récupération SFTP éventuelle puis import des fichiers stables.
+
+        Returns:
+            list[dict]: Le résultat de chaque fichier traité.
+        """
+        self.poll_sftp()
+        fichiers = self._fichiers_stables()
+        if not fichiers:
+            return []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.process_file, fichiers))
+
+    def run_forever(self):
+        """Exécute des cycles jusqu'à l'appel de stop()."""
+        logger.info(f"Service d'ingestion démarré sur '{self.landing_dir}' (cycle de {self.poll_interval} s)")
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Erreur lors du cycle d'ingestion : {e}", exc_info=True)
+            self._stop.wait(self.poll_interval)
+        logger.info("Service d'ingestion arrêté.")
+
+    def stop(self):
+        """Demande l'arrêt du service après le cycle en cours."""
+        self._stop.set()
+
+def main():
+    """
+    Lance le service d'ingestion configuré par config.env.
+
+    Variables : INGESTION_LANDING_DIR (répertoire de dépôt), INGESTION_RULES
+    (fichier JSON des règles), INGESTION_WORKERS, INGESTION_POLL_INTERVAL et
+    INGESTION_SFTP_PATTERN. Si ce dernier est défini, le répertoire
+    SFTP_REMOTE_PATH est aussi scruté à chaque cycle.
+    """
+    from constantes import const1
+    from logic.data_import_logic import get_database_connection
+    from STFP.sftp import SFTPClient
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    const1.load_config()
+    sftp_pattern = os.getenv("INGESTION_SFTP_PATTERN")
+    service = IngestionService(
+        landing_dir=os.getenv("INGESTION_LANDING_DIR", os.path.join(const1.OUTPUT_PATHS["temp"], "depot")),
+        rules=load_rules(os.getenv("INGESTION_RULES", "ingestion_rules.json")),
+        engine=get_database_connection().engine,
+        max_workers=int(os.getenv("INGESTION_WORKERS", DEFAULT_WORKERS)),
+        poll_interval=float(os.getenv("INGESTION_POLL_INTERVAL", DEFAULT_POLL_INTERVAL)),
+        sftp_client=SFTPClient() if sftp_pattern else None,
+        sftp_remote_dir=const1.SFTP_CONFIG["remote_path"] if sftp_pattern else None,
+        sftp_pattern=sftp_pattern
+    )
+    try:
+        service.run_forever()
+    except KeyboardInterrupt:
+        service.stop()
+    finally:
+        if service.sftp_client is not None:
+            service.sftp_client.disconnect()
+        service.engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Tests des poids actifs des fonds par rapport à leur indice de référence.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from constantes.const1 import TableNames
+from logic.active_weights import active_weights_on_date, compute_active_weights
+
+def _donnees():
+    """Deux fonds liés à l'indice 100, un fonds lié à l'indice 200."""
+    liens = pd.DataFrame({"id_fonds": [1, 2, 3], "id_indice": [100, 100, 200]})
+    positions_fonds = pd.DataFrame({
+        "id_fonds": [1, 1, 1, 2, 2, 3],
+        "id_titre": [10, 11, 12, 10, 13, 11],
+        "valeur_marchande": [50.0, 30.0, 20.0, 80.0, 20.0, 10.0],
+    })
+    positions_indices = pd.DataFrame({
+        "id_indice": [100, 100, 100, 200, 200],
+        "id_titre": [10, 11, 13, 11, 12],
+        "valeur_marchande": [40.0, 40.0, 20.0, 75.0, 25.0],
+    })
+    return liens, positions_fonds, positions_indices
+
+def _reference(positions_fonds, positions_indices, id_fonds, id_indice):
+    """Poids du fonds et de l'indice par titre, calculés avec pandas."""
+    fonds = positions_fonds[positions_fonds["id_fonds"] == id_fonds].groupby("id_titre")["valeur_marchande"].sum()
+    indice = positions_indices[positions_indices["id_indice"] == id_indice].groupby("id_titre")["valeur_marchande"].sum()
+    poids = pd.concat([fonds / fonds.sum(), indice / indice.sum()], axis=1, keys=["fonds", "indice"]).fillna(0)
+    return poids["fonds"], poids["indice"]
+
+def test_chevauchement_et_active_share():
+    """Chevauchement et active share correspondent au calcul titre par titre, fonds par fonds."""
+    liens, positions_fonds, positions_indices = _donnees()
+    resume = compute_active_weights(liens, positions_fonds, positions_indices)["resume"].set_index("id_fonds")
+
+    assert resume["id_indice"].to_dict() == {1: 100, 2: 100, 3: 200}
+    for id_fonds, id_indice in liens.itertuples(index=False):
+        fonds, indice = _reference(positions_fonds, positions_indices, id_fonds, id_indice)
+        assert resume.loc[id_fonds, "chevauchement"] == pytest.approx(np.minimum(fonds, indice).sum())
+        assert resume.loc[id_fonds, "active_share"] == pytest.approx(0.5 * (fonds - indice).abs().sum())
+        assert resume.loc[id_fonds, "nb_titres_fonds"] == (fonds > 0).sum()
+        assert resume.loc[id_fonds, "nb_titres_indice"] == (indice > 0).sum()
+    # Fonds 1 : 0.4 (titre 10) + 0.3 (titre 11)
+    assert resume.loc[1, "chevauchement"] == pytest.approx(0.7)
+
+def test_top_sur_et_sous_ponderations():
+    """Les écarts sont classés par fonds, du plus grand au plus petit, sans les écarts de signe opposé."""
+    liens, positions_fonds, positions_indices = _donnees()
+    resultats = compute_active_weights(liens, positions_fonds, positions_indices, top_n=2)
+
+    sur = resultats["surponderations"]
+    fonds_1 = sur[sur["id_fonds"] == 1]
+    assert fonds_1["id_titre"].tolist() == [12, 10]
+    assert fonds_1["poids_actif"].tolist() == pytest.approx([0.2, 0.1])
+    assert fonds_1["rang"].tolist() == [1, 2]
+    assert (sur["poids_actif"] > 0).all()
+
+    sous = resultats["sous_ponderations"]
+    fonds_2 = sous[sous["id_fonds"] == 2]
+    assert fonds_2["id_titre"].tolist() == [11]
+    assert fonds_2["poids_actif"].tolist() == pytest.approx([-0.4])
+    assert (sous["poids_actif"] < 0).all()
+    # Fonds 3 : le titre 12 de l'indice 200 n'est pas détenu
+    assert sous[sous["id_fonds"] == 3]["id_titre"].tolist() == [12]
+
+def test_fonds_partageant_un_indice_comme_un_par_un():
+    """Le calcul groupé des fonds d'un même indice donne les résultats du calcul fonds par fonds."""
+    liens, positions_fonds, positions_indices = _donnees()
+    groupe = compute_active_weights(liens, positions_fonds, positions_indices, top_n=3)
+    for id_fonds in liens["id_fonds"]:
+        seul = compute_active_weights(liens[liens["id_fonds"] == id_fonds], positions_fonds, positions_indices, top_n=3)
+        for cle in ("resume", "surponderations", "sous_ponderations"):
+            attendu = groupe[cle][groupe[cle]["id_fonds"] == id_fonds].reset_index(drop=True)
+            pd.testing.assert_frame_equal(seul[cle], attendu, check_dtype=False)
+
+def test_indice_sans_composition():
+    """Les fonds d'un indice sans composition à la date sont ignorés."""
+    liens, positions_fonds, positions_indices = _donnees()
+    positions_indices = positions_indices[positions_indices["id_indice"] == 100]
+    resume = compute_active_weights(liens, positions_fonds, positions_indices)["resume"]
+    assert sorted(resume["id_fonds"]) == [1, 2]
+
+def test_chargement_colonne_datetime(tmp_path):
+    """Les compositions stockées en DATETIME sont retrouvées pour la journée demandée."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'poids.db'}")
+    liens, positions_fonds, positions_indices = _donnees()
+    liens.to_sql("fonds_indice", engine, index=False)
+    for table, positions in (
+        (TableNames.COMPOSITION_FONDS, positions_fonds), (TableNames.COMPOSITION_INDICE, positions_indices)
+    ):
+        # Une autre date ne doit pas être chargée
+        autre = positions.assign(date=pd.Timestamp("2024-02-01"), valeur_marchande=1.0)
+        pd.concat([positions.assign(date=pd.Timestamp("2024-01-31")), autre]).to_sql(table, engine, index=False)
+
+    resultats = active_weights_on_date(engine, "2024-01-31", fonds_ids=[1, 2])
+    attendu = compute_active_weights(liens[liens["id_fonds"] != 3], positions_fonds, positions_indices)
+    engine.dispose()
+    pd.testing.assert_frame_equal(resultats["resume"], attendu["resume"], check_dtype=False)
@@ -0,0 +1,41 @@
+"""
+Tests du cache de graphiques de utils/chart_cache.
+"""
+
+import os
+
+import pandas as pd
+
+from utils.chart_cache import ChartCache
+
+def _tracer(fig, ax):
+    ax.plot([1, 2, 3], [3, 1, 2])
+
+def test_reutilisation_et_eviction_concurrente(tmp_path, monkeypatch):
+    cache = ChartCache(str(tmp_path / "cache"))
+    data = pd.DataFrame({"prix": [1.0, 2.0, 3.0]})
+    dest = str(tmp_path / "graphiques" / "prix.png")
+
+    cache.render("prix", data, _tracer, dest)
+    cache.render("prix", data, _tracer, dest)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Un autre processus évince l'entrée pendant la copie : le graphique est retracé
+    copier = ChartCache._copier
+
+    def copier_apres_eviction(source, dest_path):
+        if source.endswith(".png"):
+            os.remove(source)
+        copier(source, dest_path)
+
+    monkeypatch.setattr(ChartCache, "_copier", staticmethod(copier_apres_eviction))
+    os.remove(dest)
+    cache.render("prix", data, _tracer, dest)
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert os.path.getsize(dest) > 0
+
+    # Des données différentes donnent une nouvelle entrée
+    monkeypatch.undo()
+    cache.render("prix", data * 2, _tracer, dest)
+    assert cache.misses == 3
+    assert len([n for n in os.listdir(cache.cache_dir) if n.endswith(".png")]) == 2
@@ -0,0 +1,102 @@
+"""
+Tests du diff de composition entre deux dates.
+"""
+
+import asyncio
+from datetime import date
+
+import pytest
+import pandas as pd
+from sqlalchemy import create_engine
+
+from logic.composition_diff import diff_composition_fonds, diff_compositions, load_composition_snapshots
+
+@pytest.fixture
+def engine():
+    """Base SQLite en mémoire avec deux dates de composition."""
+    engine = create_engine("sqlite://")
+    compositions = pd.DataFrame([
+        # Fonds 1 : titre 10 modifié, titre 11 retiré, titre 12 ajouté, titre 13 inchangé
+        ("2024-01-31", 1, 1, 10, 100.0, 10.0, 1000.0),
+        ("2024-01-31", 1, 1, 11, 50.0, 20.0, 1000.0),
+        ("2024-01-31", 1, 1, 13, 5.0, 2.0, 10.0),
+        ("2024-02-29", 1, 1, 10, 120.0, 10.0, 1200.0),
+        ("2024-02-29", 1, 1, 12, 10.0, 30.0, 300.0),
+        ("2024-02-29", 1, 1, 13, 5.0, 2.0, 10.0),
+        # Fonds 2 : même titre chez deux gestionnaires, agrégé par titre
+        ("2024-01-31", 2, 1, 10, 10.0, 10.0, 100.0),
+        ("2024-02-29", 2, 1, 10, 10.0, 10.0, 100.0),
+        ("2024-02-29", 2, 2, 10, 5.0, 10.0, 50.0),
+    ], columns=["date", "id_fonds", "id_gestionnaire", "id_titre", "quantite", "prix", "valeur_marchande"])
+    compositions.to_sql("composition_fonds_gestionnaire", engine, index=False)
+    return engine
+
+def test_diff_tous_fonds(engine):
+    """Teste le diff de tous les fonds en une passe."""
+    diff = diff_composition_fonds(engine, "2024-01-31", "2024-02-29")
+    statuts = {(row.id_fonds, row.id_titre): row.statut for row in diff.itertuples()}
+    assert statuts == {
+        (1, 10): "modification",
+        (1, 11): "retrait",
+        (1, 12): "ajout",
+        (2, 10): "modification",
+    }
+    ligne = diff[(diff["id_fonds"] == 1) & (diff["id_titre"] == 11)].iloc[0]
+    assert ligne["delta_valeur_marchande"] == -1000.0
+    ligne = diff[(diff["id_fonds"] == 2) & (diff["id_titre"] == 10)].iloc[0]
+    assert ligne["delta_quantite"] == 5.0
+
+def test_diff_un_fonds(engine):
+    """Teste le filtre sur une liste de fonds."""
+    diff = diff_composition_fonds(engine, "2024-01-31", "2024-02-29", fonds_ids=[2])
+    assert diff["id_fonds"].unique().tolist() == [2]
+
+def test_snapshots_compacts(engine):
+    """Les identifiants sont réduits sans changer le diff."""
+    compact = load_composition_snapshots(engine, "2024-01-31", "2024-02-29", table_name="composition_fonds_gestionnaire")
+    brut = load_composition_snapshots(
+        engine, "2024-01-31", "2024-02-29", table_name="composition_fonds_gestionnaire", compact=False
+    )
+    assert compact["id_fonds"].dtype == "int8"
+    assert brut["id_fonds"].dtype == "int64"
+    pd.testing.assert_frame_equal(compact, brut, check_dtype=False)
+
+def test_diff_compositions_identiques():
+    """Deux compositions identiques ne produisent aucun écart."""
+    composition = pd.DataFrame({
+        "id_fonds": [1], "id_titre": [1], "quantite": [1.0], "prix": [2.0], "valeur_marchande": [2.0]
+    })
+    assert diff_compositions(composition, composition.copy()).empty
+
+def test_diff_colonne_datetime():
+    """Les dates stockées en DATETIME sont comparées comme des dates."""
+    engine = create_engine("sqlite://")
+    pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-31", "2024-02-29", "2024-02-29"]),
+        "id_fonds": [1, 1, 1],
+        "id_titre": [10, 10, 11],
+        "quantite": [1.0, 2.0, 1.0],
+        "prix": [1.0, 1.0, 1.0],
+        "valeur_marchande": [1.0, 2.0, 1.0],
+    }).to_sql("composition_fonds_gestionnaire", engine, index=False)
+
+    diff = diff_composition_fonds(engine, date(2024, 1, 31), "2024-02-29")
+    assert dict(zip(diff["id_titre"], diff["statut"])) == {10: "modification", 11: "ajout"}
+
+def test_diff_crud_modele_orm():
+    """Le CRUD passe par le chargement de la couche logique, sur la table du modèle."""
+    crud = pytest.importorskip("crud.entities")
+    from sqlalchemy.orm import Session
+    from database.models import Base, CompositionFonds
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[CompositionFonds.__table__])
+    with Session(engine) as db:
+        db.add_all([
+            CompositionFonds(date=date(2024, 1, 31), id_fonds=1, id_titre=10, quantite=1.0, prix=1.0, valeur_marchande=1.0),
+            CompositionFonds(date=date(2024, 2, 29), id_fonds=1, id_titre=11, quantite=1.0, prix=1.0, valeur_marchande=1.0),
+            CompositionFonds(date=date(2024, 2, 29), id_fonds=2, id_titre=10, quantite=1.0, prix=1.0, valeur_marchande=1.0),
+        ])
+        db.commit()
+        diff = asyncio.run(crud.CompositionFondsCRUD().get_composition_diff(db, 1, date(2024, 1, 31), date(2024, 2, 29)))
+    assert dict(zip(diff["id_titre"], diff["statut"])) == {10: "retrait", 11: "ajout"}
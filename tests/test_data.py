@@ -0,0 +1,58 @@
+"""
+Tests des types compacts de utils/data.
+"""
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from utils.data import DataUtils
+
+def _composition():
+    return pd.DataFrame({
+        "id": range(1000),
+        "id_fonds": [1, 2] * 500,
+        "id_titre": range(1000, 2000),
+        "date": ["2024-01-31"] * 1000,
+        "code_fonds": ["F1", "F2"] * 500,
+        "nom_titre": [f"Titre {i}" for i in range(1000)],
+        "secteur": ["Tech", "Santé", "Énergie", "Banque"] * 250,
+        "valeur_marchande": [1.5] * 1000,
+    })
+
+def test_optimize_dtypes_types_compacts():
+    """Identifiants au plus petit entier, libellés répétés en 'category', dates en datetime64."""
+    df = _composition()
+    compact = DataUtils.optimize_dtypes(df)
+
+    assert compact["id"].dtype == "int16"
+    assert compact["id_fonds"].dtype == "int8"
+    assert compact["id_titre"].dtype == "int16"
+    assert compact["date"].dtype == "datetime64[ns]"
+    assert compact["code_fonds"].dtype == "category"
+    assert compact["secteur"].dtype == "category"
+    # Libellés tous distincts et montants : types d'origine
+    assert compact["nom_titre"].dtype == object
+    assert compact["valeur_marchande"].dtype == "float64"
+    # L'entrée n'est pas modifiée et les valeurs sont conservées
+    assert df["id"].dtype == "int64"
+    pd.testing.assert_frame_equal(compact.astype(df.dtypes.to_dict()).assign(date=df["date"]), df)
+
+    report = DataUtils.memory_report(compact, reference=df)
+    assert report.iloc[-1]["octets"] < report.iloc[-1]["octets_reference"]
+
+def test_optimize_dtypes_dates_invalides():
+    """Une colonne de dates contenant une valeur invalide reste inchangée."""
+    df = pd.DataFrame({"date": ["2024-01-31", "pas une date"], "id": [1, 2]})
+    assert DataUtils.optimize_dtypes(df)["date"].dtype == object
+
+def test_load_sql_to_dataframe_compact(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'compact.db'}")
+    _composition().to_sql("composition_fonds", engine, index=False)
+    brut = DataUtils.load_sql_to_dataframe("SELECT * FROM composition_fonds", engine)
+    compact = DataUtils.load_sql_to_dataframe("SELECT * FROM composition_fonds", engine, compact=True)
+    engine.dispose()
+
+    assert brut["id_fonds"].dtype == "int64"
+    assert compact["id_fonds"].dtype == "int8"
+    assert compact["code_fonds"].dtype == "category"
+    assert compact["date"].dtype == "datetime64[ns]"
@@ -0,0 +1,153 @@
+"""
+Tests du cube d'exposition de analysis/data_analyzer.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import data_analyzer
+from analysis.data_analyzer import (
+    build_exposure_cube,
+    calculate_market_value_by_asset_type,
+    calculate_market_value_by_fund_country_asset_type,
+    calculate_fund_overlap,
+    calculate_weight_by_fund,
+)
+from logic.fx import FXRateTable
+from utils.data import DataUtils
+
+@pytest.fixture
+def positions():
+    """Positions sur deux fonds, avec une devise manquante."""
+    return pd.DataFrame({
+        "Fund": ["F1", "F1", "F1", "F2", "F2"],
+        "Manager": ["M1", "M2", "M1", "M1", "M1"],
+        "Country": ["FR", "FR", "DE", "FR", "US"],
+        "Asset Type": ["Equity", "Bond", "Equity", "Equity", "Bond"],
+        "Sector": ["Tech", "Gov", "Auto", "Tech", "Gov"],
+        "Currency": pd.Categorical(["EUR", "EUR", "EUR", None, "USD"]),
+        "Market Value": [100.0, 50.0, 50.0, 30.0, 70.0],
+    })
+
+def test_cube_aggregate_identique_groupby(positions):
+    """Les agrégations du cube correspondent aux groupby pandas, sans modifier l'entrée."""
+    original = positions.copy()
+    cube = build_exposure_cube(positions)
+    pd.testing.assert_frame_equal(positions, original)
+
+    attendu = positions.groupby(["Fund", "Country"])["Market Value"].sum().reset_index()
+    resultat = cube.aggregate(["Fund", "Country"])
+    np.testing.assert_allclose(resultat["Market Value"], attendu["Market Value"])
+    assert resultat["Positions"].sum() == len(positions)
+    assert cube.total() == 300.0
+    # La devise manquante reste une ligne à part entière
+    assert cube.aggregate(["Currency"])["Market Value"].sum() == 300.0
+
+def test_cube_weights_et_slice(positions):
+    """Poids par fonds et découpage du cube sur une valeur de dimension."""
+    cube = build_exposure_cube(positions)
+    poids = cube.weights(["Fund", "Asset Type"], within=["Fund"])
+    f1 = poids[poids["Fund"] == "F1"].set_index("Asset Type")["Weight"]
+    assert f1["Equity"] == pytest.approx(0.75)
+    assert f1["Bond"] == pytest.approx(0.25)
+    assert poids.groupby("Fund")["Weight"].sum().tolist() == pytest.approx([1.0, 1.0])
+
+    f2 = cube.slice({"Fund": "F2"})
+    assert f2.total() == 100.0
+    assert cube.slice({"Country": ["FR", "DE"]}).total() == 230.0
+    with pytest.raises(ValueError):
+        cube.weights(["Fund"], within=["Country"])
+
+def test_agregations_en_devise_de_base(positions):
+    """Avec une table de taux, les montants sont convertis avant d'être additionnés."""
+    positions["Date"] = "2024-01-31"
+    positions["Currency"] = ["EUR", "EUR", "EUR", "EUR", "USD"]
+    taux = FXRateTable(pd.DataFrame({
+        "date": ["2024-01-30"], "devise_source": ["USD"], "devise_cible": ["EUR"], "taux": [0.5],
+    }))
+
+    par_type = calculate_market_value_by_asset_type(positions, fx_rates=taux, base_currency="EUR")
+    assert par_type.set_index("Asset Type")["Market Value"].to_dict() == {"Bond": 85.0, "Equity": 180.0}
+    detail = calculate_market_value_by_fund_country_asset_type(positions, fx_rates=taux, base_currency="EUR")
+    assert detail["Market Value"].sum() == 265.0
+    assert build_exposure_cube(positions, fx_rates=taux, base_currency="EUR").total() == 265.0
+
+    poids = calculate_weight_by_fund(positions.copy(), fx_rates=taux, base_currency="EUR")["Weight by Fund"]
+    assert poids.iloc[3:].tolist() == pytest.approx([30 / 65, 35 / 65])
+    # Les montants d'origine ne sont pas modifiés
+    assert positions["Market Value"].sum() == 300.0
+    with pytest.raises(ValueError):
+        calculate_weight_by_fund(positions, fx_rates=taux)
+
+def test_resultats_identiques_sur_types_compacts(positions):
+    """Les agrégations donnent les mêmes résultats sur un DataFrame passé par optimize_dtypes."""
+    compact = DataUtils.optimize_dtypes(positions, category_columns=list(positions.columns[:-1]))
+    assert (compact.dtypes.iloc[:-1] == "category").all()
+
+    for by in (["Fund"], ["Fund", "Country"], ["Currency", "Sector"]):
+        pd.testing.assert_frame_equal(
+            build_exposure_cube(compact).aggregate(by), build_exposure_cube(positions).aggregate(by), check_dtype=False
+        )
+    pd.testing.assert_frame_equal(
+        calculate_market_value_by_asset_type(compact), calculate_market_value_by_asset_type(positions),
+        check_dtype=False, check_categorical=False
+    )
+    np.testing.assert_allclose(
+        calculate_weight_by_fund(compact.copy())["Weight by Fund"],
+        calculate_weight_by_fund(positions.copy())["Weight by Fund"]
+    )
+
+    holdings = pd.DataFrame({
+        "id_fonds": [1, 1, 2, 2, 3],
+        "id_titre": [10, 11, 10, 12, 11],
+        "valeur_marchande": [60.0, 40.0, 50.0, 50.0, 10.0],
+    })
+    brut, reduit = calculate_fund_overlap(holdings), calculate_fund_overlap(DataUtils.optimize_dtypes(holdings))
+    for key in ("overlap", "cosine", "top_similar"):
+        pd.testing.assert_frame_equal(reduit[key], brut[key], check_dtype=False, check_index_type=False, check_column_type=False)
+
+def _overlap_reference(holdings):
+    """Chevauchement et similarité cosinus calculés paire par paire."""
+    poids = holdings.groupby(["id_fonds", "id_titre"])["valeur_marchande"].sum().unstack(fill_value=0.0)
+    poids = poids.div(poids.sum(axis=1), axis=0).to_numpy()
+    n = len(poids)
+    overlap, cosine = np.zeros((n, n)), np.zeros((n, n))
+    for i in range(n):
+        for j in range(n):
+            overlap[i, j] = np.minimum(poids[i], poids[j]).sum()
+            cosine[i, j] = poids[i] @ poids[j] / (np.linalg.norm(poids[i]) * np.linalg.norm(poids[j]))
+    return overlap, cosine
+
+@pytest.mark.parametrize("block_pairs", [1, 50, 5_000_000])
+def test_overlap_comme_reference_paire_par_paire(monkeypatch, block_pairs):
+    """Le calcul par titre et par blocs donne le chevauchement de la comparaison paire par paire."""
+    monkeypatch.setattr(data_analyzer, "OVERLAP_BLOCK_PAIRS", block_pairs)
+    rng = np.random.default_rng(0)
+    holdings = pd.DataFrame({
+        "id_fonds": rng.integers(0, 12, 300),
+        "id_titre": rng.integers(0, 40, 300),
+        "valeur_marchande": rng.uniform(1, 100, 300),
+    })
+    overlap, cosine = _overlap_reference(holdings)
+    resultat = calculate_fund_overlap(holdings, top_k=3)
+
+    np.testing.assert_allclose(resultat["overlap"].to_numpy(), overlap, atol=1e-12)
+    np.testing.assert_allclose(resultat["cosine"].to_numpy(), cosine, atol=1e-12)
+    np.testing.assert_allclose(np.diag(overlap), 1.0)
+
+    top = resultat["top_similar"]
+    assert len(top) == 12 * 3
+    for fonds, lignes in top.groupby("id_fonds"):
+        autres = np.delete(overlap[fonds], fonds)
+        assert lignes["rank"].tolist() == [1, 2, 3]
+        assert lignes["overlap"].tolist() == pytest.approx(sorted(autres, reverse=True)[:3])
+        assert fonds not in lignes["similar_fund"].tolist()
+
+def test_overlap_top_k_borne():
+    """top_k est limité au nombre d'autres fonds ; un seul fonds ne produit aucun voisin."""
+    holdings = pd.DataFrame({"id_fonds": [1, 1, 2], "id_titre": [10, 11, 10], "valeur_marchande": [1.0, 1.0, 1.0]})
+    top = calculate_fund_overlap(holdings, top_k=5)["top_similar"]
+    assert top["similar_fund"].tolist() == [2, 1]
+    assert top["overlap"].tolist() == pytest.approx([0.5, 0.5])
+    assert calculate_fund_overlap(holdings[holdings["id_fonds"] == 1])["top_similar"].empty
@@ -0,0 +1,97 @@
+"""
+Tests des imports SFTP de logic/data_import_logic, avec un client SFTP simulé.
+"""
+
+import asyncio
+import os
+import shutil
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+pytest.importorskip("win32com")
+
+from logic import data_import_logic
+
+class FakeSFTPClient:
+    """Client SFTP dont les fichiers distants sont des fichiers locaux."""
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def download_file(self, remote_path, local_path):
+        shutil.copyfile(remote_path, local_path)
+
+    def open_channel(self):
+        return LocalChannel()
+
+class LocalChannel:
+    """Canal SFTP lisant les fichiers locaux."""
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def open(self, path, mode):
+        return open(path, mode)
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self, url):
+        self.engine = create_engine(url)
+        self.disposed = 0
+        dispose = self.engine.dispose
+
+        def dispose_and_count(*args, **kwargs):
+            self.disposed += 1
+            dispose(*args, **kwargs)
+
+        self.engine.dispose = dispose_and_count
+
+@pytest.fixture
+def environnement(tmp_path, monkeypatch):
+    connexions = []
+
+    def connexion():
+        connexions.append(FakeConnection(f"sqlite:///{tmp_path / 'cible.db'}"))
+        return connexions[-1]
+
+    monkeypatch.setattr(data_import_logic, "SFTPClient", FakeSFTPClient)
+    monkeypatch.setattr(data_import_logic, "get_database_connection", connexion)
+    return tmp_path, connexions
+
+def test_connexion_fermee_apres_import(environnement):
+    tmp_path, connexions = environnement
+    source = tmp_path / "distant.csv"
+    pd.DataFrame({"id": [1, 2], "prix": [1.5, 2.5]}).to_csv(source, index=False)
+
+    asyncio.run(data_import_logic.import_data_from_sftp(str(source), str(tmp_path / "local.csv"), "positions"))
+    with create_engine(f"sqlite:///{tmp_path / 'cible.db'}").connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM positions")).scalar() == 2
+    assert [c.disposed for c in connexions] == [1]
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_fichier_invalide_non_charge(environnement, pipelined):
+    """Les deux modes d'import valident le fichier avec le schéma de la table et le rejettent entier."""
+    tmp_path, _ = environnement
+    engine = create_engine(f"sqlite:///{tmp_path / 'cible.db'}")
+    pd.DataFrame({"id": [1]}).to_sql("indice", engine, index=False)
+    pd.DataFrame({"id": [10]}).to_sql("titre", engine, index=False)
+    source = tmp_path / "indice.csv"
+    pd.DataFrame({
+        "date": ["2024-01-31", "2024-01-31"], "id_indice": [1, 1], "id_titre": [10, 99],
+        "quantite": [1.0, 2.0], "prix": [1.0, 1.0], "valeur_marchande": [1.0, 2.0], "dividende": [0.0, 0.0],
+    }).to_csv(source, index=False)
+
+    with pytest.raises(ValueError, match="lignes invalides"):
+        asyncio.run(data_import_logic.import_data_from_sftp(
+            str(source), str(tmp_path / "local.csv"), "composition_indice", pipelined=pipelined
+        ))
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM sqlite_master WHERE name = 'composition_indice'")).first() is None
+    engine.dispose()
@@ -0,0 +1,43 @@
+"""
+Tests de la pagination et des caches du visualiseur de DataFrames.
+"""
+
+import pandas as pd
+
+from ui import dataframe_viewer
+from ui.dataframe_viewer import DataFrameViewer
+
+def _viewer():
+    viewer = DataFrameViewer()
+    viewer.set_dataframe(pd.DataFrame({
+        "code": [f"F{i}" for i in range(120)],
+        "prix": [float(i % 7) for i in range(120)],
+    }), "fonds")
+    return viewer
+
+def test_page_vide_sans_dataframe():
+    """Sans DataFrame chargé, la réponse garde la forme d'une page."""
+    page = DataFrameViewer().get_rows(page=2, page_size=10)
+    assert page["data"] == [] and page["columns"] == []
+    assert page["total_rows"] == 0 and page["total_pages"] == 1
+
+def test_filtre_et_tri():
+    page = _viewer().get_rows(page=1, page_size=5, sort_by="prix", ascending=False, filtre="f1")
+    # F1, F10..F19, F100..F119 : 31 lignes
+    assert page["total_rows"] == 31
+    assert page["total_pages"] == 7
+    assert [ligne["prix"] for ligne in page["data"]] == [6.0, 6.0, 6.0, 6.0, 5.0]
+
+def test_cache_des_filtres_borne(monkeypatch):
+    """Le cache des filtres évince les masques les moins récemment utilisés."""
+    monkeypatch.setattr(dataframe_viewer, "MAX_FILTER_CACHE", 3)
+    viewer = _viewer()
+    for filtre in ("F1", "F2", "F3"):
+        viewer.get_rows(filtre=filtre)
+    # F1 redevient le plus récent : F2 est évincé à l'ajout de F4
+    viewer.get_rows(filtre="f1")
+    viewer.get_rows(filtre="F4")
+    assert list(viewer._filter_cache) == [("f3", None), ("f1", None), ("f4", None)]
+
+    viewer.set_dataframe(pd.DataFrame({"code": ["A"]}), "autre")
+    assert len(viewer._filter_cache) == 0
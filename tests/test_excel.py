@@ -0,0 +1,150 @@
+"""
+Tests de la lecture et de l'import Excel en flux.
+"""
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+pytest.importorskip("win32com")
+
+from utils.excel import ExcelEditor, ExcelUtils
+
+@pytest.fixture
+def classeur(tmp_path):
+    path = tmp_path / "positions.xlsx"
+    df = pd.DataFrame({
+        "id": range(1, 251),
+        "prix": [i * 0.25 if i % 7 else np.nan for i in range(250)],
+        "code": [f"F{i % 5}" if i % 11 else None for i in range(250)],
+    })
+    with pd.ExcelWriter(path) as writer:
+        df.to_excel(writer, sheet_name="Feuil1", index=False)
+        df.head(3).to_excel(writer, sheet_name="Autre", index=False)
+    return str(path)
+
+def test_chunks_identiques_a_read_excel(classeur):
+    chunks = list(ExcelUtils.iter_excel_chunks(classeur, sheet_name="Feuil1", chunksize=60))
+    assert [len(c) for c in chunks] == [60, 60, 60, 60, 10]
+    attendu = pd.read_excel(classeur, sheet_name="Feuil1")
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), attendu, check_dtype=False)
+
+def test_chargement_par_chunks(classeur):
+    chunks = ExcelUtils.load_excel_to_dataframe(classeur, sheet_name=1, chunksize=2, use_cache=False)
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True), pd.read_excel(classeur, sheet_name=1), check_dtype=False
+    )
+
+def test_import_sql_en_flux(classeur, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    ExcelUtils.excel_file_to_sql(classeur, "positions", engine, sheet_name="Feuil1", chunksize=100)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*), SUM(id) FROM positions")).one() == (250, sum(range(1, 251)))
+    engine.dispose()
+
+def test_modele_mis_en_forme(tmp_path):
+    """Les lignes et colonnes seulement mises en forme sont ignorées ; les types suivent dtype."""
+    import openpyxl
+    from openpyxl.styles import PatternFill
+
+    path = str(tmp_path / "modele.xlsx")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["id", "commentaire", "prix"])
+    for i in range(5):
+        ws.append([i, None if i < 3 else f"note {i}", None if i < 3 else i * 1.5])
+    ws.append([None, None, None])
+    ws.append([9, "fin", 9.5])
+    ws["A20"].fill = PatternFill("solid", fgColor="FFFF00")
+    ws["E2"].number_format = "0.00"
+    wb.save(path)
+
+    chunks = list(ExcelUtils.iter_excel_chunks(path, chunksize=3))
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), pd.read_excel(path), check_dtype=False)
+    # Colonne vide dans le premier chunk : float64 comme read_excel, pas object
+    assert chunks[0]["prix"].dtype == "float64"
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'modele.db'}")
+    ExcelUtils.excel_file_to_sql(path, "modele", engine, chunksize=3, dtype={"commentaire": "object"})
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM modele")).scalar() == 7
+        types = {row[1]: row[2] for row in conn.execute(text("PRAGMA table_info(modele)"))}
+    assert types == {"id": "BIGINT", "commentaire": "TEXT", "prix": "FLOAT"}
+    engine.dispose()
+
+def test_editeur_enregistre_une_fois(tmp_path, monkeypatch):
+    """Plusieurs modifications sur plusieurs feuilles ne produisent qu'un enregistrement."""
+    chemin = tmp_path / "rapport.xlsx"
+    enregistrements = []
+    sauvegarde = openpyxl.Workbook.save
+    monkeypatch.setattr(openpyxl.Workbook, "save", lambda wb, f: (enregistrements.append(f), sauvegarde(wb, f)))
+
+    with ExcelUtils.edit(str(chemin), create=True) as editor:
+        editor.write_value("Synthese", "B2", np.float64(1250.0))
+        editor.write_formula("Synthese", "B3", "SUM(B2:B2)")
+        editor.write_values("Synthese", {"A2": "Total", "A3": "Somme"})
+        editor.write_dataframe("Detail", pd.DataFrame({"code": ["F1", "F2"], "prix": [1.5, np.nan]}))
+    assert len(enregistrements) == 1
+    assert editor.nb_modifications == 10
+
+    wb = openpyxl.load_workbook(chemin)
+    # La feuille par défaut du nouveau classeur est renommée, pas conservée vide
+    assert wb.sheetnames == ["Synthese", "Detail"]
+    assert wb["Synthese"]["B2"].value == 1250.0
+    assert wb["Synthese"]["B3"].value == "=SUM(B2:B2)"
+    assert [[c.value for c in row] for row in wb["Detail"].iter_rows()] == [["code", "prix"], ["F1", 1.5], ["F2", None]]
+
+    # Session sans modification sur un fichier existant : aucun enregistrement
+    with ExcelEditor(str(chemin)) as editor:
+        editor.sheet("Synthese")
+    assert len(enregistrements) == 1
+
+def test_editeur_rien_enregistre_si_erreur(tmp_path):
+    """Une erreur dans le bloc with annule toutes les modifications de la session."""
+    chemin = tmp_path / "rapport.xlsx"
+    with ExcelEditor(str(chemin), create=True) as editor:
+        editor.write_value("Synthese", "A1", "initial")
+
+    with pytest.raises(RuntimeError):
+        with ExcelEditor(str(chemin)) as editor:
+            editor.write_value("Synthese", "A1", "modifié")
+            editor.write_value("Nouvelle", "A1", 1)
+            raise RuntimeError("échec du traitement")
+    wb = openpyxl.load_workbook(chemin)
+    assert wb.sheetnames == ["Synthese"]
+    assert wb["Synthese"]["A1"].value == "initial"
+
+    with pytest.raises(RuntimeError):
+        with ExcelEditor(str(tmp_path / "nouveau.xlsx"), create=True) as editor:
+            raise RuntimeError("échec du traitement")
+    assert not (tmp_path / "nouveau.xlsx").exists()
+    with pytest.raises(FileNotFoundError):
+        ExcelEditor(str(tmp_path / "absent.xlsx"))
+
+@pytest.mark.parametrize("bloc", [
+    [[1, 2.5, "a"], [None, 4, "b"]],
+    np.array([[1, 2.5, "a"], [None, 4, "b"]], dtype=object),
+    pd.DataFrame({"x": [1, np.nan], "y": [2.5, 4.0], "z": ["a", "b"]}),
+])
+def test_write_block(tmp_path, bloc):
+    """Listes, tableaux NumPy et DataFrames sont écrits ligne par ligne à partir de la cellule indiquée."""
+    chemin = tmp_path / "bloc.xlsx"
+    with ExcelEditor(str(chemin), create=True) as editor:
+        editor.write_block("Feuil1", "B3", bloc)
+    assert editor.nb_modifications == 6
+
+    ws = openpyxl.load_workbook(chemin)["Feuil1"]
+    valeurs = [[c.value for c in row] for row in ws.iter_rows(min_row=3, max_row=4, min_col=2, max_col=4)]
+    assert valeurs == [[1, 2.5, "a"], [None, 4, "b"]]
+    assert ws["A3"].value is None and ws["B2"].value is None
+
+def test_write_block_tableau_numerique(tmp_path):
+    """Les scalaires NumPy sont convertis et NaN donne une cellule vide."""
+    chemin = tmp_path / "bloc.xlsx"
+    with ExcelEditor(str(chemin), create=True) as editor:
+        editor.write_block("Feuil1", "A1", np.array([[1.0, np.nan], [3.0, 4.0]]))
+    ws = openpyxl.load_workbook(chemin)["Feuil1"]
+    assert [[c.value for c in row] for row in ws.iter_rows()] == [[1, None], [3, 4]]
@@ -0,0 +1,51 @@
+"""
+Tests de la conversion des positions dans la devise de base.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from logic.fx import FXRateTable
+
+@pytest.fixture
+def rates():
+    return FXRateTable(pd.DataFrame({
+        "date": ["2024-01-01", "2024-01-01", "2024-01-03"],
+        "devise_source": ["USD", "JPY", "USD"],
+        "devise_cible": ["EUR", "USD", "EUR"],
+        "taux": [0.9, 0.007, 0.8],
+    }))
+
+def test_conversion_taux_croise_et_dernier_taux_connu(rates):
+    holdings = pd.DataFrame({
+        "date": ["2024-01-02", "2024-01-03", "2024-01-02", "2024-01-02"],
+        "devise": ["usd", "USD", "JPY", "EUR"],
+        "valeur_marchande": [100.0, 100.0, 1000.0, 50.0],
+    })
+    result = rates.convert(holdings, "EUR", pivot="USD")
+    # JPY -> USD -> EUR : 1000 * 0.007 * 0.9
+    np.testing.assert_allclose(result["valeur_marchande"], [90.0, 80.0, 6.3, 50.0])
+    assert result["valeur_marchande_local"].tolist() == [100.0, 100.0, 1000.0, 50.0]
+
+def test_date_manquante(rates):
+    holdings = pd.DataFrame({
+        "date": ["2024-01-02", None, None],
+        "devise": ["USD", "USD", "EUR"],
+        "valeur_marchande": [100.0, 100.0, 50.0],
+    })
+    result = rates.convert(holdings, "EUR")
+    assert result["valeur_marchande"].iloc[0] == pytest.approx(90.0)
+    assert np.isnan(result["valeur_marchande"].iloc[1])
+    # La devise de base ne nécessite pas de taux
+    assert result["valeur_marchande"].iloc[2] == 50.0
+
+def test_devise_manquante(rates):
+    holdings = pd.DataFrame({
+        "date": ["2024-01-02", "2024-01-02"],
+        "devise": [np.nan, "USD"],
+        "valeur_marchande": [100.0, 100.0],
+    })
+    result = rates.convert(holdings, "EUR")
+    assert np.isnan(result["taux_change"].iloc[0])
+    assert result["valeur_marchande"].iloc[1] == pytest.approx(90.0)
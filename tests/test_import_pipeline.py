@@ -0,0 +1,42 @@
+"""
+Tests du pipeline d'import en flux, sur une base SQLite fichier.
+"""
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from logic.import_pipeline import ImportPipeline, iter_local_blocks
+
+@pytest.fixture
+def csv_and_engine(tmp_path):
+    path = tmp_path / "positions.csv"
+    pd.DataFrame({"id": range(10_000), "prix": [i * 0.5 for i in range(10_000)]}).to_csv(path, index=False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    pd.DataFrame({"id": [-1], "prix": [0.0]}).to_sql("positions", engine, index=False)
+    yield str(path), engine
+    engine.dispose()
+
+def _count(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM positions")).scalar()
+
+def test_import_complet(csv_and_engine):
+    path, engine = csv_and_engine
+    result = ImportPipeline(lambda: iter_local_blocks(path), "positions", engine, chunksize=1000).run()
+    assert result["lignes"] == 10_000
+    assert _count(engine) == 10_001
+
+def test_echec_en_cours_de_flux_laisse_la_table_intacte(csv_and_engine):
+    """Une erreur de validation au milieu du fichier annule les chunks déjà chargés."""
+    path, engine = csv_and_engine
+
+    def transform(chunk):
+        if chunk["id"].iloc[0] >= 7000:
+            raise ValueError("ligne invalide")
+        return chunk
+
+    pipeline = ImportPipeline(lambda: iter_local_blocks(path), "positions", engine, transform=transform, chunksize=1000)
+    with pytest.raises(ValueError):
+        pipeline.run()
+    assert _count(engine) == 1
@@ -0,0 +1,122 @@
+"""
+Tests du service d'ingestion : idempotence par empreinte et déplacement des fichiers traités.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+pytest.importorskip("win32com")
+
+from logic.ingestion_service import (
+    STATUT_DOUBLON, STATUT_EN_COURS, STATUT_ERREUR, STATUT_IMPORTE, STATUT_SANS_REGLE, IngestionService
+)
+from STFP.sftp import file_sha256
+
+RULES = [
+    {"pattern": "positions_*.csv", "table": "positions"},
+    {"pattern": "positions_*.txt", "table": "positions"},
+]
+
+@pytest.fixture
+def service(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cible.db'}")
+    yield IngestionService(str(tmp_path / "depot"), RULES, engine)
+    engine.dispose()
+
+def _deposer(service, name, contenu="id,prix\n1,10.5\n2,11.0\n"):
+    with open(os.path.join(service.landing_dir, name), "w", encoding="utf-8") as f:
+        f.write(contenu)
+
+def _lignes(service):
+    with service.engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM positions")).scalar()
+
+def _fichiers(directory):
+    return sorted(name for _, _, names in os.walk(directory) for name in names)
+
+def test_fichier_importe_une_seule_fois(service):
+    _deposer(service, "positions_1.csv")
+    # Premier cycle : la taille est relevée, le fichier n'est traité qu'une fois stable
+    assert service.run_once() == []
+    [result] = service.run_once()
+    assert (result["statut"], result["lignes"]) == (STATUT_IMPORTE, 2)
+    assert _lignes(service) == 2
+
+    # Le même contenu redéposé, même sous un autre nom, n'est pas réimporté
+    _deposer(service, "positions_1.csv")
+    _deposer(service, "positions_2.csv")
+    service.run_once()
+    results = service.run_once()
+    assert [r["statut"] for r in results] == [STATUT_DOUBLON, STATUT_DOUBLON]
+    assert _lignes(service) == 2
+    assert len(_fichiers(service.archive_dir)) == 3
+    assert sorted(os.listdir(service.landing_dir)) == [".ingestion.db", "archive", "erreur"]
+
+def test_fichiers_en_erreur_deplaces(service):
+    _deposer(service, "inconnu.csv")
+    _deposer(service, "positions_1.txt")
+    results = {r["fichier"]: r for r in (service.process_file("inconnu.csv"), service.process_file("positions_1.txt"))}
+
+    assert results["inconnu.csv"]["statut"] == STATUT_SANS_REGLE
+    assert results["positions_1.txt"]["statut"] == STATUT_ERREUR
+    assert _fichiers(service.error_dir) == ["inconnu.csv", "positions_1.txt"]
+    assert _fichiers(service.archive_dir) == []
+    assert not os.path.exists(os.path.join(service.landing_dir, "positions_1.txt"))
+
+    # Un contenu en échec peut être redéposé et importé une fois corrigé
+    _deposer(service, "positions_1.txt")
+    os.rename(os.path.join(service.landing_dir, "positions_1.txt"), os.path.join(service.landing_dir, "positions_1.csv"))
+    assert service.process_file("positions_1.csv")["statut"] == STATUT_IMPORTE
+
+def test_contenu_en_cours_laisse_dans_le_depot(service):
+    """Un contenu en cours d'import ailleurs n'est pas archivé comme doublon : il est repris ensuite."""
+    _deposer(service, "positions_2.csv")
+    sha256 = file_sha256(os.path.join(service.landing_dir, "positions_2.csv"))
+    assert service.ledger.reserver(sha256)
+
+    assert service.process_file("positions_2.csv")["statut"] == STATUT_EN_COURS
+    assert os.path.exists(os.path.join(service.landing_dir, "positions_2.csv"))
+    assert _fichiers(service.archive_dir) == []
+
+    # L'autre import échoue : le contenu n'est pas marqué importé et le fichier est importé
+    service.ledger.terminer(sha256, "positions_1.csv", "positions", STATUT_ERREUR)
+    assert service.process_file("positions_2.csv")["statut"] == STATUT_IMPORTE
+    assert _lignes(service) == 2
+
+def test_registre_ecrit_avant_liberation(service, monkeypatch):
+    """Pendant l'écriture du registre, le contenu reste réservé pour les autres workers."""
+    _deposer(service, "positions_1.csv")
+    sha256 = file_sha256(os.path.join(service.landing_dir, "positions_1.csv"))
+    enregistrer = service.ledger.enregistrer
+    vus = []
+
+    def enregistrer_et_observer(*args, **kwargs):
+        vus.append(sha256 in service.ledger._en_cours)
+        enregistrer(*args, **kwargs)
+
+    monkeypatch.setattr(service.ledger, "enregistrer", enregistrer_et_observer)
+    assert service.process_file("positions_1.csv")["statut"] == STATUT_IMPORTE
+    assert vus == [True]
+    assert not service.ledger.reserver(sha256)
+
+def test_fichier_invalide_rejete_par_le_schema(tmp_path):
+    """Un fichier dont une ligne enfreint le schéma de la table cible part en erreur, sans chargement."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'cible.db'}")
+    pd.DataFrame({"id": [1]}).to_sql("indice", engine, index=False)
+    pd.DataFrame({"id": [10, 11]}).to_sql("titre", engine, index=False)
+    service = IngestionService(str(tmp_path / "depot"), [{"pattern": "indice_*.csv", "table": "composition_indice"}], engine)
+    entete = "date,id_indice,id_titre,quantite,prix,valeur_marchande,dividende\n"
+    _deposer(service, "indice_1.csv", entete + "2024-01-31,1,10,100,10.0,1000.0,0\n")
+    _deposer(service, "indice_2.csv", entete + "2024-01-31,1,99,100,10.0,1000.0,0\n2024-01-31,1,11,5,1.0,5.0,0\n")
+
+    assert service.process_file("indice_1.csv")["statut"] == STATUT_IMPORTE
+    result = service.process_file("indice_2.csv")
+    assert result["statut"] == STATUT_ERREUR
+    assert "id_titre" in result["detail"]
+    assert _fichiers(service.error_dir) == ["indice_2.csv"]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM composition_indice")).scalar() == 1
+    engine.dispose()
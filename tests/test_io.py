@@ -0,0 +1,115 @@
+"""
+Tests de la compression en flux et de l'archivage de utils/io.
+"""
+
+import gzip
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from utils import io as io_utils
+from utils.io import IOUtils, ParallelGzipWriter
+
+def _donnees(taille=300_000):
+    """Octets peu compressibles mais reproductibles."""
+    return bytes((i * 7919 + i // 251) % 256 for i in range(taille))
+
+@pytest.fixture
+def repertoire(tmp_path):
+    """Répertoire d'exports avec un sous-dossier et un fichier vide."""
+    racine = tmp_path / "exports"
+    (racine / "rapports").mkdir(parents=True)
+    (racine / "positions.csv").write_bytes(b"id;prix\n1;10.5\n" * 5000)
+    (racine / "rapports" / "rapport.pdf").write_bytes(_donnees())
+    (racine / "rapports" / "vide.txt").write_bytes(b"")
+    return racine
+
+def _contenu(racine):
+    return {
+        os.path.relpath(os.path.join(dossier, nom), racine.parent).replace(os.sep, "/"): open(os.path.join(dossier, nom), "rb").read()
+        for dossier, _, fichiers in os.walk(racine) for nom in fichiers
+    }
+
+def test_gzip_multi_membres(tmp_path):
+    """Chaque bloc devient un membre gzip ; le fichier se relit d'un seul tenant."""
+    donnees = _donnees()
+    chemin = tmp_path / "donnees.gz"
+    with open(chemin, "wb") as f:
+        writer = ParallelGzipWriter(f, workers=3, block_size=64 * 1024)
+        for debut in range(0, len(donnees), 10_000):
+            writer.write(donnees[debut:debut + 10_000])
+        writer.close()
+
+    brut = chemin.read_bytes()
+    # Un en-tête gzip par bloc de 64 Kio
+    assert brut.count(b"\x1f\x8b\x08") >= 5
+    assert gzip.decompress(brut) == donnees
+    with IOUtils.open_compressed(str(chemin), "rb") as f:
+        assert f.read() == donnees
+
+def test_compress_decompress_file(tmp_path):
+    """Aller-retour gzip et zstd, codec déduit de l'extension."""
+    source = tmp_path / "source.bin"
+    source.write_bytes(_donnees())
+    for extension in (".gz", ".zst"):
+        compresse = tmp_path / f"source.bin{extension}"
+        IOUtils.compress_file(str(source), str(compresse), workers=2)
+        IOUtils.decompress_file(str(compresse), str(tmp_path / "restaure.bin"))
+        assert (tmp_path / "restaure.bin").read_bytes() == source.read_bytes()
+    with pytest.raises(ValueError):
+        IOUtils.open_compressed(str(tmp_path / "x.bz2"), "wb", codec="bz2")
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_mode_texte(tmp_path, codec):
+    """Les modes texte encodent à l'écriture et décodent à la lecture."""
+    chemin = str(tmp_path / f"lignes{io_utils.CODEC_EXTENSIONS[codec]}")
+    lignes = [f"fonds_{i};prix_é_{i}\n" for i in range(20_000)]
+    with IOUtils.open_compressed(chemin, "w") as f:
+        assert isinstance(f, io.TextIOWrapper)
+        f.writelines(lignes)
+    with IOUtils.open_compressed(chemin, "r") as f:
+        assert f.readlines() == lignes
+    assert io_utils.codec_from_path(chemin) == codec
+
+@pytest.mark.parametrize("fmt, extension", [("zip", ".zip"), ("tar.gz", ".tar.gz"), ("tar.zst", ".tar.zst")])
+def test_archive_directory(tmp_path, repertoire, fmt, extension):
+    """Chaque format d'archive restitue l'arborescence et le contenu des fichiers."""
+    archive = IOUtils.archive_directory(str(repertoire), str(tmp_path / "sorties" / f"exports{extension}"), workers=2)
+    assert archive.endswith(extension)
+
+    extraction = tmp_path / "extraction"
+    if fmt == "zip":
+        with zipfile.ZipFile(archive) as zf:
+            assert zf.testzip() is None
+            assert {info.compress_type for info in zf.infolist()} == {zipfile.ZIP_DEFLATED}
+            zf.extractall(extraction)
+    elif fmt == "tar.gz":
+        with tarfile.open(archive, "r:gz") as tf:
+            tf.extractall(extraction)
+    else:
+        with IOUtils.open_compressed(archive, "rb") as f, tarfile.open(fileobj=f, mode="r|") as tf:
+            tf.extractall(extraction)
+    assert _contenu(extraction / "exports") == _contenu(repertoire)
+
+def test_archive_zip_ordre_et_gros_membres(tmp_path, repertoire, monkeypatch):
+    """Les membres compressés en parallèle et ceux écrits par zipfile gardent l'ordre du parcours."""
+    archive = str(tmp_path / "parallele.zip")
+    IOUtils.archive_directory(str(repertoire), archive, workers=1)
+    monkeypatch.setattr(io_utils, "ZIP_MEMBER_IN_MEMORY_MAX", 100_000)
+    sequentiel = str(tmp_path / "mixte.zip")
+    IOUtils.archive_directory(str(repertoire), sequentiel, level=9)
+
+    noms = ["exports/positions.csv", "exports/rapports/rapport.pdf", "exports/rapports/vide.txt"]
+    for chemin in (archive, sequentiel):
+        with zipfile.ZipFile(chemin) as zf:
+            assert zf.namelist() == noms
+            assert zf.testzip() is None
+            assert zf.read("exports/rapports/rapport.pdf") == _donnees()
+            assert zf.getinfo("exports/positions.csv").compress_size < zf.getinfo("exports/positions.csv").file_size
+
+def test_archive_format_inconnu(tmp_path, repertoire):
+    with pytest.raises(ValueError):
+        IOUtils.archive_directory(str(repertoire), str(tmp_path / "exports.rar"), fmt="rar")
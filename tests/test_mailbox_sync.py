@@ -0,0 +1,186 @@
+"""
+Tests de la synchronisation de boîte aux lettres, avec un serveur Graph simulé en local.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from utils.mailbox_sync import MailboxSync
+
+NB_MESSAGES = 45
+
+def _message(i):
+    return {
+        "id": f"m{i}",
+        "subject": f"Rapport {i}",
+        "from": {"emailAddress": {"address": "contact@example.com"}},
+        "receivedDateTime": f"2024-01-{i % 28 + 1:02d}T08:00:00Z",
+        "hasAttachments": i % 2 == 0,
+        "importance": "normal",
+        "isRead": False,
+        "categories": [],
+        "bodyPreview": f"Aperçu {i}",
+    }
+
+# Jetons acceptés par le serveur simulé : délégué (utilisateur connecté) ou application
+JETON_DELEGUE = "jeton"
+JETON_APPLICATION = "jeton-app"
+
+class GraphStandIn(BaseHTTPRequestHandler):
+    """
+    Sous-ensemble de l'API Graph : delta, liste paginée, corps et pièces jointes.
+
+    Comme Graph, /me est refusé avec un jeton application : la boîte doit être
+    désignée par /users/{adresse}.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with server.lock:
+            server.requests.append((url.path, params))
+        jeton = self.headers.get("Authorization", "").replace("Bearer ", "")
+        if jeton not in (JETON_DELEGUE, JETON_APPLICATION):
+            self.send_response(401)
+            self.end_headers()
+            return
+        base = f"http://{server.server_address[0]}:{server.server_address[1]}"
+        parties = url.path.strip("/").split("/")
+        if parties[0] == "me":
+            if jeton == JETON_APPLICATION:
+                self.send_response(400)
+                self.end_headers()
+                return
+            boite = "/me"
+        elif parties[0] == "users" and len(parties) > 1:
+            boite = f"/users/{parties[1]}"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        chemin = url.path[len(boite):]
+        parties = chemin.strip("/").split("/")
+
+        if chemin == "/mailFolders/inbox/messages/delta":
+            if params.get("$deltatoken") == "v1":
+                # Un message ajouté et un message supprimé depuis la synchronisation initiale
+                return self._json({
+                    "value": [_message(NB_MESSAGES), {"id": "m0", "@removed": {"reason": "deleted"}}],
+                    "@odata.deltaLink": f"{base}{url.path}?$deltatoken=v2",
+                })
+            taille = int(self.headers["Prefer"].split("=")[1])
+            debut = int(params.get("$skiptoken", 0))
+            page = {"value": [_message(i) for i in range(debut, min(debut + taille, NB_MESSAGES))]}
+            if debut + taille < NB_MESSAGES:
+                page["@odata.nextLink"] = f"{base}{url.path}?$skiptoken={debut + taille}"
+            else:
+                page["@odata.deltaLink"] = f"{base}{url.path}?$deltatoken=v1"
+            return self._json(page)
+
+        if chemin == "/mailFolders/inbox/messages":
+            debut, taille = int(params.get("$skip", 0)), int(params["$top"])
+            page = {"value": [_message(i) for i in range(debut, min(debut + taille, NB_MESSAGES))]}
+            if params.get("$count") == "true":
+                page["@odata.count"] = NB_MESSAGES
+            return self._json(page)
+
+        if parties[0] == "messages" and len(parties) == 2:
+            return self._json({"id": parties[1], "body": {"content": f"Corps de {parties[1]}"}})
+        if parties[0] == "messages" and parties[2:] == ["attachments"]:
+            return self._json({"value": [{"id": "a1", "name": f"{parties[1]}.csv", "size": 4, "contentType": "text/csv"}]})
+        if parties[0] == "messages" and parties[2] == "attachments" and parties[-1] == "$value":
+            contenu = f"pj {parties[1]}".encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(contenu)))
+            self.end_headers()
+            self.wfile.write(contenu)
+            return
+        self.send_response(404)
+        self.end_headers()
+
+@pytest.fixture
+def graph_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GraphStandIn)
+    server.lock = threading.Lock()
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _synchro(server, tmp_path, jeton=JETON_DELEGUE, **kwargs):
+    return MailboxSync(
+        lambda: jeton,
+        base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        etat_path=str(tmp_path / "delta.db"),
+        **kwargs
+    )
+
+def test_synchronisation_delta_incrementale(graph_server, tmp_path):
+    """Le lien delta est conservé : la synchronisation suivante ne retourne que les changements."""
+    resultat = _synchro(graph_server, tmp_path, page_size=20).synchroniser("Inbox")
+    assert resultat["complet"]
+    assert [m.id for m in resultat["messages"]] == [f"m{i}" for i in range(NB_MESSAGES)]
+    # Les corps ne sont pas téléchargés pendant la synchronisation
+    assert all(path.endswith("/delta") for path, _ in graph_server.requests)
+    assert len(graph_server.requests) == 3
+
+    # Nouvelle instance : l'état est relu depuis la base locale
+    resultat = _synchro(graph_server, tmp_path).synchroniser("Inbox")
+    assert not resultat["complet"]
+    assert [m.id for m in resultat["messages"]] == [f"m{NB_MESSAGES}"]
+    assert resultat["supprimes"] == ["m0"]
+    assert graph_server.requests[-1][1] == {"$deltatoken": "v1"}
+
+def test_recherche_pages_paralleles_et_chargement_differe(graph_server, tmp_path):
+    """Les pages sont demandées par $skip avec le filtre serveur ; corps et pièces jointes à la demande."""
+    synchro = _synchro(graph_server, tmp_path, page_size=10, max_workers=3)
+    messages = synchro.rechercher("Inbox", expediteur="contact@example.com", non_lus=True)
+
+    assert [m.id for m in messages] == [f"m{i}" for i in range(NB_MESSAGES)]
+    listes = [params for path, params in graph_server.requests if path.endswith("/messages")]
+    assert sorted(int(p.get("$skip", 0)) for p in listes) == [0, 10, 20, 30, 40]
+    assert all(
+        p["$filter"] == "from/emailAddress/address eq 'contact@example.com' and isRead eq false" for p in listes
+    )
+    assert len(graph_server.requests) == len(listes)
+
+    synchro.charger(messages[:4])
+    assert messages[1].corps == "Corps de m1"
+    assert messages[0].pieces_jointes[0]["name"] == "m0.csv"
+    assert messages[1].pieces_jointes == []
+    # 4 corps et 2 listes de pièces jointes (messages pairs), une seule fois chacun
+    assert len(graph_server.requests) == len(listes) + 6
+
+    chemins = messages[2].telecharger_pieces_jointes(str(tmp_path / "pj"))
+    with open(chemins[0], "rb") as f:
+        assert f.read() == b"pj m2"
+
+def test_jeton_application_exige_une_adresse_de_boite(graph_server, tmp_path):
+    """Avec un jeton application, /me est refusé ; la boîte désignée par son adresse est lue."""
+    with pytest.raises(requests.HTTPError):
+        _synchro(graph_server, tmp_path, jeton=JETON_APPLICATION).synchroniser("Inbox")
+
+    synchro = _synchro(graph_server, tmp_path, jeton=JETON_APPLICATION, utilisateur="fonds@example.com")
+    resultat = synchro.synchroniser("Inbox")
+    assert len(resultat["messages"]) == NB_MESSAGES
+    assert resultat["messages"][3].corps == "Corps de m3"
+    assert graph_server.requests[-1][0] == "/users/fonds@example.com/messages/m3"
@@ -0,0 +1,59 @@
+"""
+Tests des calculs out-of-core de analysis/out_of_core, comparés aux fonctions en mémoire.
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from analysis import data_analyzer, out_of_core
+
+@pytest.fixture
+def positions():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    return pd.DataFrame({
+        "Fund": rng.choice(["F1", "F2", "F3"], n),
+        "Manager": rng.choice(["M1", "M2"], n),
+        "Country": rng.choice(["FR", "DE", "US"], n),
+        "Asset Type": rng.choice(["Equity", "Bond", "Cash"], n),
+        "Market Value": rng.uniform(1, 1000, n),
+    })
+
+@pytest.fixture
+def chunks(positions, tmp_path):
+    path = str(tmp_path / "positions.parquet")
+    pq.write_table(pa.Table.from_pandas(positions), path, row_group_size=250)
+    return out_of_core.parquet_chunks(path)
+
+@pytest.mark.parametrize("max_workers", [None, 2])
+def test_resultats_identiques_en_memoire(positions, chunks, max_workers):
+    assert len(chunks) == 8
+    resultat = out_of_core.calculate_market_value_by_fund_country_asset_type(chunks, max_workers)
+    attendu = data_analyzer.calculate_market_value_by_fund_country_asset_type(positions.copy())
+    pd.testing.assert_frame_equal(resultat.reset_index(drop=True), attendu.reset_index(drop=True))
+
+    resultat = out_of_core.calculate_weight_by_asset_type_and_manager(chunks, max_workers)
+    attendu = data_analyzer.calculate_weight_by_asset_type_and_manager(positions.copy())
+    np.testing.assert_allclose(resultat["Weight by Asset Type and Manager"], attendu["Weight by Asset Type and Manager"])
+
+    frames = out_of_core.calculate_weight_by_fund(chunks, max_workers, collect=False)
+    poids = pd.concat(list(frames), ignore_index=True)["Weight by Fund"]
+    np.testing.assert_allclose(poids, data_analyzer.calculate_weight_by_fund(positions.copy())["Weight by Fund"])
+
+def test_map_chunks_fenetre_bornee(chunks):
+    """Le pool ne reçoit pas plus de chunks que la fenêtre avant la consommation des résultats."""
+    tires = []
+
+    def source():
+        for chunk in chunks:
+            tires.append(chunk)
+            yield chunk
+
+    resultats = out_of_core.map_chunks(len, source(), max_workers=2)
+    assert next(resultats) == 250
+    assert len(tires) == out_of_core.IN_FLIGHT_PER_WORKER * 2
+    assert sum(resultats) == 2_000 - 250
+    assert len(tires) == len(chunks)
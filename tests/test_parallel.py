@@ -0,0 +1,39 @@
+"""
+Tests de l'analyse parallèle par fonds de analysis/parallel.
+"""
+
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from analysis import data_analyzer
+from analysis.parallel import partition_by_fund, run_parallel_analysis
+
+def _positions():
+    return pd.DataFrame({
+        "Fund": ["F1", "F2", np.nan, "F1", "F3", np.nan],
+        "Asset Type": ["Equity", "Bond", "Cash", "Bond", "Equity", "Equity"],
+        "Market Value": [100.0, 50.0, 10.0, 300.0, 20.0, 30.0],
+    })
+
+def test_partitions_conservent_les_lignes_sans_fonds():
+    partitions = partition_by_fund(_positions(), funds_per_chunk=2)
+    assert sum(len(p) for p in partitions) == 6
+    assert sorted(p["Fund"].isna().sum() for p in partitions) == [0, 2]
+
+def test_noms_des_resultats_et_lignes_sans_fonds():
+    premiere_ligne = partial(pd.DataFrame.head, n=1)
+    results = run_parallel_analysis(
+        _positions(), [data_analyzer.calculate_market_value_by_asset_type, premiere_ligne], max_workers=2
+    )
+    assert set(results) == {"calculate_market_value_by_asset_type", repr(premiere_ligne)}
+    # Le groupe sans fonds est analysé comme les autres
+    assert len(results[repr(premiere_ligne)]) == 4
+    assert results[repr(premiere_ligne)]["Market Value"].sum() == 100.0 + 50.0 + 10.0 + 20.0
+
+    nommes = run_parallel_analysis(_positions(), {"premiere_ligne": premiere_ligne}, max_workers=2)
+    pd.testing.assert_frame_equal(
+        nommes["premiere_ligne"].sort_values("Market Value", ignore_index=True),
+        results[repr(premiere_ligne)].sort_values("Market Value", ignore_index=True),
+    )
@@ -0,0 +1,81 @@
+"""
+Tests du cache de parsing Parquet de utils/parse_cache.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from utils.parse_cache import ParseCache
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(str(tmp_path / "cache"), min_source_size=0)
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "positions.csv"
+    path.write_text("id,prix\n1,10.5\n2,11.0\n", encoding="utf-8")
+    return str(path)
+
+class CountingParser:
+    def __init__(self, path, **options):
+        self.path, self.options, self.calls = path, options, 0
+
+    def __call__(self):
+        self.calls += 1
+        return pd.read_csv(self.path, **self.options)
+
+def _entries(cache):
+    return sorted(name for name in os.listdir(cache.cache_dir) if name.endswith(".parquet"))
+
+def test_cle_depend_du_fichier_et_des_options(cache, source):
+    key = cache.key(source, "csv", {"sep": ",", "encoding": "utf-8"})
+    assert key == cache.key(source, "csv", {"encoding": "utf-8", "sep": ","})
+    assert key != cache.key(source, "csv", {"sep": ";", "encoding": "utf-8"})
+    assert key != cache.key(source, "excel", {"sep": ",", "encoding": "utf-8"})
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert key != cache.key(source, "csv", {"sep": ",", "encoding": "utf-8"})
+
+def test_lecture_servie_par_le_cache_puis_invalidee(cache, source):
+    parse = CountingParser(source)
+    first = cache.read(source, "csv", parse)
+    pd.testing.assert_frame_equal(cache.read(source, "csv", parse), first)
+    assert parse.calls == 1
+
+    # Même taille, date de modification différente
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    cache.read(source, "csv", parse)
+    assert parse.calls == 2
+
+    # Taille différente
+    with open(source, "a", encoding="utf-8") as f:
+        f.write("3,12.0\n")
+    assert len(cache.read(source, "csv", parse)) == 3
+    assert parse.calls == 3
+    assert len(_entries(cache)) == 3
+
+def test_options_non_cachables(cache, source):
+    parse = CountingParser(source, nrows=1)
+    cache.read(source, "csv", parse, nrows=1)
+    cache.read(source, "csv", parse, nrows=1)
+    assert parse.calls == 2
+    assert _entries(cache) == []
+
+def test_quota_evince_les_entrees_les_moins_recemment_utilisees(cache):
+    df = pd.DataFrame({"valeur": range(1000)})
+    cache.put("a", df)
+    taille = os.path.getsize(os.path.join(cache.cache_dir, "a.parquet"))
+    cache.max_bytes = 2 * taille
+    cache.put("b", df)
+    # Dates d'accès explicites : a puis b, puis a relu
+    for i, key in enumerate(("a", "b")):
+        os.utime(os.path.join(cache.cache_dir, f"{key}.parquet"), (1_000_000 + i, 1_000_000 + i))
+    assert cache.get("a") is not None
+
+    cache.put("c", df)
+    assert _entries(cache) == ["a.parquet", "c.parquet"]
@@ -0,0 +1,56 @@
+"""
+Tests de l'export PDF des grands DataFrames.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("fitz")
+
+import PyPDF2
+from reportlab.platypus import SimpleDocTemplate, Spacer
+
+from utils.pdf import PDFWriter, _FluxFlowables
+
+def test_grand_dataframe_une_page_par_tableau(tmp_path):
+    """Le premier tableau tient sous le titre ; chaque page porte un seul en-tête."""
+    df = pd.DataFrame({"id": range(5000), "valeur": np.arange(5000) * 1.5, "code": [f"F{i % 7}" for i in range(5000)]})
+    writer = PDFWriter()
+    tailles = []
+    tableaux_pagines = writer.tableaux_pagines
+
+    def tableaux_observes(*args, **kwargs):
+        for table in tableaux_pagines(*args, **kwargs):
+            tailles.append(len(table._cellvalues) - 1)
+            yield table
+
+    writer.tableaux_pagines = tableaux_observes
+    chemin = str(tmp_path / "grand.pdf")
+    writer.exporter_grand_dataframe(df, chemin, titre="Positions", description="Description du rapport " * 10)
+
+    pages = PyPDF2.PdfReader(chemin).pages
+    assert sum(tailles) == 5000
+    assert len(pages) == len(tailles)
+    assert tailles[0] < tailles[1]
+    assert set(tailles[1:-1]) == {writer.lignes_par_page()}
+    assert [page.extract_text().count("valeur") for page in pages] == [1] * len(pages)
+
+def test_flux_flowables_materialise_peu_d_elements(tmp_path):
+    """build() ne consomme la source qu'au fur et à mesure."""
+    avance = []
+
+    class Document(SimpleDocTemplate):
+        traites = 0
+
+        def afterFlowable(self, flowable):
+            Document.traites += 1
+
+    def source():
+        for i in range(200):
+            avance.append(i + 1 - Document.traites)
+            yield Spacer(1, 50)
+
+    Document(str(tmp_path / "flux.pdf")).build(_FluxFlowables(source(), tampon=2))
+    assert len(avance) == 200
+    assert max(avance) <= 3
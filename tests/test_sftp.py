@@ -0,0 +1,195 @@
+"""
+Tests des téléchargements SFTP en lot, avec un serveur simulé sur le disque local.
+"""
+
+import os
+import threading
+
+import paramiko
+import pytest
+
+from STFP.sftp import SFTPClient
+
+class LocalSFTPStandIn:
+    """Canal SFTP simulé servant les fichiers d'un répertoire local."""
+
+    def __init__(self, root, opened):
+        self.root = root
+        self.closed = False
+        opened.append(self)
+
+    def stat(self, path):
+        return os.stat(os.path.join(self.root, path))
+
+    def open(self, path, mode="rb"):
+        return open(os.path.join(self.root, path), mode)
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def remote_dir(tmp_path):
+    """Répertoire 'distant' contenant quelques fichiers de tailles variées."""
+    root = tmp_path / "remote"
+    root.mkdir()
+    for i in range(6):
+        (root / f"positions_{i}.csv").write_bytes(os.urandom(1024 * (i + 1) * 300))
+    return root
+
+def test_download_files_pool(remote_dir, tmp_path):
+    """Tous les fichiers sont téléchargés à l'identique avec au plus max_channels canaux."""
+    opened = []
+    lock = threading.Lock()
+
+    def factory():
+        with lock:
+            return LocalSFTPStandIn(str(remote_dir), opened)
+
+    client = SFTPClient(config={"host": "localhost", "port": 22, "username": "", "password": ""})
+    files = sorted(os.listdir(remote_dir))
+    local_dir = tmp_path / "local"
+    results = client.download_files(files, local_dir=str(local_dir), max_channels=3, channel_factory=factory)
+
+    assert [r["remote_path"] for r in results] == files
+    assert all(r["statut"] == "ok" for r in results)
+    for name in files:
+        assert (local_dir / name).read_bytes() == (remote_dir / name).read_bytes()
+    assert 1 <= len(opened) <= 3
+    assert all(channel.closed for channel in opened)
+    assert all(r["debit_mo_s"] >= 0 for r in results)
+
+def test_download_files_erreur(remote_dir, tmp_path):
+    """Un fichier absent est signalé sans interrompre les autres téléchargements."""
+    opened = []
+    client = SFTPClient(config={"host": "localhost", "port": 22, "username": "", "password": ""})
+    results = client.download_files(
+        [("absent.csv", str(tmp_path / "absent.csv")), ("positions_0.csv", str(tmp_path / "p0.csv"))],
+        channel_factory=lambda: LocalSFTPStandIn(str(remote_dir), opened)
+    )
+    assert [r["statut"] for r in results] == ["erreur", "ok"]
+    assert (tmp_path / "p0.csv").exists()
+
+class LocalSFTPListing(LocalSFTPStandIn):
+    """Canal simulé permettant aussi de lister le répertoire avec les attributs."""
+
+    def listdir_attr(self, path):
+        entries = []
+        for name in sorted(os.listdir(os.path.join(self.root, path))):
+            attr = paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(self.root, path, name)), name)
+            entries.append(attr)
+        return entries
+
+def test_sync_directory_manifest(remote_dir, tmp_path):
+    """Une seconde synchronisation ne télécharge que les fichiers modifiés ou nouveaux."""
+    client = SFTPClient(config={"host": "localhost", "port": 22, "username": "", "password": ""})
+    factory = lambda: LocalSFTPListing(str(remote_dir), [])
+    local_dir = str(tmp_path / "local")
+
+    premier = client.sync_directory(".", local_dir, channel_factory=factory, verify_hash=True)
+    assert len(premier["telecharges"]) == 6 and not premier["ignores"]
+
+    (remote_dir / "positions_1.csv").write_bytes(b"nouveau contenu")
+    (remote_dir / "positions_9.csv").write_bytes(b"nouveau fichier")
+    # Fichier touché sans changement de contenu
+    touche = remote_dir / "positions_2.csv"
+    os.utime(touche, (touche.stat().st_atime, touche.stat().st_mtime + 10))
+
+    second = client.sync_directory(".", local_dir, channel_factory=factory, verify_hash=True)
+    assert sorted(f["name"] for f in second["telecharges"]) == ["positions_1.csv", "positions_9.csv"]
+    assert [f["name"] for f in second["inchanges"]] == ["positions_2.csv"]
+    assert len(second["ignores"]) == 4
+    actions = {entry["action"] for entry in second["manifest"].run_log(second["run_id"])}
+    assert actions == {"ignore", "telecharge", "inchange"}
+
+def test_download_files_echec_ouverture_canal(remote_dir, tmp_path):
+    """Un canal impossible à ouvrir donne une erreur par fichier, sans interrompre le lot."""
+    opened = []
+    lock = threading.Lock()
+    tentatives = []
+
+    def factory():
+        with lock:
+            tentatives.append(1)
+            if len(tentatives) == 1:
+                raise paramiko.AuthenticationException("authentification refusée")
+            return LocalSFTPStandIn(str(remote_dir), opened)
+
+    client = SFTPClient(config={"host": "localhost", "port": 22, "username": "", "password": ""})
+    files = sorted(os.listdir(remote_dir))
+    results = client.download_files(files, local_dir=str(tmp_path / "local"), max_channels=2, channel_factory=factory)
+
+    assert len(results) == len(files)
+    erreurs = [r for r in results if r["statut"] == "erreur"]
+    assert len(erreurs) == 1 and "authentification" in erreurs[0]["erreur"]
+    assert all(channel.closed for channel in opened)
+
+def test_sync_directory_commit_differe(remote_dir, tmp_path):
+    """Sans commit_manifest, seuls les fichiers enregistrés par l'appelant sont considérés comme traités."""
+    client = SFTPClient(config={"host": "localhost", "port": 22, "username": "", "password": ""})
+    factory = lambda: LocalSFTPListing(str(remote_dir), [])
+    local_dir = str(tmp_path / "local")
+
+    premier = client.sync_directory(".", local_dir, channel_factory=factory, commit_manifest=False)
+    # Import réussi pour le premier fichier seulement
+    importe = sorted(premier["telecharges"], key=lambda f: f["name"])[0]
+    premier["manifest"].commit(importe)
+
+    second = client.sync_directory(".", local_dir, channel_factory=factory, commit_manifest=False)
+    assert [f["name"] for f in second["ignores"]] == [importe["name"]]
+    assert len(second["telecharges"]) == 5
+
+class FlakyFile:
+    """Fichier distant simulé dont la lecture échoue après un nombre d'octets donné."""
+
+    def __init__(self, f, fail_after):
+        self.f = f
+        self.remaining = fail_after
+
+    def seek(self, offset):
+        self.f.seek(offset)
+
+    def read(self, size):
+        if self.remaining is not None and self.remaining <= 0:
+            raise EOFError("connexion interrompue")
+        data = self.f.read(size if self.remaining is None else min(size, self.remaining))
+        if self.remaining is not None:
+            self.remaining -= len(data)
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.f.close()
+
+class FlakyStandIn(LocalSFTPStandIn):
+    """Canal simulé dont les premières connexions sont coupées en cours de transfert."""
+
+    def __init__(self, root, opened, fail_after):
+        super().__init__(root, opened)
+        self.fail_after = fail_after
+
+    def open(self, path, mode="rb"):
+        return FlakyFile(open(os.path.join(self.root, path), mode), self.fail_after)
+
+def test_download_file_resumable(remote_dir, tmp_path):
+    """Un transfert interrompu reprend à l'octet atteint et le fichier n'apparaît qu'une fois vérifié."""
+    import hashlib
+    opened = []
+    coupures = iter([200_000, 300_000])
+
+    def factory():
+        return FlakyStandIn(str(remote_dir), opened, next(coupures, None))
+
+    client = SFTPClient(config={"host": "localhost", "port": 22, "username": "", "password": ""})
+    source = remote_dir / "positions_5.csv"
+    local_path = str(tmp_path / "positions_5.csv")
+    result = client.download_file_resumable(
+        "positions_5.csv", local_path,
+        expected_sha256=hashlib.sha256(source.read_bytes()).hexdigest(),
+        backoff=0, channel_factory=factory
+    )
+    assert result["tentatives"] == 3
+    assert result["octets_repris"] == 500_000
+    assert (tmp_path / "positions_5.csv").read_bytes() == source.read_bytes()
+    assert not os.path.exists(local_path + ".part")
@@ -0,0 +1,135 @@
+"""
+Tests du moteur de séries temporelles de analysis/time_series.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from analysis.time_series import PriceHistory, TimeSeriesEngine
+from utils.data import DataUtils
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'historique.db'}")
+    pd.DataFrame({"id": [1, 2], "code": ["F1", "F2"]}).to_sql("fonds", engine, index=False)
+    pd.DataFrame({"id": [1], "code": ["T1"]}).to_sql("titre", engine, index=False)
+    pd.DataFrame({
+        "date": ["2024-01-01", "2024-01-01", "2024-01-02", "2024-01-02"],
+        "id_fonds": [1, 2, 1, 2],
+        "id_titre": [1, 1, 1, 1],
+        "prix": [100.0, 200.0, 110.0, 180.0],
+        "valeur_marchande": [1.0, 1.0, 1.0, 1.0],
+    }).to_sql("composition_fonds", engine, index=False)
+    yield engine
+    engine.dispose()
+
+def test_variations_par_fonds_et_titre(engine):
+    """Un même titre détenu par deux fonds à des prix différents garde une série par fonds."""
+    history, prices = TimeSeriesEngine(engine, "composition_fonds").get()
+    variations = pd.Series(prices.position_returns(), index=[history["date"], history["code_fonds"]])
+    assert np.isnan(variations[("2024-01-01", "F1")])
+    assert variations[("2024-01-02", "F1")] == pytest.approx(0.10)
+    assert variations[("2024-01-02", "F2")] == pytest.approx(-0.10)
+    assert list(prices.positions) == [("F1", "T1"), ("F2", "T1")]
+
+def test_historique_compact(engine):
+    """L'historique est chargé avec des codes catégoriels, sans changer les séries."""
+    history, prices = TimeSeriesEngine(engine, "composition_fonds").get()
+    brut, prices_brut = TimeSeriesEngine(engine, "composition_fonds", compact=False).get()
+    assert history["code_fonds"].dtype == "category"
+    assert history["date"].dtype == "datetime64[ns]"
+    assert brut["code_fonds"].dtype == object
+    np.testing.assert_array_equal(prices.prices, prices_brut.prices)
+    assert list(prices.positions) == list(prices_brut.positions)
+    pd.testing.assert_frame_equal(prices.fund_returns(), prices_brut.fund_returns(), check_column_type=False, check_categorical=False)
+
+def test_cache_recharge_apres_import(engine):
+    """Le cache est réutilisé sans requête tant que la table n'est pas écrite, puis rechargé après un import."""
+    series = TimeSeriesEngine(engine, "composition_fonds")
+    premier = series.get()
+    assert series.get()[1] is premier[1]
+
+    nouvelle_ligne = pd.DataFrame({
+        "date": ["2024-01-03"], "id_fonds": [1], "id_titre": [1], "prix": [121.0], "valeur_marchande": [1.0]
+    })
+    DataUtils.load_dataframe_to_sql(nouvelle_ligne, "composition_fonds", engine, if_exists="append")
+    history, prices = series.get()
+    assert prices is not premier[1]
+    assert len(history) == 5
+    assert prices.position_returns()[-1] == pytest.approx(0.10)
+
+    # Une écriture faite hors de DataUtils (autre processus) demande clear_cache()
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE composition_fonds SET prix = 132.0 WHERE date = '2024-01-03'"))
+    assert series.get()[1] is prices
+    series.clear_cache()
+    assert series.get()[1].position_returns()[-1] == pytest.approx(0.20)
+
+def test_dernier_jour_inclus_sur_colonne_datetime(tmp_path):
+    """La borne de fin couvre toute la journée quand les dates sont stockées en DATETIME."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'datetime.db'}")
+    pd.DataFrame({"id": [1], "code": ["F1"]}).to_sql("fonds", engine, index=False)
+    pd.DataFrame({"id": [1], "code": ["T1"]}).to_sql("titre", engine, index=False)
+    pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]),
+        "id_fonds": [1, 1, 1], "id_titre": [1, 1, 1],
+        "prix": [100.0, 110.0, 99.0], "valeur_marchande": [1.0, 1.0, 1.0],
+    }).to_sql("composition_fonds", engine, index=False)
+    history = TimeSeriesEngine(engine, "composition_fonds").load_history("2024-01-02", "2024-01-02")
+    assert pd.to_datetime(history["date"]).dt.strftime("%Y-%m-%d").tolist() == ["2024-01-02"]
+    engine.dispose()
+
+def _historique():
+    """Deux fonds : F1 détient T1 et T2, F2 détient T1 (prix propres à chaque fonds)."""
+    lignes = [
+        # date, fonds, titre, prix, valeur_marchande
+        ("2024-01-01", "F1", "T1", 100.0, 300.0),
+        ("2024-01-01", "F1", "T2", 50.0, 100.0),
+        ("2024-01-01", "F2", "T1", 10.0, 10.0),
+        ("2024-01-02", "F1", "T1", 110.0, 330.0),
+        ("2024-01-02", "F1", "T2", 45.0, 90.0),
+        ("2024-01-02", "F2", "T1", 9.0, 9.0),
+        ("2024-01-03", "F1", "T1", 99.0, 297.0),
+        ("2024-01-03", "F2", "T1", 9.9, 9.9),
+        ("2024-01-04", "F1", "T1", 121.0, 363.0),
+        ("2024-01-04", "F1", "T2", 54.0, 108.0),
+        ("2024-01-04", "F2", "T1", 9.0, 9.0),
+    ]
+    return pd.DataFrame(lignes, columns=["date", "code_fonds", "code_titre", "prix", "valeur_marchande"])
+
+def test_volatilite_glissante_comme_pandas():
+    prices = PriceHistory(_historique())
+    returns = prices.to_frame(prices.returns())
+    attendu = returns.rolling(3, min_periods=2).std()
+    pd.testing.assert_frame_equal(prices.to_frame(prices.rolling_volatility(window=3)), attendu)
+
+def test_drawdowns():
+    prices = PriceHistory(_historique())
+    drawdowns = prices.to_frame(prices.drawdowns())
+    assert drawdowns[("F1", "T1")].tolist() == pytest.approx([0.0, 0.0, -0.1, 0.0])
+    # T2 absent le 3 janvier : le dernier prix connu est conservé
+    assert drawdowns[("F1", "T2")].tolist() == pytest.approx([0.0, -0.1, -0.1, 0.0])
+
+def test_rendements_des_fonds_ponderes_par_valeur_marchande():
+    history = _historique()
+    fund_returns = PriceHistory(history).fund_returns()
+    assert list(fund_returns.columns) == ["F1", "F2"]
+    assert fund_returns.iloc[0].isna().all()
+    # 2 janvier : (300 * 10 % + 100 * -10 %) / 400
+    assert fund_returns.loc["2024-01-02", "F1"] == pytest.approx(0.05)
+    # 3 janvier : T2 sans prix, seul T1 compte
+    assert fund_returns.loc["2024-01-03", "F1"] == pytest.approx(-0.10)
+    # 4 janvier : T2 comparé à son dernier prix (45), pondéré par sa valeur au 3 janvier (0)
+    assert fund_returns.loc["2024-01-04", "F1"] == pytest.approx(121 / 99 - 1)
+    assert fund_returns["F2"].iloc[1:].tolist() == pytest.approx([-0.10, 0.10, 9.0 / 9.9 - 1])
+
+    with pytest.raises(ValueError):
+        PriceHistory(history.drop(columns="valeur_marchande")).fund_returns()
+
+def test_historique_vide():
+    prices = PriceHistory(pd.DataFrame(columns=["date", "code_fonds", "code_titre", "prix", "valeur_marchande"]))
+    assert prices.position_returns().size == 0
+    assert prices.rolling_volatility().size == 0
+    assert prices.fund_returns().empty
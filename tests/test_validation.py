@@ -0,0 +1,64 @@
+"""
+Tests de la validation par colonnes de utils/validation.
+"""
+
+import pandas as pd
+
+from schemas.CompositionIndice import CompositionIndice
+from utils.csv import CSVUtils
+from utils.validation import REGLE_CLE, REGLE_NULL, REGLE_PLAGE, REGLE_TYPE, SchemaValidator
+
+def _composition():
+    return pd.DataFrame({
+        "date": ["2024-01-31", "2024-01-31", "pas une date", "2024-01-31"],
+        "id_indice": [1, 1, 1, 2],
+        "id_titre": [10, 11, 10, 99],
+        "quantite": [100, 50.5, None, 10],
+        "prix": [10.0, -1.0, 12.0, "abc"],
+        "valeur_marchande": [1000.0, 50.0, 0.0, 10.0],
+        "dividende": [0.0, 0.0, 0.0, 0.0],
+    })
+
+def test_validate_rapport_par_ligne():
+    """Chaque règle enfreinte produit une erreur sur la bonne ligne, sans instancier le modèle."""
+    validator = SchemaValidator(
+        CompositionIndice,
+        ranges={"prix": (0, None)},
+        foreign_keys={"id_indice": [1, 2], "id_titre": [10, 11]}
+    )
+    report = validator.validate(_composition(), row_offset=100)
+
+    erreurs = set(zip(report.errors["ligne"], report.errors["colonne"], report.errors["regle"]))
+    assert erreurs == {
+        (101, "prix", REGLE_PLAGE),
+        (102, "date", REGLE_TYPE),
+        (102, "quantite", REGLE_NULL),
+        (103, "id_titre", REGLE_CLE),
+        (103, "prix", REGLE_TYPE),
+    }
+    assert report.valid.tolist() == [True, False, False, False]
+
+def test_validate_csv_en_tete_et_chunks(tmp_path):
+    """Le contrôle des colonnes ne lit que l'en-tête ; le contenu est validé par chunks."""
+    chemin = tmp_path / "composition.csv"
+    _composition().to_csv(chemin, index=False)
+    validator = SchemaValidator(CompositionIndice, ranges={"prix": (0, None)})
+
+    assert CSVUtils.validate_csv(chemin, validator.required_columns)
+    assert not CSVUtils.validate_csv(chemin, validator.required_columns + ["accrued"])
+
+    report = validator.validate_csv(chemin, chunksize=2)
+    assert report.nb_lignes == 4
+    assert report.nb_rejets == 3
+    assert sorted(report.errors["ligne"].unique()) == [1, 2, 3]
+
+def test_as_transform_strict_rejette_le_chunk():
+    """En mode strict, un chunk contenant une ligne invalide est rejeté au lieu d'être filtré."""
+    import pytest
+
+    validator = SchemaValidator(CompositionIndice, ranges={"prix": (0, None)})
+    reports = []
+    assert len(validator.as_transform(reports)(_composition())) == 1
+    with pytest.raises(ValueError, match="3 lignes invalides"):
+        validator.as_transform(reports, strict=True)(_composition())
+    assert len(reports) == 2
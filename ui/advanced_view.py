@@ -10,6 +10,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from database.connexionsqlLiter import SQLiteConnection
+from logic.fx import convert_to_base_currency
 from sqlalchemy import text
 import os
 from pathlib import Path
@@ -19,8 +20,17 @@ DEFAULT_DB_FILES = ["ma_base.db", "database.db"]
 class AdvancedWindow:
     """Fenêtre avec fonctionnalités avancées."""
     
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, devise_base=None, pivot=None):
+        """
+        Args:
+            db_path: Chemin de la base SQLite (recherchée dans DEFAULT_DB_FILES par défaut).
+            devise_base: Devise de reporting (ex. 'EUR') ; sans elle, les valeurs
+                         marchandes sont affichées dans leur devise d'origine.
+            pivot: Devise pivot pour les paires sans taux direct (ex. 'USD').
+        """
         self.db_path = self.find_db_path(db_path)
+        self.devise_base = devise_base
+        self.pivot = pivot
         self.root = ThemedTk(theme="arc")
         self.root.title("Analyse Avancée des Données")
         self.root.geometry("1400x900")
@@ -116,7 +126,9 @@ class AdvancedWindow:
                         s.nom as secteur,
                         cf.quantite,
                         cf.prix,
-                        cf.valeur_marchande
+                        cf.valeur_marchande,
+                        cf.date,
+                        cf.id_devise
                     FROM composition_fonds cf
                     JOIN titre t ON cf.id_titre = t.id
                     JOIN secteur s ON t.id_secteur = s.id
@@ -134,6 +146,8 @@ class AdvancedWindow:
                         return
                     messagebox.showwarning("Aucune donnée", "Aucune donnée trouvée dans la base.")
                     return
+                if self.devise_base:
+                    df = convert_to_base_currency(db.engine, df, self.devise_base, pivot=self.pivot)
                 fig = self.portfolio_canvas.figure
                 fig.clear()
                 ax = fig.add_subplot(111)
@@ -150,25 +164,30 @@ class AdvancedWindow:
         try:
             db = SQLiteConnection(f"sqlite:///{self.db_path}")
             with db.engine.connect() as conn:
+                # Sommes par date et par devise, converties avant d'être additionnées
                 query = text("""
                     SELECT 
                         cf.date,
-                        SUM(cf.valeur_marchande) as valeur_totale
+                        cf.id_devise,
+                        SUM(cf.valeur_marchande) as valeur_marchande
                     FROM composition_fonds cf
-                    GROUP BY cf.date
+                    GROUP BY cf.date, cf.id_devise
                     ORDER BY cf.date
                 """
                 )
                 df = pd.read_sql(query, conn)
                 if df.empty:
                     return
+                if self.devise_base:
+                    df = convert_to_base_currency(db.engine, df, self.devise_base, pivot=self.pivot)
+                df = df.groupby('date', sort=True)['valeur_marchande'].sum().rename('valeur_totale').reset_index()
                 fig = self.performance_canvas.figure
                 fig.clear()
                 ax = fig.add_subplot(111)
                 ax.plot(df['date'], df['valeur_totale'], marker='o')
                 ax.set_title('Évolution de la Valeur du Portefeuille')
                 ax.set_xlabel('Date')
-                ax.set_ylabel('Valeur Totale')
+                ax.set_ylabel(f"Valeur Totale ({self.devise_base})" if self.devise_base else 'Valeur Totale')
                 fig.autofmt_xdate()
                 self.performance_canvas.draw()
         except Exception as e:
@@ -185,7 +204,7 @@ class AdvancedWindow:
     
     def init_database_and_reload(self):
         if self.init_database():
-            self.__init__(self.db_path)
+            self.__init__(self.db_path, self.devise_base, self.pivot)
     
     def populate_database(self):
         try:
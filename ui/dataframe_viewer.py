@@ -2,10 +2,13 @@
 Module pour l'affichage des DataFrames avec une interface utilisateur.
 """
 
+import json
 import logging
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
-from typing import Optional, List, Dict, Any
-from fastapi import APIRouter, Request, HTTPException
+from typing import Optional, List, Dict, Any, Tuple
+from fastapi import APIRouter, Request, HTTPException, Query
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
@@ -18,6 +21,12 @@ templates = Jinja2Templates(directory="templates")
 # Création du router
 router = APIRouter()
 
+# Taille de page par défaut et maximale pour l'endpoint paginé
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# Nombre de masques de filtre conservés (les moins récemment utilisés sont évincés)
+MAX_FILTER_CACHE = 32
+
 class DataFrameViewer:
     """Classe pour l'affichage des DataFrames."""
     
@@ -26,6 +35,10 @@ class DataFrameViewer:
         self.current_df: Optional[pd.DataFrame] = None
         self.current_name: str = ""
         self.history: List[Dict[str, Any]] = []
+        # Caches invalidés à chaque appel de set_dataframe
+        self._summary_cache: Optional[Dict[str, Any]] = None
+        self._sort_cache: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._filter_cache: Dict[Tuple[str, Optional[str]], np.ndarray] = OrderedDict()
     
     def set_dataframe(self, df: pd.DataFrame, name: str) -> None:
         """
@@ -37,6 +50,9 @@ class DataFrameViewer:
         """
         self.current_df = df
         self.current_name = name
+        self._summary_cache = None
+        self._sort_cache = {}
+        self._filter_cache = OrderedDict()
         self.history.append({
             "name": name,
             "shape": df.shape,
@@ -60,16 +76,19 @@ class DataFrameViewer:
                 {"request": request}
             )
         
+        # Seule la première page est rendue côté serveur ; les suivantes
+        # sont servies par l'endpoint JSON /rows
         return templates.TemplateResponse(
             "dataframe.html",
             {
                 "request": request,
                 "df_name": self.current_name,
-                "df_html": self.current_df.to_html(
+                "df_html": self.current_df.head(DEFAULT_PAGE_SIZE).to_html(
                     classes=["table", "table-striped", "table-hover"],
                     index=True,
                     border=0
                 ),
+                "page_size": DEFAULT_PAGE_SIZE,
                 "shape": self.current_df.shape,
                 "columns": list(self.current_df.columns),
                 "dtypes": self.current_df.dtypes.to_dict(),
@@ -87,13 +106,129 @@ class DataFrameViewer:
         if self.current_df is None:
             return {}
         
+        # Le résumé n'est calculé qu'une fois par DataFrame chargé
+        if self._summary_cache is None:
+            self._summary_cache = {
+                "name": self.current_name,
+                "shape": self.current_df.shape,
+                "columns": list(self.current_df.columns),
+                "dtypes": self.current_df.dtypes.to_dict(),
+                "numeric_summary": self.current_df.describe().to_dict(),
+                "missing_values": self.current_df.isnull().sum().to_dict()
+            }
+        return self._summary_cache
+    
+    def _sorted_positions(self, column: str, ascending: bool) -> np.ndarray:
+        """
+        Retourne les positions des lignes triées, calculées une seule fois par colonne et sens.
+        
+        Args:
+            column (str): Colonne de tri
+            ascending (bool): Sens du tri
+        
+        Returns:
+            np.ndarray: Positions des lignes dans l'ordre trié
+        """
+        key = (column, ascending)
+        if key not in self._sort_cache:
+            self._sort_cache[key] = (
+                self.current_df[column]
+                .reset_index(drop=True)
+                .sort_values(ascending=ascending, kind="mergesort", na_position="last")
+                .index
+                .to_numpy()
+            )
+        return self._sort_cache[key]
+    
+    def _filter_mask(self, filtre: str, column: Optional[str]) -> np.ndarray:
+        """
+        Calcule le masque des lignes contenant le texte recherché (insensible à la casse).
+        
+        Args:
+            filtre (str): Texte recherché
+            column (Optional[str]): Colonne ciblée, ou toutes les colonnes si None
+        
+        Returns:
+            np.ndarray: Masque booléen par position de ligne
+        """
+        key = (filtre.lower(), column)
+        if key in self._filter_cache:
+            self._filter_cache.move_to_end(key)
+        else:
+            columns = [column] if column else list(self.current_df.columns)
+            mask = np.zeros(len(self.current_df), dtype=bool)
+            for col in columns:
+                mask |= (
+                    self.current_df[col]
+                    .astype(str)
+                    .str.contains(filtre, case=False, regex=False)
+                    .to_numpy()
+                )
+            self._filter_cache[key] = mask
+            # Chaque saisie de recherche crée un masque d'une ligne par ligne du DataFrame
+            while len(self._filter_cache) > MAX_FILTER_CACHE:
+                self._filter_cache.popitem(last=False)
+        return self._filter_cache[key]
+    
+    def get_rows(
+        self,
+        page: int = 1,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        sort_by: Optional[str] = None,
+        ascending: bool = True,
+        filtre: Optional[str] = None,
+        filter_column: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Retourne une page de lignes, triée et filtrée côté serveur.
+        
+        Args:
+            page (int): Numéro de page (à partir de 1)
+            page_size (int): Nombre de lignes par page
+            sort_by (Optional[str]): Colonne de tri
+            ascending (bool): Sens du tri
+            filtre (Optional[str]): Texte à rechercher
+            filter_column (Optional[str]): Colonne sur laquelle filtrer (toutes si None)
+        
+        Returns:
+            Dict[str, Any]: Page de données et métadonnées de pagination (page vide
+            si aucun DataFrame n'est chargé)
+        """
+        if self.current_df is None:
+            return {
+                "page": page,
+                "page_size": page_size,
+                "total_rows": 0,
+                "total_pages": 1,
+                "columns": [],
+                "data": []
+            }
+        
+        for column in (sort_by, filter_column):
+            if column and column not in self.current_df.columns:
+                raise ValueError(f"Colonne inconnue : {column}")
+        
+        if sort_by:
+            positions = self._sorted_positions(sort_by, ascending)
+        else:
+            positions = np.arange(len(self.current_df))
+        
+        if filtre:
+            positions = positions[self._filter_mask(filtre, filter_column)[positions]]
+        
+        total_rows = len(positions)
+        total_pages = max(1, -(-total_rows // page_size))
+        start = (page - 1) * page_size
+        page_df = self.current_df.iloc[positions[start:start + page_size]]
+        
         return {
-            "name": self.current_name,
-            "shape": self.current_df.shape,
-            "columns": list(self.current_df.columns),
-            "dtypes": self.current_df.dtypes.to_dict(),
-            "numeric_summary": self.current_df.describe().to_dict(),
-            "missing_values": self.current_df.isnull().sum().to_dict()
+            "page": page,
+            "page_size": page_size,
+            "total_rows": total_rows,
+            "total_pages": total_pages,
+            "columns": [str(col) for col in self.current_df.columns],
+            # Passage par to_json pour convertir NaN, dates et types NumPy
+            "data": json.loads(page_df.to_json(orient="records", date_format="iso"))
         }
 
 # Instance globale du viewer
@@ -122,6 +257,34 @@ async def get_summary():
     """
     return viewer.get_summary()
 
+@router.get("/rows")
+async def get_rows(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    sort_by: Optional[str] = None,
+    ascending: bool = True,
+    filtre: Optional[str] = None,
+    filter_column: Optional[str] = None
+):
+    """
+    Endpoint paginé pour obtenir les lignes du DataFrame.
+    
+    Args:
+        page (int): Numéro de page (à partir de 1)
+        page_size (int): Nombre de lignes par page
+        sort_by (Optional[str]): Colonne de tri
+        ascending (bool): Sens du tri
+        filtre (Optional[str]): Texte à rechercher
+        filter_column (Optional[str]): Colonne sur laquelle filtrer
+    
+    Returns:
+        Dict[str, Any]: Page de données et métadonnées de pagination
+    """
+    try:
+        return viewer.get_rows(page, page_size, sort_by, ascending, filtre, filter_column)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # Créer les templates HTML nécessaires
 def create_templates():
     """Crée les fichiers de templates HTML."""
@@ -191,12 +354,61 @@ def create_templates():
                 
                 <div class="col-md-9">
                     <div class="table-container">
-                        {{ df_html | safe }}
+                        <div class="d-flex mb-2">
+                            <input type="text" class="form-control me-2" id="filtre" placeholder="Rechercher...">
+                            <button class="btn btn-outline-secondary me-2" id="prev">&laquo;</button>
+                            <span class="align-self-center me-2" id="pageInfo"></span>
+                            <button class="btn btn-outline-secondary" id="next">&raquo;</button>
+                        </div>
+                        <div id="tableBody">
+                            {{ df_html | safe }}
+                        </div>
                     </div>
                 </div>
             </div>
         </div>
         
+        <script>
+            // Pagination, tri et filtre côté serveur via l'endpoint /rows
+            const state = { page: 1, pageSize: {{ page_size }}, sortBy: null, ascending: true, filtre: "" };
+            
+            async function chargerPage() {
+                const params = new URLSearchParams({ page: state.page, page_size: state.pageSize, ascending: state.ascending });
+                if (state.sortBy) params.append("sort_by", state.sortBy);
+                if (state.filtre) params.append("filtre", state.filtre);
+                const reponse = await fetch(`rows?${params}`);
+                const page = await reponse.json();
+                
+                // Construction par le DOM (textContent) : les valeurs des cellules ne sont jamais interprétées comme du HTML
+                const table = document.createElement("table");
+                table.className = "table table-striped table-hover";
+                const entete = table.createTHead().insertRow();
+                page.columns.forEach(c => {
+                    const th = document.createElement("th");
+                    th.textContent = c;
+                    th.style.cursor = "pointer";
+                    th.addEventListener("click", () => {
+                        state.ascending = state.sortBy === c ? !state.ascending : true;
+                        state.sortBy = c;
+                        chargerPage();
+                    });
+                    entete.appendChild(th);
+                });
+                const corps = table.createTBody();
+                page.data.forEach(r => {
+                    const ligne = corps.insertRow();
+                    page.columns.forEach(c => { ligne.insertCell().textContent = r[c] ?? ""; });
+                });
+                document.getElementById("tableBody").replaceChildren(table);
+                document.getElementById("pageInfo").textContent = `Page ${page.page} / ${page.total_pages} (${page.total_rows} lignes)`;
+                state.totalPages = page.total_pages;
+            }
+            
+            document.getElementById("prev").addEventListener("click", () => { if (state.page > 1) { state.page--; chargerPage(); } });
+            document.getElementById("next").addEventListener("click", () => { if (state.page < state.totalPages) { state.page++; chargerPage(); } });
+            document.getElementById("filtre").addEventListener("change", e => { state.filtre = e.target.value; state.page = 1; chargerPage(); });
+            chargerPage();
+        </script>
         <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
     </body>
     </html>
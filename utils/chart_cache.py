@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from constantes import const1
+
+logger = logging.getLogger(__name__)
+
+# Quota disque par défaut du cache de graphiques (octets)
+DEFAULT_QUOTA = 256 * 1024 ** 2
+# Résolution des PNG générés
+DEFAULT_DPI = 100
+
+def hash_data(data: Any) -> bytes:
+    """
+    Empreinte du contenu des données d'un graphique.
+
+    Les DataFrame et Series sont hachés de manière vectorisée (valeurs, index,
+    noms de colonnes et types) ; les autres objets par leur représentation.
+    """
+    digest = hashlib.sha256()
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        if isinstance(data, pd.DataFrame):
+            digest.update(repr((list(data.columns), [str(t) for t in data.dtypes])).encode("utf-8"))
+        else:
+            digest.update(repr((data.name, str(data.dtype))).encode("utf-8"))
+    else:
+        digest.update(repr(data).encode("utf-8"))
+    return digest.digest()
+
+class ChartCache:
+    """
+    Cache de graphiques matplotlib rendus en PNG.
+
+    Un graphique est identifié par son nom, l'empreinte de ses données et ses
+    paramètres : s'ils n'ont pas changé, le PNG existant est réutilisé sans
+    rendu. Le rendu utilise directement le moteur Agg (sans pyplot) et
+    réutilise une figure par taille et par thread. Les PNG les moins
+    récemment utilisés sont supprimés au-delà du quota disque.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_QUOTA, dpi: int = DEFAULT_DPI):
+        """
+        Args:
+            cache_dir: Répertoire du cache (OUTPUT_PATHS['temp']/graphiques par défaut).
+            max_bytes: Taille maximale du cache sur disque.
+            dpi: Résolution des PNG.
+        """
+        if cache_dir is None:
+            temp_dir = const1.OUTPUT_PATHS["temp"] if const1.OUTPUT_PATHS else "./temp"
+            cache_dir = os.path.join(temp_dir, "graphiques")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, nom: str, data: Any, params: Dict[str, Any]) -> str:
+        """Calcule la clé d'un graphique : nom, empreinte des données et paramètres."""
+        digest = hashlib.sha256(nom.encode("utf-8"))
+        digest.update(hash_data(data))
+        digest.update(repr(sorted(params.items(), key=lambda kv: kv[0])).encode("utf-8"))
+        digest.update(str(self.dpi).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _figure(self, figsize: Tuple[float, float]) -> Figure:
+        """Retourne la figure réutilisable du thread pour cette taille, vidée."""
+        figures = getattr(self._local, "figures", None)
+        if figures is None:
+            figures = self._local.figures = {}
+        fig = figures.get(figsize)
+        if fig is None:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            figures[figsize] = fig
+        else:
+            fig.clear()
+        return fig
+
+    def render(
+        self,
+        nom: str,
+        data: Any,
+        draw: Callable[[Figure, Any], None],
+        dest_path: str,
+        figsize: Tuple[float, float] = (10, 6),
+        **params
+    ) -> str:
+        """
+        Produit le PNG d'un graphique dans dest_path, depuis le cache si possible.
+
+        Args:
+            nom: Nom du graphique (distingue deux graphiques tracés sur les mêmes données).
+            data: Données tracées, incluses dans la clé.
+            draw: Fonction de tracé draw(fig, ax) sur la figure et son axe principal.
+            dest_path: Chemin du PNG à produire.
+            figsize: Taille de la figure.
+            **params: Paramètres dont dépend le tracé (titres, seuils...), inclus dans la clé.
+
+        Returns:
+            str: dest_path.
+        """
+        key = self.key(nom, data, dict(params, figsize=figsize))
+        cached = os.path.join(self.cache_dir, f"{key}.png")
+        if self._copier_depuis_cache(cached, dest_path):
+            self.hits += 1
+            return dest_path
+
+        self.misses += 1
+        fig = self._figure(figsize)
+        draw(fig, fig.add_subplot(111))
+        tmp_path = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fig.savefig(tmp_path, format="png", bbox_inches="tight", dpi=self.dpi)
+        # dest_path est copié depuis le fichier temporaire de ce rendu : une éviction
+        # par un autre processus après os.replace ne peut pas le faire échouer
+        self._copier(tmp_path, dest_path)
+        os.replace(tmp_path, cached)
+        self.evict()
+        return dest_path
+
+    @staticmethod
+    def _copier(source: str, dest_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+        shutil.copyfile(source, dest_path)
+
+    def _copier_depuis_cache(self, cached: str, dest_path: str) -> bool:
+        """
+        Copie l'entrée du cache vers dest_path.
+
+        Returns:
+            bool: False si l'entrée est absente, y compris lorsqu'un autre
+                  processus partageant le cache vient de l'évincer.
+        """
+        try:
+            # La date de modification sert de date de dernier accès pour l'éviction
+            os.utime(cached)
+            if os.path.abspath(dest_path) != os.path.abspath(cached):
+                self._copier(cached, dest_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def evict(self):
+        """Supprime les PNG les moins récemment utilisés jusqu'à respecter le quota."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".png"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                logger.info(f"Graphique évincé du cache : {path}")
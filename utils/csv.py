@@ -7,6 +7,8 @@ from typing import List, Dict, Any, Optional, Union
 from pathlib import Path
 from sqlalchemy.engine import Engine
 from sqlalchemy import create_engine
+from utils.parse_cache import cache_enabled, get_default_cache
+from utils.io import IOUtils
 
 logger = logging.getLogger(__name__)
 
@@ -30,12 +32,17 @@ class CSVUtils:
         return data
 
     @staticmethod
-    def load_csv_to_dataframe(filepath: str, encoding: str = 'utf-8', sep: str = ',', **kwargs) -> pd.DataFrame:
+    def load_csv_to_dataframe(filepath: str, encoding: str = 'utf-8', sep: str = ',', use_cache: bool = True, **kwargs) -> pd.DataFrame:
         """
         Charge un fichier CSV et retourne un DataFrame pandas.
+
+        Les fichiers déjà parsés avec les mêmes options sont relus depuis le cache Parquet (voir utils.parse_cache).
         """
         logger.info(f"Loading CSV file into DataFrame: {filepath}")
-        return pd.read_csv(filepath, encoding=encoding, sep=sep, **kwargs)
+        parse = lambda: pd.read_csv(filepath, encoding=encoding, sep=sep, **kwargs)
+        if use_cache and cache_enabled():
+            return get_default_cache().read(filepath, 'csv', parse, encoding=encoding, sep=sep, **kwargs)
+        return parse()
 
     @staticmethod
     def write_dict_to_csv(data: List[dict], filepath: str):
@@ -54,12 +61,18 @@ class CSVUtils:
         logger.info(f"Successfully wrote data to CSV file: {filepath}")
 
     @staticmethod
-    def write_dataframe_to_csv(dataframe: pd.DataFrame, filepath: str, encoding: str = 'utf-8', sep: str = ',', **kwargs):
+    def write_dataframe_to_csv(dataframe: pd.DataFrame, filepath: str, encoding: str = 'utf-8', sep: str = ',', codec: Optional[str] = None, **kwargs):
         """
         Écrit un DataFrame pandas dans un fichier CSV.
+
+        Avec codec ('gzip' ou 'zstd'), le CSV est compressé en flux et en parallèle (voir IOUtils.open_compressed).
         """
         Path(filepath).parent.mkdir(parents=True, exist_ok=True)
-        dataframe.to_csv(filepath, index=False, encoding=encoding, sep=sep, **kwargs)
+        if codec:
+            with IOUtils.open_compressed(filepath, 'w', codec, encoding=encoding, newline='') as f:
+                dataframe.to_csv(f, index=False, sep=sep, **kwargs)
+        else:
+            dataframe.to_csv(filepath, index=False, encoding=encoding, sep=sep, **kwargs)
         logger.info(f"DataFrame sauvegardé en CSV: {filepath}")
 
     @staticmethod
@@ -84,25 +97,27 @@ class CSVUtils:
         """
         Importe un fichier CSV dans une table SQL.
         """
-        df = CSVUtils.load_csv_to_dataframe(csv_path, encoding=encoding, sep=sep, **kwargs)
+        df = CSVUtils.load_csv_to_dataframe(csv_path, encoding=encoding, sep=sep, use_cache=False, **kwargs)
         CSVUtils.csv_to_sql(df, table_name, connection, if_exists=if_exists, **kwargs)
 
     @staticmethod
-    def sql_to_csv(query: str, csv_path: str, connection: Engine, encoding: str = 'utf-8', sep: str = ',', **kwargs):
+    def sql_to_csv(query: str, csv_path: str, connection: Engine, encoding: str = 'utf-8', sep: str = ',', codec: Optional[str] = None, **kwargs):
         """
-        Exporte le résultat d'une requête SQL vers un fichier CSV.
+        Exporte le résultat d'une requête SQL vers un fichier CSV, compressé si codec est fourni.
         """
         df = pd.read_sql_query(query, connection)
-        CSVUtils.write_dataframe_to_csv(df, csv_path, encoding=encoding, sep=sep, **kwargs)
+        CSVUtils.write_dataframe_to_csv(df, csv_path, encoding=encoding, sep=sep, codec=codec, **kwargs)
         logger.info(f"Données SQL exportées en CSV : {csv_path}")
 
     @staticmethod
     def validate_csv(file_path: Union[str, Path], required_columns: List[str], encoding: str = 'utf-8', sep: str = ',') -> bool:
         """
         Valide qu'un fichier CSV contient bien toutes les colonnes requises.
+
+        Seul l'en-tête est lu ; pour valider le contenu, voir utils.validation.SchemaValidator.
         """
         try:
-            df = pd.read_csv(file_path, encoding=encoding, sep=sep)
+            df = pd.read_csv(file_path, encoding=encoding, sep=sep, nrows=0)
             missing_columns = set(required_columns) - set(df.columns)
             if missing_columns:
                 logger.warning(f"Colonnes manquantes dans le CSV: {missing_columns}")
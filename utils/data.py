@@ -1,11 +1,25 @@
 # -*- coding: utf-8 -*-
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import text
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from sqlalchemy import Date, bindparam, text
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Colonnes de libellés répétés converties en 'category' par optimize_dtypes
+CATEGORY_COLUMNS = [
+    'code_fonds', 'nom_fonds', 'pays', 'secteur', 'devise', 'type_actif', 'region', 'gestionnaire',
+    'Fund', 'Manager', 'Country', 'Asset Type', 'Sector', 'Currency'
+]
+
+# Nombre d'écritures par table dans ce processus, lu par les caches de lecture (voir table_generation)
+_table_generations: Dict[str, int] = {}
+_generations_lock = threading.Lock()
+
 class DataUtils:
     """
     Classe utilitaire pour les opérations sur les données et l'interaction avec la base de données.
@@ -25,11 +39,64 @@ class DataUtils:
         """
         try:
             dataframe.to_sql(name=tablename, con=connection, if_exists=if_exists, index=False)
+            DataUtils.mark_table_changed(tablename)
             logger.info(f"DataFrame chargé dans la table '{tablename}' avec succès.")
         except Exception as e:
             logger.error(f"Erreur lors du chargement du DataFrame dans la table '{tablename}': {e}")
             raise
 
+    @staticmethod
+    def mark_table_changed(tablename: str):
+        """
+        Signale une écriture dans une table aux caches de lecture de ce processus.
+
+        Appelée par load_dataframe_to_sql, et à nouveau après le commit par les
+        imports transactionnels : un cache rempli pendant la transaction est ainsi
+        invalidé. Les écritures faites par un autre processus ne sont pas vues.
+        """
+        with _generations_lock:
+            _table_generations[tablename] = _table_generations.get(tablename, 0) + 1
+
+    @staticmethod
+    def table_generation(tablename: str) -> int:
+        """Retourne le compteur d'écritures d'une table (voir mark_table_changed)."""
+        with _generations_lock:
+            return _table_generations.get(tablename, 0)
+
+    @staticmethod
+    def day_range(
+        column: str,
+        date_debut: Optional[Union[str, date]] = None,
+        date_fin: Optional[Union[str, date]] = None,
+        name: str = 'date'
+    ) -> Tuple[str, Dict[str, date], List]:
+        """
+        Construit une condition SQL couvrant les journées entières de date_debut à date_fin (incluses).
+
+        Les bornes sont des paramètres de type Date (column >= début et
+        column < lendemain de la fin) : la condition vaut pour les colonnes DATE
+        comme DATETIME, où une égalité avec '2024-01-31' ne retrouve pas
+        '2024-01-31 00:00:00'.
+
+        Args:
+            column (str): La colonne de date, éventuellement préfixée par un alias.
+            date_debut: Premier jour inclus (pas de borne basse si None).
+            date_fin: Dernier jour inclus (pas de borne haute si None).
+            name (str): Préfixe des paramètres, à varier pour combiner plusieurs conditions.
+
+        Returns:
+            Tuple: (condition SQL, ou '' sans borne ; paramètres ; bindparams typés à passer
+                    à text().bindparams()).
+        """
+        conditions, params = [], {}
+        if date_debut is not None:
+            params[f"{name}_debut"] = pd.Timestamp(date_debut).date()
+            conditions.append(f"{column} >= :{name}_debut")
+        if date_fin is not None:
+            params[f"{name}_lendemain"] = pd.Timestamp(date_fin).date() + timedelta(days=1)
+            conditions.append(f"{column} < :{name}_lendemain")
+        return " AND ".join(conditions), params, [bindparam(key, type_=Date) for key in params]
+
     @staticmethod
     def load_dict_to_sql(data: list[dict], tablename: str, connection):
         """
@@ -49,13 +116,14 @@ class DataUtils:
             raise
 
     @staticmethod
-    def load_sql_to_dataframe(query: str, connection) -> pd.DataFrame:
+    def load_sql_to_dataframe(query: str, connection, compact: bool = False) -> pd.DataFrame:
         """
         Charge les résultats d'une requête SQL dans un DataFrame pandas.
 
         Args:
             query (str): La requête SQL à exécuter.
             connection: L'objet de connexion à la base de données (SQLAlchemy engine ou connexion).
+            compact (bool): Si True, normalise les types avec optimize_dtypes. Par défaut False.
 
         Returns:
             pd.DataFrame: Le DataFrame contenant les résultats de la requête.
@@ -63,6 +131,8 @@ class DataUtils:
         try:
             df = pd.read_sql(query, con=connection)
             logger.info("Données chargées depuis la base de données vers un DataFrame avec succès.")
+            if compact:
+                df = DataUtils.optimize_dtypes(df)
             return df
         except Exception as e:
             logger.error(f"Erreur lors du chargement des données SQL vers un DataFrame: {e}")
@@ -91,3 +161,93 @@ class DataUtils:
         except Exception as e:
             logger.error(f"Erreur lors du chargement des données SQL vers une liste de dictionnaires: {e}")
             raise
+
+    @staticmethod
+    def optimize_dtypes(
+        df: pd.DataFrame,
+        category_columns: Optional[Iterable[str]] = None,
+        max_category_ratio: float = 0.5,
+        downcast_floats: bool = False
+    ) -> pd.DataFrame:
+        """
+        Convertit un DataFrame de composition ou d'analyse vers des types compacts.
+
+        - colonnes id / id_* entières : plus petit type entier possible ;
+        - libellés répétés (CATEGORY_COLUMNS, ou toute colonne texte dont le ratio
+          de valeurs distinctes est inférieur à max_category_ratio) : 'category' ;
+        - colonnes date / date_* : datetime64 (si toutes les valeurs sont valides).
+
+        Les montants restent en float64 sauf si downcast_floats vaut True.
+
+        Args:
+            df (pd.DataFrame): Le DataFrame à convertir (non modifié).
+            category_columns (Iterable[str], optional): Colonnes à forcer en 'category'.
+            max_category_ratio (float): Ratio valeurs distinctes / lignes maximal pour
+                                        la conversion automatique en 'category'.
+            downcast_floats (bool): Convertit les flottants en float32 si possible.
+
+        Returns:
+            pd.DataFrame: Une copie du DataFrame avec les types compacts.
+        """
+        result = df.copy()
+        forced = set(CATEGORY_COLUMNS if category_columns is None else category_columns)
+        n_rows = max(len(result), 1)
+
+        for column in result.columns:
+            series = result[column]
+            name = str(column).lower()
+            if (name == 'id' or name.startswith('id_')) and pd.api.types.is_integer_dtype(series):
+                result[column] = pd.to_numeric(series, downcast='integer')
+            elif (name == 'date' or name.startswith('date_')) and not pd.api.types.is_datetime64_any_dtype(series):
+                try:
+                    result[column] = pd.to_datetime(series)
+                except (ValueError, TypeError):
+                    logger.warning(f"Colonne '{column}' conservée en {series.dtype}: dates invalides.")
+            elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+                if column in forced or series.nunique(dropna=True) / n_rows <= max_category_ratio:
+                    result[column] = series.astype('category')
+            elif downcast_floats and pd.api.types.is_float_dtype(series):
+                result[column] = pd.to_numeric(series, downcast='float')
+
+        logger.info(
+            f"Types compactés: {df.memory_usage(deep=True).sum() / 1e6:.1f} Mo -> "
+            f"{result.memory_usage(deep=True).sum() / 1e6:.1f} Mo"
+        )
+        return result
+
+    @staticmethod
+    def memory_report(df: pd.DataFrame, reference: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Calcule l'occupation mémoire de chaque colonne d'un DataFrame.
+
+        Args:
+            df (pd.DataFrame): Le DataFrame à mesurer.
+            reference (pd.DataFrame, optional): DataFrame de comparaison (par exemple avant
+                                                optimize_dtypes) ajoutant les colonnes
+                                                'octets_reference' et 'gain'.
+
+        Returns:
+            pd.DataFrame: Une ligne par colonne (colonne, dtype, octets) et une ligne 'TOTAL'.
+        """
+        usage = df.memory_usage(index=False, deep=True)
+        report = pd.DataFrame({
+            'colonne': usage.index,
+            'dtype': [str(df[column].dtype) for column in usage.index],
+            'octets': usage.to_numpy()
+        })
+        if reference is not None:
+            ref_usage = reference.memory_usage(index=False, deep=True)
+            report['octets_reference'] = ref_usage.reindex(usage.index).to_numpy()
+        total = {'colonne': 'TOTAL', 'dtype': '', 'octets': report['octets'].sum()}
+        if reference is not None:
+            total['octets_reference'] = report['octets_reference'].sum()
+        report = pd.concat([report, pd.DataFrame([total])], ignore_index=True)
+        if reference is not None:
+            report['gain'] = 1 - np.divide(
+                report['octets'].to_numpy(dtype=float),
+                report['octets_reference'].to_numpy(dtype=float),
+                out=np.ones(len(report)),
+                where=report['octets_reference'].to_numpy(dtype=float) > 0
+            )
+        logger.info(f"Mémoire totale du DataFrame: {total['octets'] / 1e6:.1f} Mo")
+        return report
@@ -55,7 +55,7 @@ def import_csv_to_sqlite(csv_path: str, table: str, db_path: str, if_exists: str
         db_path (str): Chemin de la base SQLite
         if_exists (str): 'append' ou 'replace'
     """
-    df = CSVUtils.load_csv_to_dataframe(csv_path)
+    df = CSVUtils.load_csv_to_dataframe(csv_path, use_cache=False)
     engine = create_engine(f"sqlite:///{db_path}")
     CSVUtils.csv_to_sql(df, table, engine, if_exists=if_exists)
 
@@ -69,7 +69,7 @@ def import_excel_to_sqlite(excel_path: str, table: str, db_path: str, if_exists:
         db_path (str): Chemin de la base SQLite
         if_exists (str): 'append' ou 'replace'
     """
-    df = ExcelUtils.load_excel_to_dataframe(excel_path)
+    df = ExcelUtils.load_excel_to_dataframe(excel_path, use_cache=False)
     engine = create_engine(f"sqlite:///{db_path}")
     ExcelUtils.excel_to_sql(df, table, engine, if_exists=if_exists)
 
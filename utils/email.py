@@ -19,6 +19,7 @@ from dotenv import load_dotenv, find_dotenv
 import json
 import re
 from pathlib import Path
+from utils.mailbox_sync import DEFAULT_MAX_WORKERS, GRAPH_URL, MailboxSync
 
 logger = logging.getLogger(__name__)
 
@@ -104,6 +105,8 @@ class EmailManager:
         self.oauth_config = oauth_config
         self.account = None
         self.mailbox = None
+        # Lecteur Graph (synchronisation delta, filtres serveur), voir activer_synchro()
+        self.synchro = None
         
         # Initialisation de MSAL pour l'authentification
         self.app = msal.ConfidentialClientApplication(
@@ -131,6 +134,95 @@ class EmailManager:
         
         self.mailbox = self.account.mailbox()
     
+    def _jeton_graph(self) -> str:
+        """Obtient un jeton d'accès Graph (application) via MSAL, depuis son cache si possible.
+        
+        Un jeton application n'a pas d'utilisateur : il ne donne pas accès à /me,
+        seulement aux boîtes désignées par leur adresse (/users/{adresse}).
+        """
+        resultat = self.app.acquire_token_for_client(scopes=['https://graph.microsoft.com/.default'])
+        if 'access_token' not in resultat:
+            raise RuntimeError(f"Échec de l'obtention du jeton Graph : {resultat.get('error_description')}")
+        return resultat['access_token']
+    
+    def activer_synchro(
+        self,
+        utilisateur: Optional[str] = None,
+        base_url: str = GRAPH_URL,
+        etat_path: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        token_provider=None
+    ) -> MailboxSync:
+        """Active la lecture via l'API Graph pour lire_emails, recherche_avancee et lire_emails_groupe.
+        
+        Les filtres sont alors évalués par le serveur, les pages récupérées en
+        parallèle et seuls les corps des messages retenus sont téléchargés.
+        
+        Args:
+            utilisateur: Adresse de la boîte ; obligatoire avec le jeton application MSAL.
+                'me' n'est accepté qu'avec un token_provider fournissant un jeton délégué
+                (par défaut 'me' dans ce cas)
+            base_url: URL de l'API Graph
+            etat_path: Base SQLite des liens delta (dans le dossier des tokens par défaut)
+            max_workers: Nombre maximal de requêtes simultanées
+            token_provider: Fonction retournant un jeton d'accès (jeton application MSAL par défaut)
+        
+        Returns:
+            Le lecteur MailboxSync
+        
+        Raises:
+            ValueError: Si aucune adresse de boîte n'est fournie avec le jeton application
+        """
+        if token_provider is None and utilisateur in (None, 'me'):
+            raise ValueError(
+                "Le jeton application (client credentials) ne donne pas accès à /me : "
+                "indiquer l'adresse de la boîte aux lettres (utilisateur) ou un token_provider délégué"
+            )
+        if etat_path is None:
+            etat_path = os.path.join(self.oauth_config.token_path, 'mailbox_delta.db')
+        self.synchro = MailboxSync(
+            token_provider or self._jeton_graph,
+            utilisateur=utilisateur or 'me',
+            base_url=base_url,
+            etat_path=etat_path,
+            max_workers=max_workers
+        )
+        return self.synchro
+    
+    def synchroniser_emails(
+        self,
+        dossier: str = 'Inbox',
+        reinitialiser: bool = False,
+        inclure_corps: bool = True,
+        utilisateur: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Retourne les emails créés, modifiés ou supprimés depuis la dernière synchronisation.
+        
+        Args:
+            dossier: Dossier à synchroniser
+            reinitialiser: Repartir d'une synchronisation complète
+            inclure_corps: Télécharger le corps des messages
+            utilisateur: Adresse de la boîte, si la synchronisation n'est pas encore activée
+                (voir activer_synchro)
+        
+        Returns:
+            Dictionnaire avec 'emails' (informations des messages), 'supprimes'
+            (identifiants) et 'complet'
+        """
+        if self.synchro is None:
+            self.activer_synchro(utilisateur)
+        resultat = self.synchro.synchroniser(dossier, reinitialiser=reinitialiser)
+        return {
+            'emails': self._infos_synchro(resultat['messages'], inclure_corps),
+            'supprimes': resultat['supprimes'],
+            'complet': resultat['complet']
+        }
+    
+    def _infos_synchro(self, messages: List, inclure_corps: bool = True) -> List[Dict]:
+        """Charge en parallèle corps et pièces jointes des messages Graph puis extrait leurs informations."""
+        self.synchro.charger(messages, corps=inclure_corps)
+        return [message.to_dict(inclure_corps) for message in messages]
+    
     def envoyer_email(
         self,
         destinataires: List[str],
@@ -277,6 +369,20 @@ class EmailManager:
         Returns:
             Liste des emails correspondant aux critères
         """
+        if self.synchro is not None:
+            return self._infos_synchro(self.synchro.rechercher(
+                dossier=dossier,
+                expediteur=expediteur,
+                sujet=sujet,
+                contenu=contenu,
+                piece_jointe=piece_jointe,
+                date_debut=date_debut,
+                date_fin=date_fin,
+                categories=categories,
+                importance=importance,
+                non_lus=non_lus
+            ))
+        
         folder = self.mailbox.get_folder(folder_name=dossier)
         query = folder.get_messages()
         
@@ -471,6 +577,16 @@ class EmailManager:
         Returns:
             Liste de dictionnaires contenant les informations des emails
         """
+        if self.synchro is not None:
+            return self._infos_synchro(self.synchro.rechercher(
+                dossier=dossier,
+                sujet=filtre_objet,
+                contenu=filtre_contenu,
+                piece_jointe=filtre_piece_jointe,
+                date_debut=depuis,
+                limite=limite
+            ))
+        
         messages = []
         folder = self.mailbox.get_folder(folder_name=dossier)
         query = folder.get_messages()
@@ -585,6 +701,14 @@ class EmailManager:
         Returns:
             Liste des emails du groupe
         """
+        if self.synchro is not None:
+            # Lecture de la boîte du groupe avec la même session Graph
+            synchro, self.synchro = self.synchro, self.synchro.pour_boite(groupe_id)
+            try:
+                return self.lire_emails(**kwargs)
+            finally:
+                self.synchro = synchro
+        
         groupe = self.account.groups[groupe_id]
         self.mailbox = groupe.get_mailbox()
         return self.lire_emails(**kwargs)
@@ -1,31 +1,200 @@
 # -*- coding: utf-8 -*-
 
+import numpy as np
 import pandas as pd
 import logging
 import openpyxl
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.utils import get_column_letter
-from typing import Dict, List, Any, Optional, Union
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+from typing import Dict, Iterator, List, Any, Optional, Union
 from pathlib import Path
 from sqlalchemy.engine import Engine
 from sqlalchemy import create_engine
+from utils.parse_cache import cache_enabled, get_default_cache
 import win32com.client
 import pythoncom
 
 logger = logging.getLogger(__name__)
 
+# Nombre de lignes par chunk pour la lecture et l'écriture en flux
+DEFAULT_EXCEL_CHUNKSIZE = 50_000
+
+def _iter_frames(source: Any, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Normalise une source de lignes en itérateur de DataFrames.
+
+    Accepte un DataFrame, un itérable de DataFrames (read_sql_query avec
+    chunksize...) ou un curseur (résultat SQLAlchemy ou DB-API) lu par fetchmany.
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, max(len(source), 1), chunksize):
+            yield source.iloc[start:start + chunksize]
+    elif hasattr(source, "fetchmany"):
+        columns = list(source.keys()) if hasattr(source, "keys") else [d[0] for d in source.description]
+        while True:
+            rows = source.fetchmany(chunksize)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records([tuple(row) for row in rows], columns=columns)
+    else:
+        yield from source
+
+def _cell_value(value: Any) -> Any:
+    """Convertit une valeur pandas/NumPy en valeur de cellule (NaN/NaT -> cellule vide)."""
+    if isinstance(value, np.datetime64):
+        value = pd.Timestamp(value)
+    elif isinstance(value, np.generic):
+        value = value.item()
+    try:
+        return None if pd.isna(value) else value
+    except (TypeError, ValueError):
+        return value
+
+class ExcelEditor:
+    """
+    Session d'édition d'un classeur Excel : le fichier est chargé une fois,
+    reçoit un nombre quelconque de modifications, puis est enregistré une fois.
+
+    Exemple :
+        with ExcelEditor("rapport.xlsx") as editor:
+            editor.write_value("Synthese", "B2", 1250.0)
+            editor.write_formula("Synthese", "B3", "=SUM(B2:B2)")
+            editor.write_dataframe("Detail", df, "A1")
+    """
+
+    def __init__(self, filepath: str, create: bool = False):
+        """
+        Args:
+            filepath: Le fichier Excel.
+            create: Crée un classeur vide si le fichier n'existe pas (sinon FileNotFoundError).
+        """
+        self.filepath = filepath
+        self._created = False
+        if Path(filepath).exists():
+            self.workbook = openpyxl.load_workbook(filepath)
+        elif create:
+            self.workbook = openpyxl.Workbook()
+            self._created = True
+        else:
+            raise FileNotFoundError(filepath)
+        self.nb_modifications = 0
+
+    def __enter__(self) -> "ExcelEditor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Les modifications ne sont enregistrées que si la session s'est terminée sans erreur
+        if exc_type is None and (self.nb_modifications or self._created):
+            self.save()
+        self.workbook.close()
+        return False
+
+    def sheet(self, sheet_name: str, create: bool = True):
+        """Retourne la feuille, créée si besoin (la feuille par défaut d'un nouveau classeur est réutilisée)."""
+        if sheet_name not in self.workbook.sheetnames:
+            if not create:
+                raise KeyError(f"Feuille introuvable : {sheet_name}")
+            if self._created and self.workbook.sheetnames == ["Sheet"] and self.nb_modifications == 0:
+                self.workbook["Sheet"].title = sheet_name
+            else:
+                self.workbook.create_sheet(sheet_name)
+        return self.workbook[sheet_name]
+
+    def write_value(self, sheet_name: str, cell: Union[str, tuple], value: Any):
+        """Écrit une valeur dans une cellule, désignée par 'B2' ou (ligne, colonne)."""
+        ws = self.sheet(sheet_name)
+        if isinstance(cell, str):
+            ws[cell] = _cell_value(value)
+        else:
+            ws.cell(row=cell[0], column=cell[1], value=_cell_value(value))
+        self.nb_modifications += 1
+
+    def write_values(self, sheet_name: str, values: Dict[str, Any]):
+        """Écrit plusieurs cellules : {'B2': valeur, 'C5': '=SUM(A1:A4)', ...}."""
+        ws = self.sheet(sheet_name)
+        for cell, value in values.items():
+            ws[cell] = _cell_value(value)
+        self.nb_modifications += len(values)
+
+    def write_formula(self, sheet_name: str, cell: str, formula: str):
+        """Écrit une formule dans une cellule."""
+        self.write_value(sheet_name, cell, formula if formula.startswith("=") else f"={formula}")
+
+    def write_block(self, sheet_name: str, top_left: str, values: Any):
+        """
+        Écrit un tableau 2D (listes, tableau NumPy, DataFrame sans en-tête) à partir d'une cellule.
+        """
+        ws = self.sheet(sheet_name)
+        column_letter, first_row = coordinate_from_string(top_left)
+        first_col = column_index_from_string(column_letter)
+        if isinstance(values, pd.DataFrame):
+            values = values.itertuples(index=False, name=None)
+        count = 0
+        for i, row in enumerate(values):
+            for j, value in enumerate(row):
+                ws.cell(row=first_row + i, column=first_col + j, value=_cell_value(value))
+                count += 1
+        self.nb_modifications += count
+
+    def write_dataframe(self, sheet_name: str, dataframe: pd.DataFrame, top_left: str = "A1", header: bool = True):
+        """Écrit un DataFrame (avec ses noms de colonnes) à partir d'une cellule."""
+        if header:
+            self.write_block(sheet_name, top_left, [list(map(str, dataframe.columns))])
+            column_letter, row = coordinate_from_string(top_left)
+            top_left = f"{column_letter}{row + 1}"
+        self.write_block(sheet_name, top_left, dataframe)
+
+    def clear_range(self, sheet_name: str, cell_range: str):
+        """Vide les valeurs d'une plage (la mise en forme est conservée)."""
+        ws = self.sheet(sheet_name, create=False)
+        for row in ws[cell_range]:
+            for cell in row:
+                cell.value = None
+        self.nb_modifications += 1
+
+    def clear_sheet(self, sheet_name: str):
+        """Vide les valeurs d'une feuille (la mise en forme est conservée)."""
+        ws = self.sheet(sheet_name, create=False)
+        for row in ws.iter_rows():
+            for cell in row:
+                cell.value = None
+        self.nb_modifications += 1
+
+    def save(self, filepath: Optional[str] = None):
+        """Enregistre le classeur (sous un autre nom si filepath est fourni)."""
+        target = filepath or self.filepath
+        Path(target).parent.mkdir(parents=True, exist_ok=True)
+        self.workbook.save(target)
+        logger.info(f"Classeur enregistré ({self.nb_modifications} modifications) : {target}")
+
 class ExcelUtils:
     """
     Classe utilitaire pour gérer les opérations sur les fichiers Excel, y compris lecture, écriture, formules, conversion PDF, et interactions SQL.
     """
 
     @staticmethod
-    def load_excel_to_dataframe(filepath: str, sheet_name: Union[str, int] = 0, **kwargs) -> Optional[pd.DataFrame]:
+    def load_excel_to_dataframe(filepath: str, sheet_name: Union[str, int] = 0, use_cache: bool = True, chunksize: Optional[int] = None, **kwargs) -> Optional[Union[pd.DataFrame, Iterator[pd.DataFrame]]]:
         """
         Charge une feuille spécifique d'un fichier Excel dans un DataFrame pandas.
+
+        Avec chunksize, la feuille est lue en flux (voir iter_excel_chunks) et un
+        itérateur de DataFrames est retourné, comme pandas.read_csv ; sans
+        chunksize, la feuille entière est chargée en mémoire. Les feuilles déjà
+        parsées avec les mêmes options sont relues depuis le cache Parquet (voir
+        utils.parse_cache).
         """
+        if chunksize is not None:
+            dtype = kwargs.pop('dtype', None)
+            if kwargs:
+                raise ValueError(f"Options non prises en charge par la lecture en flux : {sorted(kwargs)}")
+            return ExcelUtils.iter_excel_chunks(filepath, sheet_name=sheet_name, chunksize=chunksize, dtype=dtype)
         try:
-            df = pd.read_excel(filepath, sheet_name=sheet_name, **kwargs)
+            parse = lambda: pd.read_excel(filepath, sheet_name=sheet_name, **kwargs)
+            if use_cache and cache_enabled():
+                df = get_default_cache().read(filepath, 'excel', parse, sheet_name=sheet_name, **kwargs)
+            else:
+                df = parse()
             logger.info(f"Fichier Excel lu avec succès : {filepath}")
             return df
         except FileNotFoundError:
@@ -39,24 +208,118 @@ class ExcelUtils:
     def write_dataframe_to_excel(dataframe: pd.DataFrame, filepath: str, sheet_name: str = 'Sheet1', startrow: Optional[int] = None, startcol: Optional[int] = None, **kwargs):
         """
         Écrit un DataFrame pandas dans un fichier Excel, à l'emplacement et la feuille spécifiés.
+
+        Pour un nouveau fichier écrit à partir de A1, l'écriture se fait en flux (write_excel_streaming).
         """
+        if not Path(filepath).exists() and startrow is None and startcol is None and not kwargs:
+            ExcelUtils.write_excel_streaming(filepath, {sheet_name: dataframe})
+            return
         Path(filepath).parent.mkdir(parents=True, exist_ok=True)
         with pd.ExcelWriter(filepath, engine='openpyxl', mode='a' if Path(filepath).exists() else 'w') as writer:
             dataframe.to_excel(writer, sheet_name=sheet_name, index=False, startrow=startrow, startcol=startcol, **kwargs)
         logger.info(f"DataFrame sauvegardé en Excel : {filepath}")
 
+    @staticmethod
+    def iter_excel_chunks(filepath: str, sheet_name: Union[str, int] = 0, chunksize: int = DEFAULT_EXCEL_CHUNKSIZE, header: bool = True, dtype: Any = None) -> Iterator[pd.DataFrame]:
+        """
+        Lit une feuille Excel par chunks de lignes, en mode lecture seule d'openpyxl.
+
+        Les lignes sont lues en flux : la mémoire utilisée dépend de chunksize et
+        non de la taille du fichier. Comme pandas.read_excel, les lignes vides en
+        fin de feuille (cellules seulement mises en forme d'un modèle...) sont
+        ignorées, ainsi que les colonnes au-delà de la dernière cellule non vide
+        de la première ligne.
+
+        Chaque chunk a ses propres types : une colonne vide dans un chunk est
+        en float64, comme dans read_excel. Pour des types identiques d'un chunk à
+        l'autre (colonnes texte parfois vides...), passer dtype, appliqué à
+        chaque chunk avec astype.
+        """
+        wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+            # La dimension enregistrée dans le fichier peut être fausse ou inclure des cellules vides
+            ws.reset_dimensions()
+            rows = ws.iter_rows(values_only=True)
+            first = next(rows, None)
+            if first is None:
+                return
+            width = max((i + 1 for i, c in enumerate(first) if c is not None), default=0)
+            first = first[:width]
+            if header:
+                columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(first)]
+                batch = []
+            else:
+                columns = list(range(width))
+                batch = [first]
+
+            def _frame(records):
+                frame = pd.DataFrame.from_records(records, columns=columns)
+                empty = [column for column in frame.columns if frame[column].isna().all()]
+                frame[empty] = frame[empty].astype('float64')
+                return frame if dtype is None else frame.astype(dtype)
+
+            # Lignes vides en attente : conservées seulement si une ligne non vide suit
+            blanks = []
+            for row in rows:
+                row = row[:width]
+                if all(value is None for value in row):
+                    blanks.append(row)
+                    continue
+                for pending in blanks + [row]:
+                    batch.append(pending)
+                    if len(batch) >= chunksize:
+                        yield _frame(batch)
+                        batch = []
+                blanks = []
+            if batch:
+                yield _frame(batch)
+        finally:
+            wb.close()
+
+    @staticmethod
+    def write_excel_streaming(filepath: str, sheets: Dict[str, Any], chunksize: int = DEFAULT_EXCEL_CHUNKSIZE, header: bool = True):
+        """
+        Écrit une ou plusieurs feuilles en une passe, en mode écriture seule d'openpyxl.
+
+        Chaque feuille est alimentée par un DataFrame, un itérable de DataFrames
+        ou un curseur SQL : les lignes sont ajoutées au fil de l'eau, sans
+        construire le classeur en mémoire. Le fichier existant est remplacé.
+
+        Args:
+            filepath: Le fichier Excel à créer.
+            sheets: {nom de feuille: source des lignes}, dans l'ordre des feuilles.
+            chunksize: Nombre de lignes lues à la fois sur un DataFrame ou un curseur.
+            header: Écrit les noms de colonnes en première ligne.
+        """
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        wb = openpyxl.Workbook(write_only=True)
+        total = 0
+        for sheet_name, source in sheets.items():
+            ws = wb.create_sheet(title=sheet_name)
+            header_written = not header
+            for chunk in _iter_frames(source, chunksize):
+                if not header_written:
+                    ws.append([str(c) for c in chunk.columns])
+                    header_written = True
+                # NaN/NaT -> cellule vide ; astype(object) restitue des types Python
+                values = chunk.astype(object).where(chunk.notna(), None)
+                for row in values.itertuples(index=False, name=None):
+                    ws.append(row)
+                total += len(chunk)
+        wb.save(filepath)
+        logger.info(f"{total} lignes écrites en flux dans {len(sheets)} feuille(s) : {filepath}")
+
     @staticmethod
     def write_to_excel_cell(filepath: str, sheet_name: str, row: int, col: int, value: Any):
         """
         Écrit une valeur dans une cellule spécifique d'un fichier Excel.
+
+        Pour plusieurs modifications, utiliser ExcelEditor (un seul chargement et un seul enregistrement).
         """
         try:
-            workbook = openpyxl.load_workbook(filepath)
-            if sheet_name not in workbook.sheetnames:
-                workbook.create_sheet(sheet_name)
-            sheet = workbook[sheet_name]
-            sheet.cell(row=row, column=col, value=value)
-            workbook.save(filepath)
+            with ExcelEditor(filepath) as editor:
+                editor.write_value(sheet_name, (row, col), value)
             logger.info(f"Valeur écrite dans {sheet_name}!{row},{col}")
         except FileNotFoundError:
             logger.error(f"Erreur : Le fichier Excel '{filepath}' est introuvable.")
@@ -69,10 +332,9 @@ class ExcelUtils:
         Écrit une formule dans une cellule Excel.
         """
         try:
-            wb = openpyxl.load_workbook(filepath)
-            ws = wb[sheet_name]
-            ws[cell] = formula
-            wb.save(filepath)
+            with ExcelEditor(filepath) as editor:
+                editor.sheet(sheet_name, create=False)
+                editor.write_value(sheet_name, cell, formula)
             logger.info(f"Formule écrite dans {sheet_name}!{cell}")
         except Exception as e:
             logger.error(f"Erreur lors de l'écriture de la formule: {str(e)}")
@@ -96,14 +358,11 @@ class ExcelUtils:
         Vide une feuille Excel.
         """
         try:
-            wb = openpyxl.load_workbook(filepath)
-            if sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
-                for row in ws.iter_rows():
-                    for cell in row:
-                        cell.value = None
-                wb.save(filepath)
-                logger.info(f"Feuille vidée : {sheet_name}")
+            with ExcelEditor(filepath) as editor:
+                if sheet_name not in editor.workbook.sheetnames:
+                    return
+                editor.clear_sheet(sheet_name)
+            logger.info(f"Feuille vidée : {sheet_name}")
         except Exception as e:
             logger.error(f"Erreur lors du vidage de la feuille: {str(e)}")
 
@@ -113,16 +372,19 @@ class ExcelUtils:
         Vide une plage spécifique dans une feuille Excel.
         """
         try:
-            wb = openpyxl.load_workbook(filepath)
-            ws = wb[sheet_name]
-            for row in ws[cell_range]:
-                for cell in row:
-                    cell.value = None
-            wb.save(filepath)
+            with ExcelEditor(filepath) as editor:
+                editor.clear_range(sheet_name, cell_range)
             logger.info(f"Plage {cell_range} vidée dans {sheet_name}")
         except Exception as e:
             logger.error(f"Erreur lors du vidage de la plage: {str(e)}")
 
+    @staticmethod
+    def edit(filepath: str, create: bool = False) -> ExcelEditor:
+        """
+        Ouvre une session d'édition groupée (voir ExcelEditor).
+        """
+        return ExcelEditor(filepath, create=create)
+
     @staticmethod
     def excel_to_dict(filepath: str, **kwargs) -> Dict[str, pd.DataFrame]:
         """
@@ -149,18 +411,35 @@ class ExcelUtils:
         logger.info(f"DataFrame importé dans SQL : {table_name}")
 
     @staticmethod
-    def excel_file_to_sql(excel_path: str, table_name: str, connection: Engine, sheet_name: Union[str, int] = 0, if_exists: str = 'fail', **kwargs):
+    def excel_file_to_sql(excel_path: str, table_name: str, connection: Engine, sheet_name: Union[str, int] = 0, if_exists: str = 'fail', chunksize: int = DEFAULT_EXCEL_CHUNKSIZE, dtype: Any = None, **kwargs):
         """
         Importe une feuille Excel dans une table SQL.
+
+        La feuille est lue et chargée par chunks (iter_excel_chunks), dans une
+        seule transaction : la mémoire utilisée dépend de chunksize et non de la
+        taille du fichier. La table est créée d'après les types du premier chunk ;
+        dtype (types pandas, voir iter_excel_chunks) les fixe pour toute la feuille.
         """
-        df = ExcelUtils.load_excel_to_dataframe(excel_path, sheet_name=sheet_name)
-        ExcelUtils.excel_to_sql(df, table_name, connection, if_exists=if_exists, **kwargs)
+        nb_lignes = 0
+        chunks = ExcelUtils.iter_excel_chunks(excel_path, sheet_name=sheet_name, chunksize=chunksize, dtype=dtype)
+        with connection.begin() as conn:
+            for i, chunk in enumerate(chunks):
+                chunk.to_sql(table_name, conn, if_exists=if_exists if i == 0 else 'append', index=False, **kwargs)
+                nb_lignes += len(chunk)
+        logger.info(f"{nb_lignes} lignes de {excel_path} importées dans SQL : {table_name}")
 
     @staticmethod
-    def sql_to_excel(query: str, excel_path: str, connection: Engine, **kwargs):
+    def sql_to_excel(query: str, excel_path: str, connection: Engine, chunksize: Optional[int] = None, **kwargs):
         """
         Exporte le résultat d'une requête SQL vers un fichier Excel.
+
+        Avec chunksize, le résultat est lu et écrit par chunks en mode écriture
+        seule (voir write_excel_streaming).
         """
+        if chunksize:
+            chunks = pd.read_sql_query(query, connection, chunksize=chunksize)
+            ExcelUtils.write_excel_streaming(excel_path, {kwargs.get('sheet_name', 'Sheet1'): chunks}, chunksize=chunksize)
+            return
         df = pd.read_sql_query(query, connection)
         ExcelUtils.write_dataframe_to_excel(df, excel_path, **kwargs)
         logger.info(f"Données SQL exportées en Excel : {excel_path}")
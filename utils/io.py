@@ -1,12 +1,159 @@
 # -*- coding: utf-8 -*-
 
 import gzip
+import io
+import shutil
+import tarfile
 import zipfile
+import zlib
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Optional
 
 logger = logging.getLogger(__name__)
 import os
 
+try:
+    import zstandard
+except ImportError:  # zstd optionnel : seul gzip est alors disponible
+    zstandard = None
+
+# Taille des blocs compressés indépendamment (un membre gzip par bloc)
+BLOCK_SIZE = 4 * 1024 * 1024
+# Niveaux de compression par défaut
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# Extensions associées aux codecs
+CODEC_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+# Taille au-delà de laquelle un membre zip est compressé par zipfile, sans être gardé en mémoire
+ZIP_MEMBER_IN_MEMORY_MAX = 64 * 1024 * 1024
+
+def _default_workers() -> int:
+    return os.cpu_count() or 1
+
+def codec_from_path(filepath: str) -> Optional[str]:
+    """Retourne le codec correspondant à l'extension du fichier ('gzip', 'zstd' ou None)."""
+    for codec, extension in CODEC_EXTENSIONS.items():
+        if str(filepath).endswith(extension):
+            return codec
+    return None
+
+class ParallelGzipWriter(io.RawIOBase):
+    """
+    Flux d'écriture gzip compressant des blocs en parallèle.
+
+    Les données sont découpées en blocs de BLOCK_SIZE compressés chacun en un
+    membre gzip indépendant par un pool de threads (zlib libère le GIL) ; les
+    membres sont écrits dans l'ordre. Le fichier produit est un gzip
+    multi-membres standard, lisible par gzip.open, gunzip ou pandas. Au plus
+    2 * workers blocs sont en mémoire à la fois.
+    """
+
+    def __init__(self, fileobj: IO[bytes], level: int = GZIP_LEVEL, workers: Optional[int] = None, block_size: int = BLOCK_SIZE):
+        self._fileobj = fileobj
+        self._level = level
+        self._block_size = block_size
+        self._workers = workers or _default_workers()
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="gzip")
+        self._pending = deque()
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._buffer += b
+        while len(self._buffer) >= self._block_size:
+            self._submit(bytes(self._buffer[:self._block_size]))
+            del self._buffer[:self._block_size]
+        return len(b)
+
+    def _submit(self, block: bytes):
+        self._pending.append(self._executor.submit(gzip.compress, block, self._level))
+        while len(self._pending) > 2 * self._workers:
+            self._fileobj.write(self._pending.popleft().result())
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._fileobj.write(self._pending.popleft().result())
+            self._fileobj.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+            super().close()
+
+def _deflate_file(path: str, level: Optional[int]):
+    """Compresse un fichier en deflate brut ; retourne (données, CRC-32, taille d'origine)."""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    parts, crc, size = [], 0, 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            crc = zlib.crc32(block, crc)
+            size += len(block)
+            parts.append(compressor.compress(block))
+    parts.append(compressor.flush())
+    return b"".join(parts), crc, size
+
+def _write_deflated(archive: zipfile.ZipFile, path: str, arcname: str, deflated) -> None:
+    """Ajoute à une archive zip un membre déjà compressé par _deflate_file."""
+    data, crc, size = deflated
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.CRC, zinfo.file_size, zinfo.compress_size = crc, size, len(data)
+    # Même enchaînement que ZipFile.write, sans recompresser les données
+    archive._writecheck(zinfo)
+    archive._didModify = True
+    zinfo.header_offset = archive.fp.tell()
+    archive.fp.write(zinfo.FileHeader(max(size, len(data)) > zipfile.ZIP64_LIMIT))
+    archive.fp.write(data)
+    archive.filelist.append(zinfo)
+    archive.NameToInfo[zinfo.filename] = zinfo
+    archive.start_dir = archive.fp.tell()
+
+class _ClosingStream(io.BufferedIOBase):
+    """Enveloppe un flux et ferme aussi le fichier sous-jacent à la fermeture."""
+
+    def __init__(self, stream, raw):
+        self._stream = stream
+        self._raw = raw
+
+    def readable(self) -> bool:
+        return self._stream.readable()
+
+    def writable(self) -> bool:
+        return self._stream.writable()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size)
+
+    def read1(self, size: int = -1) -> bytes:
+        return self._stream.read1(size) if hasattr(self._stream, "read1") else self._stream.read(size)
+
+    def readinto(self, b) -> int:
+        return self._stream.readinto(b)
+
+    def write(self, b) -> int:
+        return self._stream.write(b)
+
+    def flush(self):
+        if not self.closed:
+            self._stream.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            super().close()
+            self._stream.close()
+        finally:
+            self._raw.close()
+
 class IOUtils:
     """
     Classe utilitaire pour les opérations générales d'entrée/sortie.
@@ -42,29 +189,141 @@ class IOUtils:
             f.write(content)
 
     @staticmethod
-    def compress_file(filepath: str, output_filepath: str):
+    def open_compressed(filepath: str, mode: str = 'wb', codec: Optional[str] = None, level: Optional[int] = None,
+                        workers: Optional[int] = None, encoding: str = 'utf-8', newline: Optional[str] = None) -> IO:
+        """
+        Ouvre un fichier compressé en lecture ou en écriture, en flux.
+
+        En écriture, gzip est compressé par blocs en parallèle (ParallelGzipWriter)
+        et zstd utilise les threads de zstandard.
+
+        Args:
+            filepath (str): Chemin du fichier.
+            mode (str): 'rb', 'wb', 'r' ou 'w' (les modes texte utilisent encoding).
+            codec (str, optional): 'gzip' ou 'zstd' ; déduit de l'extension par défaut (gzip sinon).
+            level (int, optional): Niveau de compression.
+            workers (int, optional): Nombre de threads de compression (nombre de CPU par défaut).
+
+        Returns:
+            Un objet fichier ; le fermer termine la compression.
+        """
+        codec = codec or codec_from_path(filepath) or "gzip"
+        writing = mode.startswith('w')
+        raw = open(filepath, 'wb' if writing else 'rb')
+        try:
+            if codec == "gzip":
+                if writing:
+                    stream = io.BufferedWriter(ParallelGzipWriter(raw, level or GZIP_LEVEL, workers), buffer_size=BLOCK_SIZE)
+                else:
+                    stream = gzip.GzipFile(fileobj=raw, mode='rb')
+            elif codec == "zstd":
+                if zstandard is None:
+                    raise ImportError("Le codec zstd nécessite le paquet 'zstandard'.")
+                if writing:
+                    compressor = zstandard.ZstdCompressor(level=level or ZSTD_LEVEL, threads=workers or -1)
+                    stream = compressor.stream_writer(raw, closefd=True)
+                else:
+                    stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+            else:
+                raise ValueError(f"Codec de compression non supporté : {codec}")
+        except Exception:
+            raw.close()
+            raise
+        if codec == "gzip":
+            # GzipFile et ParallelGzipWriter ne ferment pas le fichier sous-jacent
+            stream = _ClosingStream(stream, raw)
+        if 'b' not in mode:
+            stream = io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+        return stream
+
+    @staticmethod
+    def compress_file(filepath: str, output_filepath: str, codec: Optional[str] = None, level: Optional[int] = None, workers: Optional[int] = None):
         """
-        Compresse un fichier en utilisant gzip.
+        Compresse un fichier par blocs, en parallèle.
 
         Args:
             filepath (str): Chemin du fichier à compresser.
-            output_filepath (str): Chemin où enregistrer le fichier compressé (.gz).
+            output_filepath (str): Chemin où enregistrer le fichier compressé (.gz ou .zst).
+            codec (str, optional): 'gzip' ou 'zstd' ; déduit de l'extension par défaut.
+            level (int, optional): Niveau de compression.
+            workers (int, optional): Nombre de threads de compression.
         """
+        logger.info(f"Compressing file: {filepath} to {output_filepath}")
         with open(filepath, 'rb') as f_in:
-            logger.info(f"Compressing file: {filepath} to {output_filepath}")
-            with gzip.open(output_filepath, 'wb') as f_out:
-                f_out.writelines(f_in)
+            with IOUtils.open_compressed(output_filepath, 'wb', codec, level, workers) as f_out:
+                shutil.copyfileobj(f_in, f_out, BLOCK_SIZE)
 
     @staticmethod
-    def decompress_file(filepath: str, output_filepath: str):
+    def decompress_file(filepath: str, output_filepath: str, codec: Optional[str] = None):
         """
-        Décompresse un fichier gzip.
+        Décompresse un fichier gzip (mono ou multi-membres) ou zstd, par blocs.
 
         Args:
-            filepath (str): Chemin du fichier compressé (.gz).
+            filepath (str): Chemin du fichier compressé (.gz ou .zst).
             output_filepath (str): Chemin où enregistrer le fichier décompressé.
+            codec (str, optional): 'gzip' ou 'zstd' ; déduit de l'extension par défaut.
         """
-        with gzip.open(filepath, 'rb') as f_in:
-            logger.info(f"Decompressing file: {filepath} to {output_filepath}")
+        logger.info(f"Decompressing file: {filepath} to {output_filepath}")
+        with IOUtils.open_compressed(filepath, 'rb', codec) as f_in:
             with open(output_filepath, 'wb') as f_out:
-                f_out.writelines(f_in)
+                shutil.copyfileobj(f_in, f_out, BLOCK_SIZE)
+
+    @staticmethod
+    def archive_directory(source_dir: str, archive_path: str, fmt: Optional[str] = None, level: Optional[int] = None, workers: Optional[int] = None) -> str:
+        """
+        Archive un répertoire (exports, rapports) en zip, tar.gz ou tar.zst.
+
+        Pour tar.gz et tar.zst, le flux tar est compressé en parallèle (blocs
+        gzip ou threads zstd) pendant le parcours des fichiers. Pour zip, les
+        membres sont compressés (deflate) en parallèle par un pool de threads
+        et écrits dans l'ordre du parcours ; au plus 2 * workers membres
+        compressés sont en mémoire, et les fichiers de plus de
+        ZIP_MEMBER_IN_MEMORY_MAX sont compressés directement par zipfile.
+
+        Args:
+            source_dir (str): Le répertoire à archiver.
+            archive_path (str): Le fichier archive à créer.
+            fmt (str, optional): 'zip', 'tar.gz' ou 'tar.zst' ; déduit de l'extension par défaut.
+            level (int, optional): Niveau de compression.
+            workers (int, optional): Nombre de threads de compression (nombre de CPU par défaut).
+
+        Returns:
+            str: Le chemin de l'archive.
+        """
+        if fmt is None:
+            fmt = "zip" if archive_path.endswith(".zip") else "tar.zst" if archive_path.endswith(".zst") else "tar.gz"
+        os.makedirs(os.path.dirname(os.path.abspath(archive_path)), exist_ok=True)
+        base = os.path.basename(os.path.normpath(source_dir))
+        logger.info(f"Archiving directory {source_dir} to {archive_path} ({fmt})")
+        if fmt == "zip":
+            workers = workers or _default_workers()
+            pending = deque()
+
+            def _write_next():
+                path, arcname, future = pending.popleft()
+                if future is None:
+                    archive.write(path, arcname)
+                else:
+                    _write_deflated(archive, path, arcname, future.result())
+
+            with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=level) as archive, \
+                    ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zip") as executor:
+                for root, dirs, files in os.walk(source_dir):
+                    dirs.sort()
+                    for name in sorted(files):
+                        path = os.path.join(root, name)
+                        arcname = os.path.join(base, os.path.relpath(path, source_dir))
+                        in_memory = os.path.getsize(path) <= ZIP_MEMBER_IN_MEMORY_MAX
+                        pending.append((path, arcname, executor.submit(_deflate_file, path, level) if in_memory else None))
+                        while len(pending) > 2 * workers:
+                            _write_next()
+                while pending:
+                    _write_next()
+        elif fmt in ("tar.gz", "tar.zst"):
+            codec = "gzip" if fmt == "tar.gz" else "zstd"
+            with IOUtils.open_compressed(archive_path, 'wb', codec, level, workers) as stream:
+                with tarfile.open(fileobj=stream, mode='w|', bufsize=BLOCK_SIZE) as archive:
+                    archive.add(source_dir, arcname=base)
+        else:
+            raise ValueError(f"Format d'archive non supporté : {fmt}")
+        return archive_path
@@ -0,0 +1,564 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Point d'accès Microsoft Graph
+GRAPH_URL = "https://graph.microsoft.com/v1.0"
+# Nombre de requêtes simultanées par défaut
+DEFAULT_MAX_WORKERS = 4
+# Nombre de messages par page
+DEFAULT_PAGE_SIZE = 50
+# Nouvelles tentatives sur réponse 429/503/504 (limitation de débit Graph)
+MAX_RETRIES = 5
+# Attente maximale entre deux tentatives (secondes)
+MAX_RETRY_WAIT = 60
+# Propriétés récupérées pour chaque message (le corps est chargé à la demande)
+CHAMPS_RESUME = [
+    "id", "subject", "from", "receivedDateTime", "hasAttachments",
+    "importance", "isRead", "categories", "bodyPreview"
+]
+# Dossiers adressables directement par leur nom connu
+DOSSIERS_CONNUS = {
+    "inbox", "drafts", "sentitems", "deleteditems", "archive", "junkemail", "outbox"
+}
+
+def _utc(date: datetime) -> datetime:
+    """Convertit une date en UTC ; une date sans fuseau est supposée UTC."""
+    if date.tzinfo is None:
+        return date.replace(tzinfo=timezone.utc)
+    return date.astimezone(timezone.utc)
+
+def _format_date(date: datetime) -> str:
+    """Formate une date pour un filtre OData."""
+    return _utc(date).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _parse_date(valeur: Optional[str]) -> Optional[datetime]:
+    """Convertit une date Graph ('2024-01-31T08:00:00Z') en datetime UTC."""
+    if not valeur:
+        return None
+    return datetime.fromisoformat(valeur.replace("Z", "+00:00"))
+
+def _odata(valeur: str) -> str:
+    """Échappe une chaîne littérale OData."""
+    return valeur.replace("'", "''")
+
+def _kql(valeur: str) -> str:
+    """Neutralise les guillemets d'un terme de recherche KQL."""
+    return valeur.replace('"', " ").replace("\\", " ")
+
+class DeltaTokenStore:
+    """
+    Registre SQLite local des liens delta, par boîte aux lettres et par dossier.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS mailbox_delta (
+                    boite TEXT NOT NULL,
+                    dossier TEXT NOT NULL,
+                    delta_link TEXT NOT NULL,
+                    date DATETIME NOT NULL,
+                    PRIMARY KEY (boite, dossier)
+                )
+            """)
+
+    def lire(self, boite: str, dossier: str) -> Optional[str]:
+        """Retourne le lien delta enregistré, ou None."""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT delta_link FROM mailbox_delta WHERE boite = ? AND dossier = ?",
+                (boite, dossier)
+            ).fetchone()
+        return row[0] if row else None
+
+    def enregistrer(self, boite: str, dossier: str, delta_link: str):
+        """Enregistre (ou remplace) le lien delta d'un dossier."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO mailbox_delta (boite, dossier, delta_link, date) VALUES (?, ?, ?, ?)",
+                (boite, dossier, delta_link, datetime.now().isoformat())
+            )
+
+    def supprimer(self, boite: str, dossier: str):
+        """Oublie le lien delta d'un dossier : la prochaine synchronisation sera complète."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM mailbox_delta WHERE boite = ? AND dossier = ?", (boite, dossier))
+
+class GraphMessage:
+    """
+    Message synchronisé : métadonnées immédiates, corps et pièces jointes chargés à la demande.
+    """
+
+    def __init__(self, synchro: "MailboxSync", data: Dict[str, Any]):
+        self.synchro = synchro
+        self.data = data
+        self._corps = None
+        self._pieces_jointes = None
+
+    @property
+    def id(self) -> str:
+        return self.data["id"]
+
+    @property
+    def sujet(self) -> str:
+        return self.data.get("subject") or ""
+
+    @property
+    def expediteur(self) -> str:
+        return ((self.data.get("from") or {}).get("emailAddress") or {}).get("address") or ""
+
+    @property
+    def date_reception(self) -> Optional[datetime]:
+        return _parse_date(self.data.get("receivedDateTime"))
+
+    @property
+    def a_pieces_jointes(self) -> bool:
+        return bool(self.data.get("hasAttachments"))
+
+    @property
+    def importance(self) -> Optional[str]:
+        return self.data.get("importance")
+
+    @property
+    def lu(self) -> bool:
+        return bool(self.data.get("isRead"))
+
+    @property
+    def categories(self) -> List[str]:
+        return self.data.get("categories") or []
+
+    @property
+    def corps(self) -> str:
+        """Corps du message, téléchargé au premier accès."""
+        if self._corps is None:
+            self._corps = self.synchro.lire_corps(self.id)
+        return self._corps
+
+    @property
+    def pieces_jointes(self) -> List[Dict[str, Any]]:
+        """Métadonnées des pièces jointes (id, name, size, contentType), chargées au premier accès."""
+        if self._pieces_jointes is None:
+            self._pieces_jointes = self.synchro.lister_pieces_jointes(self.id) if self.a_pieces_jointes else []
+        return self._pieces_jointes
+
+    def telecharger_pieces_jointes(self, dossier_destination: str, filtre: Optional[str] = None) -> List[str]:
+        """Télécharge les pièces jointes (filtrées sur le nom) et retourne les chemins écrits."""
+        chemins = []
+        for pj in self.pieces_jointes:
+            if filtre and filtre.lower() not in pj["name"].lower():
+                continue
+            chemin = os.path.join(dossier_destination, pj["name"])
+            self.synchro.telecharger_piece_jointe(self.id, pj["id"], chemin)
+            chemins.append(chemin)
+        return chemins
+
+    def to_dict(self, inclure_corps: bool = True) -> Dict[str, Any]:
+        """Informations du message au format de EmailManager._extraire_info_message."""
+        date = self.date_reception
+        return {
+            'id': self.id,
+            'sujet': self.sujet,
+            'expediteur': self.expediteur,
+            'date_reception': date.strftime("%Y-%m-%d %H:%M:%S") if date else None,
+            'pieces_jointes': [pj["name"] for pj in self.pieces_jointes],
+            'corps': self.corps if inclure_corps else self.data.get("bodyPreview", "")
+        }
+
+class MailboxSync:
+    """
+    Lecture d'une boîte aux lettres via l'API REST Microsoft Graph.
+
+    - synchronisation incrémentale par requêtes delta, dont les liens sont
+      conservés localement (DeltaTokenStore) ;
+    - recherche avec filtres appliqués par le serveur ($filter, ou $search pour
+      le contenu et les pièces jointes) ;
+    - pages de résultats et corps des messages récupérés en parallèle, avec un
+      nombre borné de requêtes simultanées ;
+    - corps et pièces jointes téléchargés seulement à la demande.
+    """
+
+    def __init__(
+        self,
+        token_provider: Callable[[], str],
+        utilisateur: str = "me",
+        base_url: str = GRAPH_URL,
+        etat_path: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        timeout: float = 30,
+        session: Optional[requests.Session] = None
+    ):
+        """
+        Args:
+            token_provider: Fonction retournant un jeton d'accès Graph valide (rappelée sur 401).
+            utilisateur: 'me' (authentification déléguée) ou identifiant/adresse de la boîte.
+            base_url: URL de l'API Graph (un serveur simulé pour les tests).
+            etat_path: Base SQLite des liens delta (config/tokens/mailbox_delta.db par défaut).
+            max_workers: Nombre maximal de requêtes simultanées.
+            page_size: Nombre de messages par page.
+            timeout: Délai d'attente d'une requête (secondes).
+            session: Session HTTP à réutiliser.
+        """
+        self.token_provider = token_provider
+        self.utilisateur = utilisateur
+        self.base_url = base_url.rstrip("/")
+        if etat_path is None:
+            etat_path = os.path.join(os.path.dirname(__file__), "..", "config", "tokens", "mailbox_delta.db")
+        self.etat_path = etat_path
+        self.etat = DeltaTokenStore(etat_path)
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self._token = None
+        self._token_lock = threading.Lock()
+        self._dossiers: Dict[str, str] = {}
+
+    @property
+    def prefixe(self) -> str:
+        """Chemin de la boîte aux lettres dans l'API."""
+        return "me" if self.utilisateur == "me" else f"users/{self.utilisateur}"
+
+    def pour_boite(self, utilisateur: str) -> "MailboxSync":
+        """Retourne un lecteur d'une autre boîte (partagée, de groupe) avec la même session et le même registre."""
+        return MailboxSync(
+            self.token_provider, utilisateur, self.base_url, self.etat_path,
+            self.max_workers, self.page_size, self.timeout, self.session
+        )
+
+    def _jeton(self, renouveler: bool = False) -> str:
+        with self._token_lock:
+            if self._token is None or renouveler:
+                self._token = self.token_provider()
+            return self._token
+
+    def _requete(self, url: str, params: Optional[Dict[str, Any]] = None,
+                 headers: Optional[Dict[str, str]] = None, stream: bool = False) -> requests.Response:
+        """
+        Exécute un GET sur l'API, en renouvelant le jeton sur 401 et en
+        respectant Retry-After sur 429/503/504.
+        """
+        if not url.startswith("http"):
+            url = f"{self.base_url}/{url.lstrip('/')}"
+        renouvele = False
+        for tentative in range(MAX_RETRIES + 1):
+            entetes = {"Authorization": f"Bearer {self._jeton()}"}
+            entetes.update(headers or {})
+            response = self.session.get(url, params=params, headers=entetes, timeout=self.timeout, stream=stream)
+            if response.status_code == 401 and not renouvele:
+                renouvele = True
+                self._jeton(renouveler=True)
+                continue
+            if response.status_code in (429, 503, 504) and tentative < MAX_RETRIES:
+                attente = min(float(response.headers.get("Retry-After", 2 ** tentative)), MAX_RETRY_WAIT)
+                logger.warning(f"Graph a répondu {response.status_code}, nouvelle tentative dans {attente} s")
+                time.sleep(attente)
+                continue
+            response.raise_for_status()
+            return response
+        response.raise_for_status()
+        return response
+
+    def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                  headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        return self._requete(url, params, headers).json()
+
+    def dossier_id(self, dossier: str) -> str:
+        """
+        Résout un nom de dossier ('Inbox', 'Archive/Rapports') en identifiant Graph.
+
+        Les dossiers connus sont adressés par leur nom ; les autres sont
+        recherchés niveau par niveau puis mis en cache.
+        """
+        if dossier.lower() in DOSSIERS_CONNUS:
+            return dossier.lower()
+        if dossier in self._dossiers:
+            return self._dossiers[dossier]
+        parent = None
+        for nom in dossier.split("/"):
+            if parent is None and nom.lower() in DOSSIERS_CONNUS:
+                parent = nom.lower()
+                continue
+            url = f"{self.prefixe}/mailFolders" if parent is None else f"{self.prefixe}/mailFolders/{parent}/childFolders"
+            resultats = self._get_json(url, {"$filter": f"displayName eq '{_odata(nom)}'", "$select": "id"})["value"]
+            if not resultats:
+                raise ValueError(f"Dossier introuvable : {dossier}")
+            parent = resultats[0]["id"]
+        self._dossiers[dossier] = parent
+        return parent
+
+    def synchroniser(
+        self,
+        dossier: str = "Inbox",
+        reinitialiser: bool = False,
+        champs: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Synchronise un dossier par requête delta.
+
+        La première synchronisation parcourt tout le dossier ; les suivantes ne
+        retournent que les messages créés ou modifiés et les identifiants
+        supprimés depuis la précédente. Le lien delta n'est enregistré qu'à la
+        fin du parcours : une synchronisation interrompue est reprise au début.
+
+        Args:
+            dossier: Nom du dossier.
+            reinitialiser: Ignorer le lien delta enregistré et tout resynchroniser.
+            champs: Propriétés récupérées (CHAMPS_RESUME par défaut).
+
+        Returns:
+            dict: 'messages' (GraphMessage créés ou modifiés), 'supprimes' (identifiants)
+                  et 'complet' (True pour une synchronisation complète).
+        """
+        if reinitialiser:
+            self.etat.supprimer(self.utilisateur, dossier)
+        delta_link = self.etat.lire(self.utilisateur, dossier)
+        complet = delta_link is None
+        headers = {"Prefer": f"odata.maxpagesize={self.page_size}"}
+        if complet:
+            url = f"{self.prefixe}/mailFolders/{self.dossier_id(dossier)}/messages/delta"
+            params = {"$select": ",".join(champs or CHAMPS_RESUME)}
+        else:
+            url, params = delta_link, None
+
+        messages, supprimes = [], []
+        # Les pages d'une requête delta sont chaînées : chaque lien dépend de la page précédente
+        while True:
+            try:
+                page = self._get_json(url, params, headers)
+            except requests.HTTPError as e:
+                if not complet and e.response is not None and e.response.status_code == 410:
+                    logger.warning(f"Lien delta expiré pour {dossier}, synchronisation complète")
+                    return self.synchroniser(dossier, reinitialiser=True, champs=champs)
+                raise
+            for item in page.get("value", []):
+                if "@removed" in item:
+                    supprimes.append(item["id"])
+                else:
+                    messages.append(GraphMessage(self, item))
+            if "@odata.nextLink" in page:
+                url, params = page["@odata.nextLink"], None
+                continue
+            if "@odata.deltaLink" in page:
+                self.etat.enregistrer(self.utilisateur, dossier, page["@odata.deltaLink"])
+            break
+
+        logger.info(f"Synchronisation de {dossier} : {len(messages)} messages, {len(supprimes)} suppressions")
+        return {"messages": messages, "supprimes": supprimes, "complet": complet}
+
+    def synchroniser_dossiers(self, dossiers: Iterable[str], reinitialiser: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Synchronise plusieurs dossiers en parallèle."""
+        dossiers = list(dossiers)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            resultats = executor.map(lambda d: self.synchroniser(d, reinitialiser), dossiers)
+            return dict(zip(dossiers, resultats))
+
+    @staticmethod
+    def construire_filtre(
+        expediteur: Optional[str] = None,
+        sujet: Optional[str] = None,
+        date_debut: Optional[datetime] = None,
+        date_fin: Optional[datetime] = None,
+        importance: Optional[str] = None,
+        non_lus: Optional[bool] = None,
+        categories: Optional[List[str]] = None,
+        avec_pieces_jointes: Optional[bool] = None
+    ) -> Optional[str]:
+        """Construit le $filter OData correspondant aux critères."""
+        filtres = []
+        if expediteur:
+            filtres.append(f"from/emailAddress/address eq '{_odata(expediteur)}'")
+        if sujet:
+            filtres.append(f"contains(subject,'{_odata(sujet)}')")
+        if date_debut:
+            filtres.append(f"receivedDateTime ge {_format_date(date_debut)}")
+        if date_fin:
+            filtres.append(f"receivedDateTime le {_format_date(date_fin)}")
+        if importance:
+            filtres.append(f"importance eq '{_odata(importance)}'")
+        if non_lus is not None:
+            filtres.append(f"isRead eq {str(not non_lus).lower()}")
+        if categories:
+            filtres.append("(" + " or ".join(f"categories/any(c:c eq '{_odata(c)}')" for c in categories) + ")")
+        if avec_pieces_jointes is not None:
+            filtres.append(f"hasAttachments eq {str(avec_pieces_jointes).lower()}")
+        return " and ".join(filtres) if filtres else None
+
+    @staticmethod
+    def construire_recherche(
+        contenu: Optional[str] = None,
+        piece_jointe: Optional[str] = None,
+        expediteur: Optional[str] = None,
+        sujet: Optional[str] = None
+    ) -> Optional[str]:
+        """Construit la requête $search (KQL) sur le corps, les pièces jointes, l'expéditeur et le sujet."""
+        termes = []
+        if contenu:
+            termes.append(f"body:{_kql(contenu)}")
+        if piece_jointe:
+            termes.append(f"attachment:{_kql(piece_jointe)}")
+        if expediteur:
+            termes.append(f"from:{_kql(expediteur)}")
+        if sujet:
+            termes.append(f"subject:{_kql(sujet)}")
+        return f"\"{' AND '.join(termes)}\"" if termes else None
+
+    def _pages_paralleles(self, url: str, params: Dict[str, Any], limite: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        Récupère toutes les pages d'une requête $filter.
+
+        La première page donne le nombre total de résultats ($count) ; les pages
+        suivantes sont demandées en parallèle par $skip.
+        """
+        headers = {"ConsistencyLevel": "eventual"}
+        top = self.page_size if limite is None else min(self.page_size, limite)
+        premiere = self._get_json(url, dict(params, **{"$top": top, "$count": "true"}), headers)
+        items = list(premiere.get("value", []))
+        total = premiere.get("@odata.count")
+        if total is None:
+            # Pas de décompte : parcours séquentiel des liens de pagination
+            suivant = premiere.get("@odata.nextLink")
+            while suivant and (limite is None or len(items) < limite):
+                page = self._get_json(suivant, headers=headers)
+                items.extend(page.get("value", []))
+                suivant = page.get("@odata.nextLink")
+            return items[:limite] if limite is not None else items
+
+        total = total if limite is None else min(total, limite)
+        offsets = list(range(len(items), total, self.page_size))
+        if offsets:
+            def _page(skip: int) -> List[Dict[str, Any]]:
+                taille = min(self.page_size, total - skip)
+                return self._get_json(url, dict(params, **{"$top": taille, "$skip": skip}), headers).get("value", [])
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for page in executor.map(_page, offsets):
+                    items.extend(page)
+        return items[:total]
+
+    def rechercher(
+        self,
+        dossier: str = "Inbox",
+        expediteur: Optional[str] = None,
+        sujet: Optional[str] = None,
+        contenu: Optional[str] = None,
+        piece_jointe: Optional[str] = None,
+        date_debut: Optional[datetime] = None,
+        date_fin: Optional[datetime] = None,
+        categories: Optional[List[str]] = None,
+        importance: Optional[str] = None,
+        non_lus: Optional[bool] = None,
+        limite: Optional[int] = None
+    ) -> List[GraphMessage]:
+        """
+        Recherche des messages, les critères étant évalués par le serveur.
+
+        Sans critère sur le contenu ou les pièces jointes, la requête utilise
+        $filter et ses pages sont récupérées en parallèle. Sinon elle utilise
+        $search (indexation du corps et des pièces jointes) ; Graph ne combinant
+        pas $search et $filter, les critères restants sont appliqués localement
+        sur les métadonnées, sans télécharger les corps.
+
+        Returns:
+            list[GraphMessage]: Messages dont le corps et les pièces jointes restent à charger.
+        """
+        url = f"{self.prefixe}/mailFolders/{self.dossier_id(dossier)}/messages"
+        params = {"$select": ",".join(CHAMPS_RESUME)}
+
+        if not contenu and not piece_jointe:
+            filtre = self.construire_filtre(expediteur, sujet, date_debut, date_fin, importance, non_lus, categories)
+            if filtre:
+                params["$filter"] = filtre
+            return [GraphMessage(self, item) for item in self._pages_paralleles(url, params, limite)]
+
+        params["$search"] = self.construire_recherche(contenu, piece_jointe, expediteur, sujet)
+        params["$top"] = self.page_size
+        messages, suivant = [], None
+        while limite is None or len(messages) < limite:
+            page = self._get_json(suivant or url, None if suivant else params)
+            for item in page.get("value", []):
+                message = GraphMessage(self, item)
+                if self._retenu(message, date_debut, date_fin, categories, importance, non_lus):
+                    messages.append(message)
+            suivant = page.get("@odata.nextLink")
+            if not suivant:
+                break
+        return messages[:limite] if limite is not None else messages
+
+    @staticmethod
+    def _retenu(
+        message: GraphMessage,
+        date_debut: Optional[datetime],
+        date_fin: Optional[datetime],
+        categories: Optional[List[str]],
+        importance: Optional[str],
+        non_lus: Optional[bool]
+    ) -> bool:
+        """Critères non exprimables en $search, évalués sur les métadonnées."""
+        date = message.date_reception
+        if date_debut and date and date < _utc(date_debut):
+            return False
+        if date_fin and date and date > _utc(date_fin):
+            return False
+        if categories and not set(message.categories).intersection(categories):
+            return False
+        if importance and message.importance != importance:
+            return False
+        if non_lus is not None and message.lu == non_lus:
+            return False
+        return True
+
+    def lire_corps(self, message_id: str) -> str:
+        """Télécharge le corps d'un message."""
+        data = self._get_json(f"{self.prefixe}/messages/{message_id}", {"$select": "body"})
+        return (data.get("body") or {}).get("content", "")
+
+    def lister_pieces_jointes(self, message_id: str) -> List[Dict[str, Any]]:
+        """Liste les pièces jointes d'un message, sans leur contenu."""
+        data = self._get_json(
+            f"{self.prefixe}/messages/{message_id}/attachments",
+            {"$select": "id,name,size,contentType"}
+        )
+        return data.get("value", [])
+
+    def telecharger_piece_jointe(self, message_id: str, piece_jointe_id: str, chemin: str):
+        """Télécharge le contenu d'une pièce jointe par blocs dans chemin."""
+        os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        response = self._requete(f"{self.prefixe}/messages/{message_id}/attachments/{piece_jointe_id}/$value", stream=True)
+        with open(chemin, "wb") as f:
+            for bloc in response.iter_content(chunk_size=1024 * 1024):
+                f.write(bloc)
+
+    def charger(self, messages: List[GraphMessage], corps: bool = True, pieces_jointes: bool = True) -> List[GraphMessage]:
+        """Précharge en parallèle le corps et/ou la liste des pièces jointes des messages."""
+        def _charger(message: GraphMessage):
+            if corps:
+                message.corps
+            if pieces_jointes:
+                message.pieces_jointes
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(_charger, messages))
+        return messages
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from constantes import const1
+
+logger = logging.getLogger(__name__)
+
+# Quota disque par défaut du cache (octets)
+DEFAULT_QUOTA = 2 * 1024 ** 3
+# En dessous de cette taille, le fichier source est relu directement
+MIN_SOURCE_SIZE = 1024 * 1024
+# Options de lecture incompatibles avec le cache (lecture par morceaux, itérateurs)
+UNCACHEABLE_OPTIONS = ("chunksize", "iterator", "nrows", "skipfooter")
+# Compression des fichiers Parquet du cache
+PARQUET_COMPRESSION = "zstd"
+
+class ParseCache:
+    """
+    Cache des fichiers CSV/Excel déjà parsés, stockés au format Parquet.
+
+    Une entrée est identifiée par le chemin du fichier source, sa taille, sa
+    date de modification et les options de lecture : toute modification du
+    fichier ou des options donne une nouvelle clé. Les entrées les moins
+    récemment utilisées sont supprimées au-delà du quota disque.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_QUOTA, min_source_size: int = MIN_SOURCE_SIZE):
+        """
+        Args:
+            cache_dir: Répertoire du cache (OUTPUT_PATHS['temp']/parse_cache par défaut).
+            max_bytes: Taille maximale du cache sur disque.
+            min_source_size: Taille minimale d'un fichier source pour être mis en cache.
+        """
+        if cache_dir is None:
+            temp_dir = const1.OUTPUT_PATHS["temp"] if const1.OUTPUT_PATHS else "./temp"
+            cache_dir = os.path.join(temp_dir, "parse_cache")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.min_source_size = min_source_size
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, filepath: str, reader: str, options: Dict[str, Any]) -> str:
+        """Calcule la clé d'une lecture : chemin, taille, date de modification, lecteur et options."""
+        stat = os.stat(filepath)
+        ident = repr((
+            os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns, reader, sorted(options.items(), key=lambda kv: kv[0])
+        ))
+        return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Retourne l'entrée du cache, ou None si elle est absente ou illisible."""
+        path = self._entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except Exception as e:
+            logger.warning(f"Entrée de cache illisible, supprimée : {path} ({e})")
+            self._remove(path)
+            return None
+        # La date de modification de l'entrée sert de date de dernier accès pour l'éviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> bool:
+        """
+        Enregistre un DataFrame dans le cache puis applique le quota.
+
+        Returns:
+            bool: False si le DataFrame ne peut pas être converti en Parquet (types mixtes...).
+        """
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=True, compression=PARQUET_COMPRESSION)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"DataFrame non mis en cache : {e}")
+            self._remove(tmp_path)
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées jusqu'à respecter le quota."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".parquet"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                logger.info(f"Entrée de cache évincée : {path}")
+
+    def clear(self):
+        """Vide le cache."""
+        for name in os.listdir(self.cache_dir):
+            self._remove(os.path.join(self.cache_dir, name))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def read(self, filepath: Any, reader: str, parse: Callable[[], Any], **options) -> Any:
+        """
+        Lit un fichier via le cache : parse() n'est appelée qu'en l'absence d'entrée valide.
+
+        Les sources qui ne sont pas des fichiers (flux, URL), les petits fichiers
+        et les lectures par morceaux sont toujours passés directement à parse().
+
+        Args:
+            filepath: Le fichier source.
+            reader: Nom du lecteur ('csv', 'excel'...), inclus dans la clé.
+            parse: Fonction de lecture du fichier source.
+            **options: Options de lecture, incluses dans la clé.
+        """
+        if (
+            not isinstance(filepath, (str, os.PathLike))
+            or not os.path.isfile(filepath)
+            or os.path.getsize(filepath) < self.min_source_size
+            or any(options.get(name) for name in UNCACHEABLE_OPTIONS)
+        ):
+            return parse()
+
+        key = self.key(filepath, reader, options)
+        df = self.get(key)
+        if df is not None:
+            logger.info(f"Lecture de {filepath} servie par le cache")
+            return df
+        df = parse()
+        if isinstance(df, pd.DataFrame):
+            self.put(key, df)
+        return df
+
+_default_cache: Optional[ParseCache] = None
+_default_lock = threading.Lock()
+
+def get_default_cache() -> ParseCache:
+    """Retourne le cache partagé du processus (créé au premier appel)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            quota = int(os.getenv("PARSE_CACHE_QUOTA", DEFAULT_QUOTA))
+            _default_cache = ParseCache(max_bytes=quota)
+        return _default_cache
+
+def cache_enabled() -> bool:
+    """Le cache est actif sauf si PARSE_CACHE_ENABLED vaut 0/false."""
+    return os.getenv("PARSE_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
@@ -14,12 +14,39 @@ from reportlab.graphics.shapes import Circle, Rect, Drawing
 from reportlab.graphics.charts.linecharts import HorizontalLineChart
 from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics.charts.piecharts import Pie
+import itertools
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional, Union, Tuple
+from typing import Iterable, Iterator, List, Dict, Optional, Union, Tuple
 import fitz  # PyMuPDF pour des fonctionnalités avancées
 from PIL import Image as PILImage
 import io
 
+# Au-delà de ce nombre de lignes, exporter_dataframe passe en mode grand tableau
+SEUIL_GRAND_TABLEAU = 1000
+# Marges verticales des cellules en mode grand tableau
+PADDING_GRAND_TABLEAU = 1
+
+class _FluxFlowables(list):
+    """Liste de flowables alimentée au fur et à mesure de la construction du document.
+    
+    SimpleDocTemplate.build consomme les flowables en tête de liste : seuls
+    quelques éléments sont matérialisés à la fois.
+    """
+    
+    def __init__(self, source: Iterable, tampon: int = 2):
+        super().__init__()
+        self._source = iter(source)
+        self._tampon = tampon
+    
+    def __len__(self):
+        while super().__len__() < self._tampon:
+            suivant = next(self._source, None)
+            if suivant is None:
+                break
+            self.append(suivant)
+        return super().__len__()
+
 class PDFReader:
     """Classe pour la lecture et l'analyse de fichiers PDF."""
     
@@ -327,6 +354,174 @@ class PDFWriter:
         
         return table
 
+    @staticmethod
+    def formater_dataframe(df: pd.DataFrame, decimales: int = 2, format_date: str = "%d/%m/%Y") -> pd.DataFrame:
+        """Formate toutes les cellules en texte, colonne par colonne.
+        
+        Les nombres et les dates sont formatés de manière vectorisée (une
+        opération par colonne) ; les valeurs manquantes deviennent des chaînes vides.
+        
+        Args:
+            df: DataFrame à formater
+            decimales: Nombre de décimales des colonnes à virgule flottante
+            format_date: Format des colonnes de dates
+        
+        Returns:
+            DataFrame de chaînes, mêmes index et colonnes
+        """
+        colonnes = {}
+        for nom in df.columns:
+            serie = df[nom]
+            manquants = serie.isna().to_numpy()
+            if pd.api.types.is_bool_dtype(serie):
+                texte = serie.astype(str).to_numpy(dtype=object)
+            elif pd.api.types.is_float_dtype(serie):
+                texte = np.char.mod(f"%.{decimales}f", np.nan_to_num(serie.to_numpy(dtype=float))).astype(object)
+            elif pd.api.types.is_integer_dtype(serie):
+                texte = serie.astype(str).to_numpy(dtype=object)
+            elif pd.api.types.is_datetime64_any_dtype(serie):
+                texte = serie.dt.strftime(format_date).to_numpy(dtype=object)
+            else:
+                texte = serie.astype(str).to_numpy(dtype=object)
+            texte[manquants] = ""
+            colonnes[nom] = texte
+        return pd.DataFrame(colonnes, index=df.index)
+    
+    def lignes_par_page(self, taille_police: float = 7, marge_haut: float = 0) -> int:
+        """Estime le nombre de lignes de tableau (hors en-tête) tenant dans une page.
+        
+        Args:
+            taille_police: Taille de police du tableau
+            marge_haut: Hauteur déjà occupée sur la page (titre...)
+        """
+        hauteur_ligne = taille_police * 1.2 + 2 * PADDING_GRAND_TABLEAU
+        disponible = self.doc.height - marge_haut - 2 * hauteur_ligne
+        return max(int(disponible // hauteur_ligne), 1)
+    
+    def hauteur_flowables(self, flowables: List[Flowable]) -> float:
+        """Calcule la hauteur occupée par des flowables placés en haut d'une page."""
+        hauteur = 0
+        for i, flowable in enumerate(flowables):
+            _, h = flowable.wrap(self.doc.width, self.doc.height)
+            # L'espace avant le premier élément d'une page est ignoré par le cadre
+            hauteur += h + flowable.getSpaceAfter() + (flowable.getSpaceBefore() if i else 0)
+        return hauteur
+    
+    def tableaux_pagines(
+        self,
+        df: pd.DataFrame,
+        largeurs_colonnes: Optional[List[float]] = None,
+        lignes_page: Optional[int] = None,
+        taille_police: float = 7,
+        decimales: int = 2,
+        pages_par_bloc: int = 20,
+        marge_premiere_page: float = 0
+    ) -> Iterator[Table]:
+        """Découpe un DataFrame en tableaux d'une page, avec l'en-tête répété.
+        
+        Le DataFrame est formaté par blocs de pages_par_bloc pages : seules les
+        cellules du bloc en cours sont converties en texte et en tableaux. Le
+        premier tableau est raccourci de marge_premiere_page (titre, description...).
+        
+        Args:
+            df: DataFrame à convertir
+            largeurs_colonnes: Largeurs des colonnes (réparties sur la largeur utile par défaut)
+            lignes_page: Nombre de lignes par tableau (estimé d'après la page par défaut)
+            taille_police: Taille de police du tableau
+            decimales: Nombre de décimales des nombres
+            pages_par_bloc: Nombre de pages formatées à la fois
+            marge_premiere_page: Hauteur occupée au-dessus du premier tableau
+        
+        Yields:
+            Table: Un tableau par page
+        """
+        lignes_premiere_page = lignes_page or self.lignes_par_page(taille_police, marge_premiere_page)
+        lignes_page = lignes_page or self.lignes_par_page(taille_police)
+        if not largeurs_colonnes:
+            largeurs_colonnes = [self.doc.width / max(len(df.columns), 1)] * len(df.columns)
+        entete = [str(c) for c in df.columns]
+        style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), taille_police),
+            ('LEADING', (0, 0), (-1, -1), taille_police * 1.2),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('TOPPADDING', (0, 0), (-1, -1), PADDING_GRAND_TABLEAU),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), PADDING_GRAND_TABLEAU),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.whitesmoke]),
+            ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+            ('BOX', (0, 0), (-1, -1), 0.5, colors.black),
+        ])
+        # Bornes des pages : la première page est plus courte, les suivantes ont lignes_page lignes
+        bornes = [0] + list(range(min(lignes_premiere_page, len(df)), len(df), lignes_page)) + [len(df)]
+        for bloc in range(0, len(bornes) - 1, pages_par_bloc):
+            pages = bornes[bloc:bloc + pages_par_bloc + 1]
+            lignes = self.formater_dataframe(df.iloc[pages[0]:pages[-1]], decimales).values.tolist()
+            for debut, fin in zip(pages[:-1], pages[1:]):
+                if fin <= debut:
+                    continue
+                table = Table([entete] + lignes[debut - pages[0]:fin - pages[0]], colWidths=largeurs_colonnes, repeatRows=1)
+                table.setStyle(style)
+                yield table
+    
+    def exporter_grand_dataframe(
+        self,
+        df: pd.DataFrame,
+        chemin_sortie: str,
+        titre: Optional[str] = None,
+        description: Optional[str] = None,
+        largeurs_colonnes: Optional[List[float]] = None,
+        orientation: str = 'portrait',
+        taille_police: float = 7,
+        decimales: int = 2
+    ):
+        """Exporte un grand DataFrame en PDF, page par page.
+        
+        Chaque page reçoit son propre tableau (en-tête répété), suivi d'un saut
+        de page ; le premier tableau tient sous le titre et la description. Les
+        tableaux sont produits au fil de la construction du document : la
+        mémoire utilisée ne dépend pas du nombre de lignes.
+        
+        Args:
+            df: DataFrame à exporter
+            chemin_sortie: Chemin du fichier PDF de sortie
+            titre: Titre du document
+            description: Description ou commentaires
+            largeurs_colonnes: Largeurs des colonnes
+            orientation: 'portrait' ou 'paysage'
+            taille_police: Taille de police du tableau
+            decimales: Nombre de décimales des nombres
+        """
+        self.doc = SimpleDocTemplate(
+            chemin_sortie,
+            pagesize=A4 if orientation == 'portrait' else landscape(A4),
+            rightMargin=30,
+            leftMargin=30,
+            topMargin=30,
+            bottomMargin=30
+        )
+        entete = []
+        if titre:
+            entete.append(Paragraph(titre, self.creer_style_titre()))
+            entete.append(Spacer(1, 12))
+        if description:
+            entete.append(Paragraph(description, self.styles['Normal']))
+            entete.append(Spacer(1, 12))
+        date_str = datetime.now().strftime("%d/%m/%Y %H:%M")
+        entete.append(Paragraph(f"Généré le : {date_str}", self.styles['Normal']))
+        entete.append(Spacer(1, 12))
+        
+        tableaux = self.tableaux_pagines(
+            df, largeurs_colonnes, taille_police=taille_police, decimales=decimales,
+            marge_premiere_page=self.hauteur_flowables(entete)
+        )
+        # Un saut de page avant chaque tableau sauf le premier : une page ne contient jamais deux en-têtes
+        pages = (
+            element
+            for i, tableau in enumerate(tableaux)
+            for element in ((PageBreak(), tableau) if i else (tableau,))
+        )
+        self.doc.build(_FluxFlowables(itertools.chain(entete, pages)))
+    
     def exporter_dataframe(
         self,
         df: pd.DataFrame,
@@ -343,7 +538,13 @@ class PDFWriter:
             description: Description ou commentaires
             chemin_sortie: Chemin du fichier PDF de sortie
             largeurs_colonnes: Liste des largeurs pour chaque colonne (en cm)
+        
+        Au-delà de SEUIL_GRAND_TABLEAU lignes, l'export passe par exporter_grand_dataframe.
         """
+        if chemin_sortie and len(df) > SEUIL_GRAND_TABLEAU:
+            self.exporter_grand_dataframe(df, chemin_sortie, titre, description, largeurs_colonnes)
+            return
+        
         if chemin_sortie:
             self.doc = SimpleDocTemplate(
                 chemin_sortie,
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import logging
+import typing
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from constantes.const1 import TableNames
+from schemas.CompositionFondsGestionnaire import CompositionFondsGestionnaire
+from schemas.CompositionIndice import CompositionIndice
+from schemas.CompositionPortefeuilleGestionnaire import CompositionPortefeuilleGestionnaire
+
+logger = logging.getLogger(__name__)
+
+# Colonnes du rapport d'erreurs
+ERROR_COLUMNS = ["ligne", "colonne", "regle", "valeur", "message"]
+
+# Règles contrôlées
+REGLE_COLONNE = "colonne_manquante"
+REGLE_TYPE = "type"
+REGLE_NULL = "valeur_nulle"
+REGLE_PLAGE = "hors_plage"
+REGLE_CLE = "cle_etrangere"
+
+# Clés étrangères des tables de composition : colonne -> table référencée (colonne id)
+DEFAULT_FOREIGN_KEYS = {
+    "id_fonds": TableNames.FONDS,
+    "id_gestionnaire": TableNames.GESTIONNAIRE,
+    "id_indice": TableNames.INDICE,
+    "id_titre": TableNames.TITRE,
+    "id_Titre": TableNames.TITRE,
+    "id_devise": TableNames.DEVISE,
+    "id_pays": TableNames.PAYS,
+}
+
+# Modèle Pydantic des tables alimentées par les imports de fichiers
+TABLE_SCHEMAS = {
+    TableNames.COMPOSITION_FONDS: CompositionFondsGestionnaire,
+    TableNames.COMPOSITION_PORTEFEUILLE: CompositionPortefeuilleGestionnaire,
+    TableNames.COMPOSITION_INDICE: CompositionIndice,
+}
+
+# Nombre d'erreurs reprises dans le message d'un rejet
+MAX_ERREURS_MESSAGE = 5
+
+def _field_kind(annotation) -> Tuple[str, bool]:
+    """Retourne le type de colonne ('int', 'float', 'bool', 'date', 'str') et si None est accepté."""
+    nullable = False
+    if typing.get_origin(annotation) is Union:
+        args = typing.get_args(annotation)
+        nullable = type(None) in args
+        annotation = next((arg for arg in args if arg is not type(None)), str)
+    if annotation is bool:
+        return "bool", nullable
+    if annotation is int:
+        return "int", nullable
+    if annotation is float:
+        return "float", nullable
+    if annotation in (datetime.date, datetime.datetime):
+        return "date", nullable
+    return "str", nullable
+
+def _model_fields(model) -> List[Tuple[str, str, bool, bool]]:
+    """Liste (nom, type, requis, nullable) des champs d'un modèle Pydantic (v1 ou v2)."""
+    fields = []
+    if hasattr(model, "model_fields"):
+        for name, field in model.model_fields.items():
+            kind, nullable = _field_kind(field.annotation)
+            fields.append((name, kind, field.is_required(), nullable))
+    else:
+        for name, field in model.__fields__.items():
+            kind, nullable = _field_kind(field.outer_type_)
+            fields.append((name, kind, field.required, nullable or field.allow_none))
+    return fields
+
+class ValidationReport:
+    """
+    Résultat d'une validation : masque des lignes valides et erreurs ligne par ligne.
+    """
+
+    def __init__(self, valid: np.ndarray, errors: pd.DataFrame, missing_columns: Optional[List[str]] = None):
+        self.valid = valid
+        self.errors = errors
+        self.missing_columns = missing_columns or []
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.missing_columns and bool(self.valid.all())
+
+    @property
+    def nb_lignes(self) -> int:
+        return len(self.valid)
+
+    @property
+    def nb_rejets(self) -> int:
+        return int((~self.valid).sum())
+
+    def summary(self) -> pd.DataFrame:
+        """Nombre d'erreurs par colonne et par règle."""
+        return self.errors.groupby(["colonne", "regle"]).size().rename("nb_erreurs").reset_index()
+
+    @staticmethod
+    def concat(reports: Iterable["ValidationReport"]) -> "ValidationReport":
+        """Fusionne les rapports de plusieurs chunks."""
+        reports = list(reports)
+        if not reports:
+            return ValidationReport(np.ones(0, dtype=bool), pd.DataFrame(columns=ERROR_COLUMNS))
+        return ValidationReport(
+            np.concatenate([r.valid for r in reports]),
+            pd.concat([r.errors for r in reports], ignore_index=True),
+            sorted({c for r in reports for c in r.missing_columns})
+        )
+
+class SchemaValidator:
+    """
+    Validation colonne par colonne d'un DataFrame à partir d'un modèle Pydantic.
+
+    Les contrôles (colonnes requises, types, nullabilité, plages et clés
+    étrangères) portent sur des colonnes entières, sans instancier le modèle
+    ligne par ligne.
+    """
+
+    def __init__(
+        self,
+        model,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        foreign_keys: Optional[Dict[str, Iterable]] = None
+    ):
+        """
+        Args:
+            model: Le modèle Pydantic (ex. schemas.CompositionIndice.CompositionIndice).
+            ranges: Bornes incluses par colonne, {colonne: (min, max)} ; None pour une borne ouverte.
+            foreign_keys: Valeurs autorisées par colonne, {colonne: identifiants existants}.
+        """
+        self.model = model
+        self.fields = _model_fields(model)
+        self.ranges = ranges or {}
+        self.foreign_keys = {col: np.unique(np.asarray(list(ids))) for col, ids in (foreign_keys or {}).items()}
+
+    @property
+    def required_columns(self) -> List[str]:
+        return [name for name, _, required, _ in self.fields if required]
+
+    @classmethod
+    def from_database(
+        cls,
+        model,
+        engine,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        foreign_key_tables: Optional[Dict[str, str]] = None
+    ) -> "SchemaValidator":
+        """
+        Construit un validateur dont les clés étrangères sont lues en base (une requête par table).
+
+        Args:
+            foreign_key_tables: {colonne: table référencée} ; par défaut, les clés
+                                de DEFAULT_FOREIGN_KEYS présentes dans le modèle.
+        """
+        names = {name for name, _, _, _ in _model_fields(model)}
+        if foreign_key_tables is None:
+            foreign_key_tables = {col: table for col, table in DEFAULT_FOREIGN_KEYS.items() if col in names}
+        ids_by_table = {}
+        with engine.connect() as conn:
+            for table in set(foreign_key_tables.values()):
+                ids_by_table[table] = pd.read_sql(text(f"SELECT id FROM {table}"), conn)["id"].to_numpy()
+        return cls(model, ranges, {col: ids_by_table[table] for col, table in foreign_key_tables.items()})
+
+    @classmethod
+    def for_table(cls, table_name: str, engine) -> Optional["SchemaValidator"]:
+        """
+        Construit le validateur d'une table cible d'import (voir TABLE_SCHEMAS).
+
+        Returns:
+            SchemaValidator: Le validateur, clés étrangères lues en base ; None si
+            aucun modèle n'est associé à la table.
+        """
+        model = TABLE_SCHEMAS.get(table_name)
+        if model is None:
+            logger.info(f"Aucun schéma de validation pour la table {table_name}")
+            return None
+        return cls.from_database(model, engine)
+
+    def check_columns(self, columns: Iterable[str]) -> List[str]:
+        """Retourne les colonnes requises absentes."""
+        present = set(columns)
+        return [col for col in self.required_columns if col not in present]
+
+    def validate(self, df: pd.DataFrame, row_offset: int = 0) -> ValidationReport:
+        """
+        Valide un DataFrame (ou un chunk).
+
+        Args:
+            df: Les données.
+            row_offset: Numéro de la première ligne, pour numéroter les erreurs d'un chunk.
+
+        Returns:
+            ValidationReport: Les lignes valides et le rapport des erreurs.
+        """
+        n = len(df)
+        valid = np.ones(n, dtype=bool)
+        pieces = []
+        missing = self.check_columns(df.columns)
+        for col in missing:
+            pieces.append(pd.DataFrame({
+                "ligne": [None], "colonne": [col], "regle": [REGLE_COLONNE],
+                "valeur": [None], "message": ["colonne requise absente"]
+            }))
+        if missing:
+            valid[:] = False
+
+        def _add(mask: np.ndarray, col: str, regle: str, values: np.ndarray, message: str):
+            idx = np.flatnonzero(mask)
+            if idx.size == 0:
+                return
+            valid[idx] = False
+            pieces.append(pd.DataFrame({
+                "ligne": idx + row_offset,
+                "colonne": col,
+                "regle": regle,
+                "valeur": values[idx],
+                "message": message
+            }))
+
+        for name, kind, _, nullable in self.fields:
+            if name not in df.columns:
+                continue
+            series = df[name]
+            raw = series.to_numpy(dtype=object)
+            isnull = series.isna().to_numpy()
+            if not nullable:
+                _add(isnull, name, REGLE_NULL, raw, "valeur obligatoire manquante")
+
+            numeric = None
+            if kind in ("int", "float"):
+                numeric = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float)
+                bad = np.isnan(numeric) & ~isnull
+                if kind == "int":
+                    bad |= ~np.isnan(numeric) & (np.mod(numeric, 1) != 0)
+                _add(bad, name, REGLE_TYPE, raw, f"valeur non convertible en {kind}")
+            elif kind == "date":
+                parsed = pd.to_datetime(series, errors="coerce", format="mixed")
+                _add(parsed.isna().to_numpy() & ~isnull, name, REGLE_TYPE, raw, "date invalide")
+            elif kind == "bool":
+                bad = ~isnull & ~series.isin([True, False, 0, 1, "True", "False", "true", "false", "0", "1"]).to_numpy()
+                _add(bad, name, REGLE_TYPE, raw, "booléen invalide")
+
+            if name in self.ranges and numeric is not None:
+                low, high = self.ranges[name]
+                with np.errstate(invalid="ignore"):
+                    out = np.zeros(n, dtype=bool)
+                    if low is not None:
+                        out |= numeric < low
+                    if high is not None:
+                        out |= numeric > high
+                _add(out, name, REGLE_PLAGE, raw, f"hors de la plage [{low}, {high}]")
+
+            if name in self.foreign_keys:
+                keys = numeric if numeric is not None else raw
+                known = np.isin(keys, self.foreign_keys[name])
+                _add(~known & ~isnull, name, REGLE_CLE, raw, "identifiant inconnu")
+
+        errors = pd.concat(pieces, ignore_index=True) if pieces else pd.DataFrame(columns=ERROR_COLUMNS)
+        return ValidationReport(valid, errors, missing)
+
+    def as_transform(self, reports: List[ValidationReport], strict: bool = False) -> Callable[[pd.DataFrame], pd.DataFrame]:
+        """
+        Retourne une transformation de chunk pour logic.import_pipeline.ImportPipeline.
+
+        Le rapport de chaque chunk est ajouté à la liste reports. Les lignes
+        invalides sont retirées du chunk ; avec strict, le chunk est rejeté par
+        une ValueError listant les premières erreurs, ce qui annule l'import.
+        """
+        state = {"offset": 0}
+
+        def _transform(chunk: pd.DataFrame) -> pd.DataFrame:
+            report = self.validate(chunk, row_offset=state["offset"])
+            state["offset"] += len(chunk)
+            reports.append(report)
+            if report.missing_columns:
+                raise ValueError(f"Colonnes requises absentes : {report.missing_columns}")
+            if strict and not report.is_valid:
+                erreurs = report.errors.head(MAX_ERREURS_MESSAGE).to_dict("records")
+                raise ValueError(f"{report.nb_rejets} lignes invalides, dont : {erreurs}")
+            return chunk[report.valid]
+
+        return _transform
+
+    def validate_csv(
+        self,
+        file_path: Union[str, Path],
+        chunksize: int = 100_000,
+        encoding: str = 'utf-8',
+        sep: str = ',',
+        **read_kwargs
+    ) -> ValidationReport:
+        """
+        Valide un fichier CSV par chunks, sans le charger entièrement en mémoire.
+
+        L'en-tête est contrôlé d'abord : si des colonnes requises manquent, le
+        fichier n'est pas lu.
+        """
+        header = pd.read_csv(file_path, encoding=encoding, sep=sep, nrows=0, **read_kwargs)
+        missing = self.check_columns(header.columns)
+        if missing:
+            logger.warning(f"Colonnes manquantes dans le CSV {file_path}: {missing}")
+            return ValidationReport(np.zeros(0, dtype=bool), pd.DataFrame(columns=ERROR_COLUMNS), missing)
+
+        reports, offset = [], 0
+        for chunk in pd.read_csv(file_path, encoding=encoding, sep=sep, chunksize=chunksize, dtype=str, **read_kwargs):
+            reports.append(self.validate(chunk, row_offset=offset))
+            offset += len(chunk)
+        report = ValidationReport.concat(reports)
+        logger.info(f"Validation de {file_path}: {report.nb_lignes} lignes, {report.nb_rejets} rejetées")
+        return report